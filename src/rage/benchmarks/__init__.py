@@ -0,0 +1,23 @@
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .runner import (  # noqa
+        BenchmarkResult,
+        BenchmarkReport,
+        compare,
+        measure,
+    )
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "BenchmarkResult": ".runner",
+        "BenchmarkReport": ".runner",
+        "compare": ".runner",
+        "measure": ".runner",
+    },
+)
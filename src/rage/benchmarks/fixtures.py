@@ -0,0 +1,190 @@
+import time
+import random
+import zipfile
+import hashlib
+import pymupdf
+
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from langchain_core.embeddings import Embeddings
+from langchain_qdrant.sparse_embeddings import SparseEmbeddings, SparseVector
+
+
+WORDS = (
+    "access account agreement analysis annual approval asset audit balance "
+    "budget business capital client compliance contract control cost "
+    "customer data delivery department document employee energy equipment "
+    "finance governance health incident information insurance invoice "
+    "legal management market meeting network operation payment policy "
+    "process product project quality record regulation report request "
+    "resource risk safety schedule security service software staff "
+    "standard supplier support system team technology training vendor"
+).split()
+
+DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCX_DOCUMENT = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+<w:body>{paragraphs}</w:body>
+</w:document>"""
+
+
+def get_sentences(seed: int, num_sentences: int) -> list[str]:
+    generator = random.Random(seed)
+    return [
+        " ".join(
+            generator.choice(WORDS) for _ in range(generator.randint(8, 24))
+        ).capitalize()
+        + "."
+        for _ in range(num_sentences)
+    ]
+
+
+def get_sections(
+    seed: int,
+    num_sections: int,
+    num_paragraphs: int = 4,
+    num_sentences: int = 5,
+) -> list[tuple[str, list[str]]]:
+    return [
+        (
+            f"Section {s + 1}",
+            [
+                " ".join(
+                    get_sentences(
+                        seed=seed * 1_000_003 + s * 1_009 + p,
+                        num_sentences=num_sentences,
+                    )
+                )
+                for p in range(num_paragraphs)
+            ],
+        )
+        for s in range(num_sections)
+    ]
+
+
+def get_markdown_text(seed: int, num_sections: int) -> str:
+    return "\n\n".join(
+        f"## {title}\n\n" + "\n\n".join(paragraphs)
+        for title, paragraphs in get_sections(seed, num_sections)
+    )
+
+
+def write_markdown(path: Path, seed: int, num_sections: int) -> None:
+    path.write_text(get_markdown_text(seed=seed, num_sections=num_sections))
+
+
+def write_docx(path: Path, seed: int, num_sections: int) -> None:
+    paragraphs = []
+    for title, texts in get_sections(seed, num_sections):
+        paragraphs.append(
+            f'<w:p><w:pPr><w:pStyle w:val="Heading2"/></w:pPr>'
+            f"<w:r><w:t>{escape(title)}</w:t></w:r></w:p>"
+        )
+
+        paragraphs.extend(
+            f"<w:p><w:r><w:t>{escape(text)}</w:t></w:r></w:p>"
+            for text in texts
+        )
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as f:
+        f.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        f.writestr("_rels/.rels", DOCX_RELS)
+        f.writestr(
+            "word/document.xml",
+            DOCX_DOCUMENT.format(paragraphs="".join(paragraphs)),
+        )
+
+
+def write_pdf(path: Path, seed: int, num_sections: int) -> None:
+    doc = pymupdf.open()
+    for title, texts in get_sections(seed, num_sections):
+        page = doc.new_page()
+        page.insert_textbox(
+            pymupdf.Rect(72, 72, 523, 770),
+            f"{title}\n\n" + "\n\n".join(texts),
+            fontsize=10,
+        )
+
+    doc.save(path)
+    doc.close()
+
+
+def write_fixtures(
+    root_path: Path,
+    num_files: int,
+    num_sections: int,
+) -> dict[str, list[str]]:
+    writers = {"pdf": write_pdf, "docx": write_docx, "md": write_markdown}
+    fixtures: dict[str, list[str]] = {}
+    for extension, writer in writers.items():
+        fixtures[extension] = []
+        for seed in range(num_files):
+            path = root_path / f"fixture_{seed}.{extension}"
+            writer(path=path, seed=seed, num_sections=num_sections)
+            fixtures[extension].append(str(path))
+
+    return fixtures
+
+
+class FakeEmbeddings(Embeddings):
+    # NOTE: deterministic vectors derived from the text hash, with an
+    # optional per-call delay standing in for the embedding API latency.
+    def __init__(
+        self,
+        dimensions: int = 256,
+        latency: float = 0.0,
+        model: str = "fake-embeddings",
+    ):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.model = model
+        self.num_calls = 0
+        self.num_texts = 0
+
+    def _embed(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode()).digest()[:8])
+        generator = random.Random(seed)
+        return [generator.uniform(-1.0, 1.0) for _ in range(self.dimensions)]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.num_calls += 1
+        self.num_texts += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeSparseEmbeddings(SparseEmbeddings):
+    def _embed(self, text: str) -> SparseVector:
+        counts: dict[int, float] = {}
+        for word in text.lower().split():
+            index = int.from_bytes(hashlib.blake2b(word.encode()).digest()[:3])
+            counts[index] = counts.get(index, 0.0) + 1.0
+
+        indices = sorted(counts)
+        return SparseVector(
+            indices=indices,
+            values=[counts[i] for i in indices],
+        )
+
+    def embed_documents(self, texts: list[str]) -> list[SparseVector]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        return self._embed(text)
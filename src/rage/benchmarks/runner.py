@@ -0,0 +1,250 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import numpy as np
+
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Sequence
+
+from rich.table import Table
+from rich.console import Console
+from pydantic import (
+    BaseModel,
+    StrictStr,
+    NonNegativeInt,
+    NonNegativeFloat,
+)
+
+
+console = Console()
+
+
+class BenchmarkResult(BaseModel):
+    name: StrictStr
+    unit: StrictStr
+    num_calls: NonNegativeInt = 0
+    num_items: NonNegativeInt = 0
+    elapsed: NonNegativeFloat = 0.0
+    throughput: NonNegativeFloat = 0.0
+    p50_ms: NonNegativeFloat = 0.0
+    p95_ms: NonNegativeFloat = 0.0
+    p99_ms: NonNegativeFloat = 0.0
+    skipped: StrictStr | None = None
+
+
+class BenchmarkReport(BaseModel):
+    created_at: StrictStr
+    python_version: StrictStr
+    platform: StrictStr
+    scale: NonNegativeFloat
+    results: list[BenchmarkResult] = []
+
+
+class Regression(BaseModel):
+    name: StrictStr
+    metric: StrictStr
+    baseline: NonNegativeFloat
+    current: NonNegativeFloat
+    change: float
+
+
+async def measure(
+    name: str,
+    unit: str,
+    func: Callable[[Any], Awaitable[int]],
+    inputs: Sequence[Any],
+    warmup: int = 0,
+) -> BenchmarkResult:
+    # NOTE: 'func' is awaited once per input, sequentially, and returns the
+    # number of processed items; latencies are per call.
+    if len(inputs) <= warmup:
+        console.log(
+            f"[bold yellow]WARNING:[/] skipping {name}: "
+            f"{len(inputs)} inputs for {warmup} warmup calls"
+        )
+
+        return BenchmarkResult(
+            name=name,
+            unit=unit,
+            skipped=f"no timed calls: {len(inputs)} inputs, warmup={warmup}",
+        )
+
+    for value in inputs[:warmup]:
+        await func(value)
+
+    latencies = []
+    num_items = 0
+    for value in inputs[warmup:]:
+        start = time.perf_counter()
+        num_items += await func(value)
+        latencies.append(time.perf_counter() - start)
+
+    elapsed = sum(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+
+    return BenchmarkResult(
+        name=name,
+        unit=unit,
+        num_calls=len(latencies),
+        num_items=num_items,
+        elapsed=elapsed,
+        throughput=num_items / elapsed if elapsed else 0.0,
+        p50_ms=p50,
+        p95_ms=p95,
+        p99_ms=p99,
+    )
+
+
+def compare(
+    report: BenchmarkReport,
+    baseline: BenchmarkReport,
+    threshold: float,
+) -> list[Regression]:
+    baseline_results = {
+        r.name: r for r in baseline.results if r.skipped is None
+    }
+
+    regressions = []
+    for result in report.results:
+        baseline_result = baseline_results.get(result.name)
+        if result.skipped is not None or baseline_result is None:
+            continue
+
+        # NOTE: lower throughput and higher tail latency are regressions.
+        checks = (
+            ("throughput", -1),
+            ("p95_ms", 1),
+        )
+
+        for metric, direction in checks:
+            base = getattr(baseline_result, metric)
+            current = getattr(result, metric)
+            if not base:
+                continue
+
+            change = (current - base) / base
+            if change * direction > threshold:
+                regressions.append(
+                    Regression(
+                        name=result.name,
+                        metric=metric,
+                        baseline=base,
+                        current=current,
+                        change=change,
+                    )
+                )
+
+    return regressions
+
+
+def print_report(
+    report: BenchmarkReport,
+    baseline: BenchmarkReport | None = None,
+) -> None:
+    baseline_results = (
+        {r.name: r for r in baseline.results} if baseline is not None else {}
+    )
+
+    table = Table(title="rage benchmarks")
+    for column in ("name", "throughput", "p50 ms", "p95 ms", "p99 ms"):
+        table.add_column(
+            column, justify="left" if column == "name" else "right"
+        )
+
+    if baseline is not None:
+        table.add_column("vs baseline", justify="right")
+
+    for result in report.results:
+        if result.skipped is not None:
+            reason = result.skipped.split(":")[0]
+            table.add_row(result.name, f"skipped ({reason})")
+            continue
+
+        row = [
+            result.name,
+            f"{result.throughput:,.1f} {result.unit}/s",
+            f"{result.p50_ms:.2f}",
+            f"{result.p95_ms:.2f}",
+            f"{result.p99_ms:.2f}",
+        ]
+
+        baseline_result = baseline_results.get(result.name)
+        if baseline_result is not None and baseline_result.throughput:
+            change = result.throughput / baseline_result.throughput - 1
+            row.append(f"{change:+.1%}")
+
+        table.add_row(*row)
+
+    console.print(table)
+
+
+async def run(
+    suites: Sequence[str],
+    scale: float,
+) -> BenchmarkReport:
+    from .suites import SUITES
+
+    report = BenchmarkReport(
+        created_at=datetime.now(timezone.utc).isoformat(),
+        python_version=platform.python_version(),
+        platform=platform.platform(),
+        scale=scale,
+    )
+
+    for suite_name in suites:
+        console.log(f"running {suite_name} benchmarks")
+        report.results.extend(await SUITES[suite_name](scale=scale))
+
+    return report
+
+
+def main() -> None:
+    from .suites import SUITES
+
+    parser = argparse.ArgumentParser(description="Run offline benchmarks.")
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=list(SUITES),
+        default=list(SUITES),
+    )
+
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(suites=args.suites, scale=args.scale))
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(report.model_dump_json(indent=2))
+
+    baseline = (
+        BenchmarkReport.model_validate(json.loads(args.baseline.read_text()))
+        if args.baseline is not None
+        else None
+    )
+
+    print_report(report=report, baseline=baseline)
+    if baseline is None:
+        return
+
+    regressions = compare(
+        report=report,
+        baseline=baseline,
+        threshold=args.threshold,
+    )
+
+    for r in regressions:
+        console.log(
+            f"[bold red]REGRESSION:[/] {r.name} {r.metric} "
+            f"{r.baseline:.2f} -> {r.current:.2f} ({r.change:+.1%})"
+        )
+
+    if len(regressions):
+        sys.exit(1)
@@ -0,0 +1,424 @@
+import sys
+import random
+import asyncio
+import tempfile
+import warnings
+import xxhash
+import numpy as np
+
+from pathlib import Path
+from typing import Awaitable, Callable
+from more_itertools import chunked
+
+from rich.console import Console
+
+from rage.config import config
+from rage.meta.interfaces import Document, TextChunk
+
+from .runner import BenchmarkResult, measure
+from .fixtures import (
+    FakeEmbeddings,
+    FakeSparseEmbeddings,
+    get_markdown_text,
+    get_sentences,
+    write_fixtures,
+)
+
+
+console = Console()
+
+
+def get_skipped(name: str, e: Exception) -> BenchmarkResult:
+    console.log(f"[bold yellow]WARNING:[/] skipping {name}: {e}")
+    return BenchmarkResult(
+        name=name,
+        unit="",
+        skipped=f"{type(e).__name__}: {e}",
+    )
+
+
+async def run_loader_benchmarks(scale: float) -> list[BenchmarkResult]:
+    from rage.loaders import DocxLoader, MarkdownLoader, PDFMarkdownLoader
+
+    num_files = max(2, int(8 * scale))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_path:
+        fixtures = write_fixtures(
+            root_path=Path(tmp_path),
+            num_files=num_files,
+            num_sections=8,
+        )
+
+        loaders = (
+            ("loaders.pdf_markdown", PDFMarkdownLoader, "pdf"),
+            ("loaders.docx", DocxLoader, "docx"),
+            ("loaders.markdown", MarkdownLoader, "md"),
+        )
+
+        for name, loader_class, extension in loaders:
+            loader = loader_class(executor="inline")
+
+            async def load(source_path: str, loader=loader) -> int:
+                await loader.load(source_path=source_path)
+                return 1
+
+            try:
+                results.append(
+                    await measure(
+                        name=name,
+                        unit="files",
+                        func=load,
+                        inputs=fixtures[extension],
+                        warmup=1,
+                    )
+                )
+            except Exception as e:
+                results.append(get_skipped(name=name, e=e))
+
+    return results
+
+
+async def run_splitter_benchmarks(scale: float) -> list[BenchmarkResult]:
+    from rage.splitters import MarkdownSplitter, TokenSplitter
+
+    documents = [
+        Document(
+            text=get_markdown_text(seed=seed, num_sections=20),
+            metadata={"document_id": str(seed), "file_name": str(seed)},
+        )
+        for seed in range(max(2, int(32 * scale)))
+    ]
+
+    results = []
+    splitters = (
+        ("splitters.token", TokenSplitter),
+        ("splitters.markdown", MarkdownSplitter),
+    )
+
+    for name, splitter_class in splitters:
+        try:
+            splitter = splitter_class(chunk_size=256, chunk_overlap=32)
+            num_tokens = {
+                doc.text: n
+                for doc, n in zip(
+                    documents,
+                    map(
+                        len,
+                        splitter._encode_batch([d.text for d in documents]),
+                    ),
+                )
+            }
+
+            async def split(
+                document: Document,
+                splitter=splitter,
+                num_tokens=num_tokens,
+            ) -> int:
+                splitter.split_documents(documents=[document])
+                return num_tokens[document.text]
+
+            results.append(
+                await measure(
+                    name=name,
+                    unit="tokens",
+                    func=split,
+                    inputs=documents,
+                    warmup=1,
+                )
+            )
+        except Exception as e:
+            results.append(get_skipped(name=name, e=e))
+
+    return results
+
+
+async def run_embedding_cache_benchmarks(
+    scale: float,
+) -> list[BenchmarkResult]:
+    from langchain_classic.embeddings import CacheBackedEmbeddings
+    from rage.stores import MmapEmbeddingStore
+
+    batches = [
+        get_sentences(seed=seed, num_sentences=64)
+        for seed in range(max(2, int(32 * scale)))
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_path:
+        store = MmapEmbeddingStore(root_path=tmp_path, namespace="fake")
+        embeddings = CacheBackedEmbeddings(
+            underlying_embeddings=FakeEmbeddings(latency=0.005),
+            document_embedding_store=store,
+        )
+
+        async def embed(texts: list[str]) -> int:
+            await embeddings.aembed_documents(texts=texts)
+            return len(texts)
+
+        for name in ("embedding_cache.miss", "embedding_cache.hit"):
+            results.append(
+                await measure(
+                    name=name,
+                    unit="texts",
+                    func=embed,
+                    inputs=batches,
+                )
+            )
+
+        store.close()
+
+    return results
+
+
+async def run_retriever_benchmarks(
+    scale: float,
+    embedded: bool = False,
+) -> list[BenchmarkResult]:
+    # NOTE: the suites run against an in-memory Qdrant without an embedding
+    # cache; the global config is restored for whatever runs afterwards.
+    qdrant_location = config.qdrant_location
+    dense_embed_doc_cache_path = config.dense_embed_doc_cache_path
+
+    config.qdrant_location = ":memory:"
+    config.dense_embed_doc_cache_path = None
+
+    try:
+        return await _run_retriever_benchmarks(scale=scale, embedded=embedded)
+    finally:
+        config.qdrant_location = qdrant_location
+        config.dense_embed_doc_cache_path = dense_embed_doc_cache_path
+
+
+async def _run_retriever_benchmarks(
+    scale: float,
+    embedded: bool,
+) -> list[BenchmarkResult]:
+    from qdrant_client import models
+    from rage.retriever import (
+        Retriever,
+        EmbeddedRetriever,
+        WeightedMetadataItem,
+    )
+
+    # NOTE: qdrant-client's local mode warns that payload indexes are no-ops.
+    warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+
+    retriever = (EmbeddedRetriever if embedded else Retriever)(
+        dense_embeddings=FakeEmbeddings(),
+        sparse_embeddings=FakeSparseEmbeddings(),
+    )
+
+    prefix = "embedded_retriever" if embedded else "retriever"
+
+    collection_name = "benchmarks"
+    await retriever.create_collection(collection_name=collection_name)
+
+    generator = random.Random(0)
+    num_chunks = max(256, int(8192 * scale))
+    text_chunks = [
+        TextChunk(
+            text=text,
+            num_tokens=len(text.split()),
+            metadata={
+                "chunk_id": xxhash.xxh64(text).hexdigest(),
+                "document_id": str(idx // 32),
+                "file_name": f"file_{idx // 256}",
+                "category": generator.choice(["a", "b", "c"]),
+            },
+        )
+        for idx, text in enumerate(
+            " ".join(get_sentences(seed=seed, num_sentences=4))
+            for seed in range(num_chunks)
+        )
+    ]
+
+    async def insert(batch: list[TextChunk]) -> int:
+        stats = await retriever.insert_text_chunks(
+            collection_name=collection_name,
+            text_chunks=batch,
+            remove_stale=False,
+        )
+
+        return stats.num_points
+
+    results = [
+        await measure(
+            name=f"{prefix}.insert",
+            unit="points",
+            func=insert,
+            inputs=list(chunked(text_chunks, 256)),
+        )
+    ]
+
+    queries = [
+        " ".join(get_sentences(seed=-seed - 1, num_sentences=1))
+        for seed in range(max(32, int(128 * scale)))
+    ]
+
+    query_batches = list(chunked(queries, 16))
+    weighted_metadata_items = [
+        WeightedMetadataItem(key="category", value="a", weight=0.1)
+    ]
+
+    searches: dict[str, Callable[[str], Awaitable]] = {
+        "dense_search": lambda q: retriever.dense_search(
+            collection_name=collection_name,
+            query=q,
+        ),
+        "hybrid_search": lambda q: retriever.hybrid_search(
+            collection_name=collection_name,
+            query=q,
+        ),
+        "hybrid_search_dbsf": lambda q: retriever.hybrid_search(
+            collection_name=collection_name,
+            query=q,
+            fusion=models.Fusion.DBSF,
+        ),
+        "sparse_search": lambda q: retriever.sparse_search(
+            collection_name=collection_name,
+            query=q,
+        ),
+    }
+
+    batch_searches: dict[str, Callable[[list[str]], Awaitable]] = {
+        "dense_search_batch": lambda qs: retriever.dense_search_batch(
+            collection_name=collection_name,
+            queries=qs,
+        ),
+        "hybrid_search_batch": lambda qs: retriever.hybrid_search_batch(
+            collection_name=collection_name,
+            queries=qs,
+        ),
+        "sparse_search_batch": lambda qs: retriever.sparse_search_batch(
+            collection_name=collection_name,
+            queries=qs,
+        ),
+    }
+
+    searches["dense_search_weighted"] = lambda q: (
+        retriever.dense_search_weighted(
+            collection_name=collection_name,
+            query=q,
+            weighted_metadata_items=weighted_metadata_items,
+        )
+    )
+
+    batch_searches["dense_search_weighted_batch"] = lambda qs: (
+        retriever.dense_search_weighted_batch(
+            collection_name=collection_name,
+            queries=qs,
+            weighted_metadata_items=weighted_metadata_items,
+        )
+    )
+
+    for name, search in searches.items():
+
+        async def run_search(query: str, search=search) -> int:
+            await search(query)
+            return 1
+
+        results.append(
+            await measure(
+                name=f"{prefix}.{name}",
+                unit="queries",
+                func=run_search,
+                inputs=queries,
+                warmup=1,
+            )
+        )
+
+    for name, batch_search in batch_searches.items():
+
+        async def run_batch_search(
+            batch: list[str],
+            batch_search=batch_search,
+        ) -> int:
+            await batch_search(batch)
+            return len(batch)
+
+        results.append(
+            await measure(
+                name=f"{prefix}.{name}",
+                unit="queries",
+                func=run_batch_search,
+                inputs=query_batches,
+                warmup=1,
+            )
+        )
+
+    if embedded:
+        retriever.close()  # type: ignore
+
+    return results
+
+
+async def run_embedded_retriever_benchmarks(
+    scale: float,
+) -> list[BenchmarkResult]:
+    return await run_retriever_benchmarks(scale=scale, embedded=True)
+
+
+IMPORT_STATEMENTS = {
+    "imports.rage": "import rage",
+    "imports.loaders": "from rage.loaders import PDFMarkdownLoader",
+    "imports.splitters": "from rage.splitters import MarkdownSplitter",
+    "imports.embeddings": "from rage.embeddings import InstrumentedEmbeddings",
+    "imports.retriever": "from rage.retriever import Retriever",
+    "imports.pipelines": "from rage.pipelines import IngestionPipeline",
+}
+
+
+async def run_import_benchmarks(scale: float) -> list[BenchmarkResult]:
+    # NOTE: every import runs in a fresh interpreter so no module is cached;
+    # the interpreter start-up itself is excluded from the timing.
+    async def get_import_time(statement: str) -> float:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            "import time; start = time.perf_counter(); "
+            f"{statement}; print(time.perf_counter() - start)",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+        stdout, _ = await process.communicate()
+        assert process.returncode == 0, f"'{statement}' failed"
+
+        return float(stdout)
+
+    results = []
+    for name, statement in IMPORT_STATEMENTS.items():
+        try:
+            latencies = [
+                await get_import_time(statement)
+                for _ in range(max(3, int(5 * scale)))
+            ]
+
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+            results.append(
+                BenchmarkResult(
+                    name=name,
+                    unit="imports",
+                    num_calls=len(latencies),
+                    num_items=len(latencies),
+                    elapsed=sum(latencies),
+                    throughput=len(latencies) / sum(latencies),
+                    p50_ms=p50,
+                    p95_ms=p95,
+                    p99_ms=p99,
+                )
+            )
+        except Exception as e:
+            results.append(get_skipped(name=name, e=e))
+
+    return results
+
+
+SUITES: dict[str, Callable[..., Awaitable[list[BenchmarkResult]]]] = {
+    "loaders": run_loader_benchmarks,
+    "splitters": run_splitter_benchmarks,
+    "embedding_cache": run_embedding_cache_benchmarks,
+    "retriever": run_retriever_benchmarks,
+    "embedded_retriever": run_embedded_retriever_benchmarks,
+    "imports": run_import_benchmarks,
+}
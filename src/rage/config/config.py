@@ -1,4 +1,6 @@
-from pydantic import StrictInt, StrictStr
+from typing import Literal
+
+from pydantic import StrictBool, StrictInt, StrictStr
 from pydantic_settings import BaseSettings
 
 
@@ -10,16 +12,31 @@ class Config(BaseSettings):
     qdrant_host: StrictStr = "rage-qdrant"
     qdrant_port: StrictInt = 6333
     qdrant_grpc_port: StrictInt = 6334
+    qdrant_prefer_grpc: StrictBool = False
+    qdrant_location: StrictStr | None = None
 
-    dense_embed_doc_cache_path: StrictStr = (
+    dense_embed_doc_cache_path: StrictStr | None = (
         "/resources/cache/embeddings/documents"
     )
 
-    dense_embed_query_cache_path: StrictStr = (
+    dense_embed_query_cache_path: StrictStr | None = (
         "/resources/cache/embeddings/queries"
     )
 
+    dense_embed_cache_store: Literal["mmap", "local_file"] = "mmap"
+    dense_embed_cache_dtype: Literal["float32", "float16"] = "float32"
+    dense_embed_cache_max_bytes: StrictInt | None = None
+
     fast_embed_sparse_cache: StrictStr = "/resources/cache/fes"
+    fast_embed_dense_cache: StrictStr = "/resources/cache/fed"
+    fast_embed_rerank_cache: StrictStr = "/resources/cache/fer"
+
+    document_cache_path: StrictStr | None = "/resources/cache/documents"
+    document_cache_max_bytes: StrictInt | None = 2 * 1024**3
+    document_cache_use_redis: StrictBool = True
+    document_cache_redis_ttl: StrictInt | None = 7 * 24 * 3600
+
+    converted_doc_cache_path: StrictStr = "/resources/cache/converted"
 
 
 config = Config()
@@ -1 +1,2 @@
 from .doc2docx import doc2docx  # noqa
+from .batch_converter import BatchConverter, ConversionResult  # noqa
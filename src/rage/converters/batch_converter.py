@@ -0,0 +1,271 @@
+import os
+import shutil
+import signal
+import asyncio
+import tempfile
+import xxhash
+
+from pathlib import Path
+from collections import defaultdict
+from more_itertools import chunked
+
+from rich.console import Console
+from pydantic import BaseModel, StrictBool, StrictStr
+
+from rage.telemetry import telemetry
+
+
+console = Console()
+
+
+class ConversionResult(BaseModel):
+    source_path: StrictStr
+    output_path: StrictStr | None = None
+    skipped: StrictBool = False
+    error: StrictStr | None = None
+
+
+def move_file(source_path: Path, target_path: Path) -> None:
+    try:
+        os.replace(source_path, target_path)
+    except OSError:
+        # NOTE: across file systems, copy next to the target first so the
+        # target is never seen half written.
+        tmp_path = target_path.with_name(f".{target_path.name}.tmp")
+        shutil.copy2(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+        source_path.unlink()
+
+
+class BatchConverter:
+    # NOTE: each LibreOffice invocation converts a whole batch of files and
+    # uses its own profile directory, so up to 'max_workers' processes run
+    # in parallel without conflicting on the shared user profile.
+    def __init__(
+        self,
+        convert_to: str = "docx",
+        max_workers: int = 4,
+        batch_size: int = 50,
+        timeout: float = 60.0,
+        libreoffice_path: str = "libreoffice",
+        profile_path: str | None = None,
+    ):
+        assert max_workers > 0, "max_workers must be positive."
+        assert batch_size > 0, "batch_size must be positive."
+
+        self.convert_to = convert_to
+        self.extension = convert_to.split(":")[0]
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.libreoffice_path = libreoffice_path
+
+        self._tmp_profile_path = (
+            tempfile.mkdtemp(prefix="rage-libreoffice-")
+            if profile_path is None
+            else None
+        )
+
+        self.profile_path = Path(profile_path or self._tmp_profile_path)
+        self.profile_path.mkdir(parents=True, exist_ok=True)
+        self.profiles: asyncio.Queue[Path] = asyncio.Queue()
+        for idx in range(max_workers):
+            self.profiles.put_nowait(self.profile_path / f"worker_{idx}")
+
+    def get_output_path(
+        self,
+        source_path: str,
+        outdir: str | None,
+        key_by_source: bool = False,
+    ) -> Path:
+        file_path = Path(source_path)
+        _outdir = Path(outdir) if outdir is not None else file_path.parent
+        if outdir is not None and key_by_source:
+            # NOTE: one sub directory per source path, so files sharing a
+            # stem never overwrite each other in a shared 'outdir'.
+            _outdir /= xxhash.xxh64(str(file_path.resolve())).hexdigest()
+
+        return _outdir / f"{file_path.stem}.{self.extension}"
+
+    def is_up_to_date(self, source_path: str, output_path: Path) -> bool:
+        if not output_path.exists():
+            return False
+
+        return output_path.stat().st_mtime >= Path(source_path).stat().st_mtime
+
+    def _get_batches(
+        self,
+        items: list[tuple[int, str, Path]],
+    ) -> list[list[tuple[int, str, Path]]]:
+        # NOTE: LibreOffice names outputs after the input stem, so files
+        # sharing a stem go to different batches.
+        rounds = defaultdict(list)
+        num_stems: dict[str, int] = defaultdict(int)
+        for item in items:
+            stem = Path(item[1]).stem
+            rounds[num_stems[stem]].append(item)
+            num_stems[stem] += 1
+
+        return [
+            list(batch)
+            for round_items in rounds.values()
+            for batch in chunked(round_items, self.batch_size)
+        ]
+
+    async def _run_libreoffice(
+        self,
+        source_paths: list[str],
+        outdir: Path,
+        profile_path: Path,
+    ) -> str | None:
+        process = await asyncio.create_subprocess_exec(
+            self.libreoffice_path,
+            f"-env:UserInstallation={profile_path.resolve().as_uri()}",
+            "--headless",
+            "--norestore",
+            "--convert-to",
+            self.convert_to,
+            "--outdir",
+            str(outdir),
+            *source_paths,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+
+        try:
+            _, stderr = await asyncio.wait_for(
+                process.communicate(),
+                timeout=self.timeout * len(source_paths),
+            )
+        except TimeoutError:
+            # NOTE: soffice forks, so the whole process group is killed.
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+            return "timeout"
+
+        if process.returncode != 0:
+            return stderr.decode(errors="replace").strip()[-500:] or (
+                f"exit code {process.returncode}"
+            )
+
+        return None
+
+    async def _convert_batch(
+        self,
+        items: list[tuple[int, str, Path]],
+    ) -> dict[int, ConversionResult]:
+        profile_path = await self.profiles.get()
+        try:
+            with (
+                telemetry.span("converter.batch", convert_to=self.extension),
+                tempfile.TemporaryDirectory(dir=self.profile_path) as tmp_path,
+            ):
+                error = await self._run_libreoffice(
+                    source_paths=[source_path for _, source_path, _ in items],
+                    outdir=Path(tmp_path),
+                    profile_path=profile_path,
+                )
+
+                results = {}
+                failed = []
+                for idx, source_path, output_path in items:
+                    staged_path = (
+                        Path(tmp_path) / f"{Path(source_path).stem}."
+                        f"{self.extension}"
+                    )
+
+                    if not staged_path.exists():
+                        failed.append((idx, source_path, output_path))
+                        continue
+
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    move_file(staged_path, output_path)
+                    results[idx] = ConversionResult(
+                        source_path=source_path,
+                        output_path=str(output_path),
+                    )
+        finally:
+            self.profiles.put_nowait(profile_path)
+
+        # NOTE: a crash or a timeout aborts the files after the faulty one,
+        # so the failed files are retried one by one to isolate it.
+        if error is not None and len(items) > 1 and len(failed):
+            for item in failed:
+                results |= await self._convert_batch([item])
+
+            return results
+
+        for idx, source_path, _ in failed:
+            results[idx] = ConversionResult(
+                source_path=source_path,
+                error=error or "conversion failed",
+            )
+
+        return results
+
+    async def convert(
+        self,
+        source_paths: list[str],
+        outdir: str | None = None,
+        force: bool = False,
+        key_by_source: bool = False,
+    ) -> list[ConversionResult]:
+        results: dict[int, ConversionResult] = {}
+        items = []
+        output_paths = set()
+        for idx, source_path in enumerate(source_paths):
+            output_path = self.get_output_path(
+                source_path,
+                outdir=outdir,
+                key_by_source=key_by_source,
+            )
+            if output_path in output_paths:
+                results[idx] = ConversionResult(
+                    source_path=source_path,
+                    error=f"duplicate output path {output_path}",
+                )
+
+                continue
+
+            output_paths.add(output_path)
+            if not Path(source_path).exists():
+                results[idx] = ConversionResult(
+                    source_path=source_path,
+                    error="file not found",
+                )
+
+                continue
+
+            if not force and self.is_up_to_date(source_path, output_path):
+                results[idx] = ConversionResult(
+                    source_path=source_path,
+                    output_path=str(output_path),
+                    skipped=True,
+                )
+
+                continue
+
+            items.append((idx, source_path, output_path))
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self._convert_batch(batch))
+                for batch in self._get_batches(items)
+            ]
+
+        for t in tasks:
+            results |= t.result()
+
+        num_errors = sum(r.error is not None for r in results.values())
+        if num_errors:
+            console.log(
+                f"[bold yellow]WARNING:[/] {num_errors} of "
+                f"{len(source_paths)} files failed to convert"
+            )
+
+        return [results[idx] for idx in range(len(source_paths))]
+
+    def close(self) -> None:
+        if self._tmp_profile_path is not None:
+            shutil.rmtree(self._tmp_profile_path, ignore_errors=True)
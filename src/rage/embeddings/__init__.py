@@ -1 +1,23 @@
-from .ionos_embeddings import IonosEmbeddings  # noqa
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .ionos_embeddings import IonosEmbeddings  # noqa
+    from .coalescing_embeddings import CoalescingEmbeddings  # noqa
+    from .instrumented_embeddings import InstrumentedEmbeddings  # noqa
+    from .fastembed_embeddings import FastEmbedEmbeddings  # noqa
+    from .query_embeddings import aembed_queries  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "IonosEmbeddings": ".ionos_embeddings",
+        "CoalescingEmbeddings": ".coalescing_embeddings",
+        "InstrumentedEmbeddings": ".instrumented_embeddings",
+        "FastEmbedEmbeddings": ".fastembed_embeddings",
+        "aembed_queries": ".query_embeddings",
+    },
+)
@@ -0,0 +1,120 @@
+import asyncio
+
+from more_itertools import flatten
+from langchain_core.embeddings import Embeddings
+
+from .query_embeddings import aembed_queries
+
+
+class CoalescingEmbeddings(Embeddings):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_wait_ms: float = 5.0,
+        max_batch_size: int = 64,
+    ):
+        super().__init__()
+
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", None)
+        self.dimensions = getattr(embeddings, "dimensions", None)
+
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._pending: list[tuple[list[str], asyncio.Future, bool]] = []
+        self._pending_size = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        (vector,) = await self._submit(texts=[text], query=True)
+        return vector
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        if len(texts) >= self.max_batch_size:
+            return await aembed_queries(self.embeddings, texts)
+
+        return await self._submit(texts=texts, query=True)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if len(texts) >= self.max_batch_size:
+            return await self.embeddings.aembed_documents(texts)
+
+        return await self._submit(texts=texts, query=False)
+
+    async def _submit(
+        self, texts: list[str], query: bool
+    ) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.append((texts, future, query))
+        self._pending_size += len(texts)
+
+        if self._pending_size >= self.max_batch_size:
+            self._flush()
+
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending = self._pending
+        self._pending = []
+        self._pending_size = 0
+
+        if not len(pending):
+            return
+
+        # NOTE: queries and documents are embedded in separate batches, since
+        # models may embed queries differently, e.g. with a prefix. Queries
+        # are only embedded as one request by embeddings that implement
+        # 'aembed_queries', others are called once per query.
+        for query in (True, False):
+            kind_pending = [(t, f) for t, f, q in pending if q is query]
+            if not len(kind_pending):
+                continue
+
+            task = asyncio.get_running_loop().create_task(
+                self._embed_pending(pending=kind_pending, query=query)
+            )
+
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed_pending(
+        self,
+        pending: list[tuple[list[str], asyncio.Future]],
+        query: bool,
+    ) -> None:
+        unique_texts = list(dict.fromkeys(flatten(t for t, _ in pending)))
+
+        try:
+            vectors = (
+                await aembed_queries(self.embeddings, unique_texts)
+                if query
+                else await self.embeddings.aembed_documents(unique_texts)
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+            return
+
+        text_vectors = dict(zip(unique_texts, vectors))
+        for texts, future in pending:
+            if not future.done():
+                future.set_result([text_vectors[text] for text in texts])
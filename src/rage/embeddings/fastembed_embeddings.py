@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from typing import TYPE_CHECKING
+from langchain_core.embeddings import Embeddings
+
+from rage.config import config
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
+
+class FastEmbedEmbeddings(Embeddings):
+    # NOTE: runs fastembed's ONNX models locally on the CPU. The model is
+    # downloaded to 'cache_dir' and loaded on first use.
+    def __init__(
+        self,
+        model: str = "BAAI/bge-small-en-v1.5",
+        cache_dir: str | None = None,
+        batch_size: int = 256,
+        parallel: int | None = None,
+        min_parallel_texts: int = 8192,
+        threads: int | None = None,
+    ):
+        from fastembed import TextEmbedding
+
+        super().__init__()
+
+        self.model = model
+        self.dimensions = TextEmbedding.get_embedding_size(model)
+
+        self.cache_dir = (
+            cache_dir
+            if cache_dir is not None
+            else config.fast_embed_dense_cache
+        )
+
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.min_parallel_texts = min_parallel_texts
+        self.threads = threads
+
+        self._lock = threading.Lock()
+        self._text_embedding: "TextEmbedding | None" = None
+
+    @property
+    def text_embedding(self) -> "TextEmbedding":
+        with self._lock:
+            if self._text_embedding is None:
+                from fastembed import TextEmbedding
+
+                self._text_embedding = TextEmbedding(
+                    model_name=self.model,
+                    cache_dir=self.cache_dir,
+                    threads=self.threads,
+                )
+
+            return self._text_embedding
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        # NOTE: fastembed starts a new worker pool on every call with
+        # 'parallel', and each worker loads its own copy of the model. The
+        # Retriever embeds one 'batch_size' batch per call, so the pool is
+        # only worth it for large explicit calls of 'min_parallel_texts'.
+        parallel = (
+            self.parallel if len(texts) >= self.min_parallel_texts else None
+        )
+
+        embeddings = self.text_embedding.embed(
+            texts,
+            batch_size=self.batch_size,
+            parallel=parallel,
+        )
+
+        return [e.tolist() for e in embeddings]
+
+    def embed_query(self, text: str) -> list[float]:
+        return next(iter(self.text_embedding.query_embed(text))).tolist()
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        embeddings = self.text_embedding.query_embed(
+            texts,
+            batch_size=self.batch_size,
+        )
+
+        return [e.tolist() for e in embeddings]
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.embed_queries, texts)
@@ -0,0 +1,95 @@
+from langchain_core.embeddings import Embeddings
+
+from rage.telemetry import Span, telemetry
+
+from .query_embeddings import aembed_queries
+
+
+class InstrumentedEmbeddings(Embeddings):
+    # NOTE: the retriever wraps both the model and the cache-backed
+    # embeddings; model calls report their texts to the enclosing cache
+    # span, which derives its cache hits from them.
+    def __init__(self, embeddings: Embeddings, layer: str = "model"):
+        super().__init__()
+
+        self.embeddings = embeddings
+        self.layer = layer
+        self.model = getattr(
+            embeddings,
+            "model",
+            getattr(
+                getattr(embeddings, "underlying_embeddings", None),
+                "model",
+                None,
+            ),
+        )
+        self.dimensions = getattr(embeddings, "dimensions", None)
+
+    def _span(self, method: str) -> Span:
+        return telemetry.span(  # type: ignore
+            f"embeddings.{method}",
+            layer=self.layer,
+            model=str(self.model),
+        )
+
+    def _record(self, span: Span, num_texts: int) -> None:
+        span.set("texts", num_texts)
+        if self.layer == "model":
+            if span.parent is not None and span.parent.name.startswith(
+                "embeddings."
+            ):
+                span.parent.add("model_texts", num_texts)
+
+            return
+
+        span.set("cache_hits", num_texts - span.values.get("model_texts", 0))
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not telemetry.enabled:
+            return self.embeddings.embed_documents(texts)
+
+        with self._span("embed_documents") as span:
+            vectors = self.embeddings.embed_documents(texts)
+            self._record(span=span, num_texts=len(texts))
+
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        if not telemetry.enabled:
+            return self.embeddings.embed_query(text)
+
+        with self._span("embed_query") as span:
+            vector = self.embeddings.embed_query(text)
+            self._record(span=span, num_texts=1)
+
+        return vector
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not telemetry.enabled:
+            return await self.embeddings.aembed_documents(texts)
+
+        with self._span("embed_documents") as span:
+            vectors = await self.embeddings.aembed_documents(texts)
+            self._record(span=span, num_texts=len(texts))
+
+        return vectors
+
+    async def aembed_query(self, text: str) -> list[float]:
+        if not telemetry.enabled:
+            return await self.embeddings.aembed_query(text)
+
+        with self._span("embed_query") as span:
+            vector = await self.embeddings.aembed_query(text)
+            self._record(span=span, num_texts=1)
+
+        return vector
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        if not telemetry.enabled:
+            return await aembed_queries(self.embeddings, texts)
+
+        with self._span("embed_queries") as span:
+            vectors = await aembed_queries(self.embeddings, texts)
+            self._record(span=span, num_texts=len(texts))
+
+        return vectors
@@ -1,8 +1,12 @@
 import os
-import json
-import requests  # type: ignore
+import time
+import random
+import asyncio
+import httpx
 
 from typing import Literal
+from contextlib import suppress
+from more_itertools import chunked, flatten
 from langchain_core.embeddings import Embeddings
 
 
@@ -13,6 +17,8 @@ EMBEDDING_DIMENSIONS = {
     "sentence-transformers/paraphrase-multilingual-mpnet-base-v2": 768,
 }
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 class IonosEmbeddings(Embeddings):
     def __init__(
@@ -23,6 +29,11 @@ class IonosEmbeddings(Embeddings):
             "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
         ] = "BAAI/bge-m3",
         endpoint: str = "https://openai.inference.de-txl.ionos.com/v1/embeddings",
+        batch_size: int = 128,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        timeout: float = 60.0,
     ):
         super().__init__()
 
@@ -35,26 +46,191 @@ class IonosEmbeddings(Embeddings):
             "Content-Type": "application/json",
         }
 
-    def get_embeddings_data_items_(self, texts: list[str]) -> list[dict]:
-        body = {
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        self.timeout = httpx.Timeout(timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_concurrency,
+            max_keepalive_connections=max_concurrency,
+        )
+
+        self._client: httpx.Client | None = None
+        self._async_clients: dict[
+            asyncio.AbstractEventLoop,
+            tuple[httpx.AsyncClient, asyncio.Semaphore],
+        ] = {}
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+            )
+
+        return self._client
+
+    async def _get_async_client(
+        self,
+    ) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # NOTE: httpx async connections are bound to the event loop that
+        # opened them, so each running loop gets its own pool, and the pools
+        # of loops that have been closed since are released.
+        await self._close_stale_async_clients()
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = (
+                httpx.AsyncClient(
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    limits=self.limits,
+                ),
+                asyncio.Semaphore(self.max_concurrency),
+            )
+
+        return self._async_clients[loop]
+
+    async def _close_stale_async_clients(self) -> None:
+        for loop in [loop for loop in self._async_clients if loop.is_closed()]:
+            client, _ = self._async_clients.pop(loop)
+
+            # NOTE: the transports of a closed loop can't be shut down
+            # gracefully anymore; closing the client still drops its
+            # connections, whose sockets are then closed on collection.
+            with suppress(RuntimeError):
+                await client.aclose()
+
+    def _get_body(self, texts: list[str]) -> dict:
+        return {
             "model": self.model,
             "input": texts,
         }
 
-        result = requests.post(
-            self.endpoint,
-            json=body,
-            headers=self.headers,
+    def _get_retry_delay(
+        self,
+        response: httpx.Response | None,
+        attempt: int,
+    ) -> float:
+        retry_after = (
+            response.headers.get("Retry-After")
+            if response is not None
+            else None
         )
 
-        status_code = result.status_code
-        assert status_code == 200, f"status_code: {status_code}"
-        return json.loads(result.content.decode())["data"]
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+
+        return self.backoff_factor * (2**attempt) + random.uniform(0, 0.1)
+
+    def _parse_data_items(self, response: httpx.Response) -> list[dict]:
+        response.raise_for_status()
+
+        data_items = response.json()["data"]
+        return sorted(data_items, key=lambda di: di.get("index", 0))
+
+    def get_embeddings_data_items_(self, texts: list[str]) -> list[dict]:
+        for attempt in range(self.max_retries + 1):
+            # NOTE: timeouts and connection errors are httpx.TransportError
+            # subclasses and are retried like the retryable status codes.
+            try:
+                response = self.client.post(
+                    self.endpoint,
+                    json=self._get_body(texts=texts),
+                )
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+
+                time.sleep(self._get_retry_delay(None, attempt=attempt))
+                continue
+
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt == self.max_retries
+            ):
+                break
+
+            time.sleep(self._get_retry_delay(response, attempt=attempt))
+
+        return self._parse_data_items(response=response)
+
+    async def aget_embeddings_data_items_(
+        self, texts: list[str]
+    ) -> list[dict]:
+        client, semaphore = await self._get_async_client()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await client.post(
+                        self.endpoint,
+                        json=self._get_body(texts=texts),
+                    )
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+
+                await asyncio.sleep(
+                    self._get_retry_delay(None, attempt=attempt)
+                )
+                continue
+
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt == self.max_retries
+            ):
+                break
+
+            await asyncio.sleep(
+                self._get_retry_delay(response, attempt=attempt)
+            )
+
+        return self._parse_data_items(response=response)
 
     def embed_query(self, text: str) -> list[float]:
         data_items = self.get_embeddings_data_items_(texts=[text])
         return data_items[0]["embedding"]
 
     def embed_documents(self, texts: list[str]) -> list[list[float]]:
-        data_items = self.get_embeddings_data_items_(texts=texts)
+        data_items = flatten(
+            self.get_embeddings_data_items_(texts=batch)
+            for batch in chunked(texts, self.batch_size)
+        )
+
+        return [data_item["embedding"] for data_item in data_items]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        data_items = await self.aget_embeddings_data_items_(texts=[text])
+        return data_items[0]["embedding"]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self.aget_embeddings_data_items_(texts=batch))
+                for batch in chunked(texts, self.batch_size)
+            ]
+
+        data_items = flatten(t.result() for t in tasks)
         return [data_item["embedding"] for data_item in data_items]
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        # NOTE: the API embeds queries and documents the same way.
+        return await self.aembed_documents(texts)
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        await self._close_stale_async_clients()
+
+        loop = asyncio.get_running_loop()
+        if loop in self._async_clients:
+            client, _ = self._async_clients.pop(loop)
+            await client.aclose()
@@ -0,0 +1,42 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+
+async def aembed_queries(
+    embeddings: Embeddings,
+    texts: list[str],
+) -> list[list[float]]:
+    # NOTE: LangChain embeddings only embed queries one at a time, so batches
+    # of queries go through 'aembed_queries' where an embedding implements
+    # it, to keep query prefixes and the query cache of single searches.
+    if hasattr(embeddings, "aembed_queries"):
+        return await embeddings.aembed_queries(texts)  # type: ignore
+
+    underlying_embeddings = getattr(embeddings, "underlying_embeddings", None)
+    if underlying_embeddings is None:
+        return list(
+            await asyncio.gather(*(embeddings.aembed_query(t) for t in texts))
+        )
+
+    # NOTE: CacheBackedEmbeddings looks queries up in its query store, and
+    # embeds the missing ones in one batch.
+    query_embedding_store = getattr(embeddings, "query_embedding_store", None)
+    if query_embedding_store is None:
+        return await aembed_queries(underlying_embeddings, texts)
+
+    cached = await query_embedding_store.amget(texts)
+    missing_texts = list(
+        dict.fromkeys(t for t, v in zip(texts, cached) if v is None)
+    )
+
+    missing_vectors: dict[str, list[float]] = {}
+    if len(missing_texts):
+        vectors = await aembed_queries(underlying_embeddings, missing_texts)
+        await query_embedding_store.amset(list(zip(missing_texts, vectors)))
+        missing_vectors = dict(zip(missing_texts, vectors))
+
+    return [
+        vector if vector is not None else missing_vectors[text]
+        for text, vector in zip(texts, cached)
+    ]
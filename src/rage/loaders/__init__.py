@@ -1,3 +1,19 @@
-from .docx_loader import DocxLoader  # noqa
-from .markdown_loader import MarkdownLoader  # noqa
-from .pdf_markdown_loader import PDFMarkdownLoader  # noqa
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .docx_loader import DocxLoader  # noqa
+    from .markdown_loader import MarkdownLoader  # noqa
+    from .pdf_markdown_loader import PDFMarkdownLoader  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "DocxLoader": ".docx_loader",
+        "MarkdownLoader": ".markdown_loader",
+        "PDFMarkdownLoader": ".pdf_markdown_loader",
+    },
+)
@@ -1,18 +1,109 @@
-import asyncio
+from pathlib import Path
+from functools import lru_cache
+from typing import TYPE_CHECKING, Literal
 
-from markitdown import MarkItDown
+from rich.console import Console
+
+from rage.config import config
+from rage.stores import DocumentCache
+from rage.converters import BatchConverter
 from rage.meta.interfaces import TextLoader, Document
 
+if TYPE_CHECKING:
+    from markitdown import MarkItDown
+
+
+console = Console()
+
+
+@lru_cache()
+def get_markitdown() -> "MarkItDown":
+    from markitdown import MarkItDown
+
+    return MarkItDown()
+
+
+def get_docx_documents(source_path: str) -> list[Document]:
+    result = get_markitdown().convert(source_path)
+    return [Document(text=result.text_content)]
+
 
 class DocxLoader(TextLoader):
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        executor: Literal["thread", "process", "inline"] = "thread",
+        max_workers: int | None = None,
+        document_cache: DocumentCache | None = None,
+        doc_converter: BatchConverter | None = None,
+        converted_path: str | None = None,
+        convert_in_place: bool = False,
+    ):
+        super().__init__(
+            max_concurrency=max_concurrency,
+            executor=executor,
+            max_workers=max_workers,
+            document_cache=document_cache,
+        )
+
+        # NOTE: legacy '.doc' files are converted to '.docx' first, into
+        # 'converted_path' (the config cache directory by default) under a
+        # hash of the source path. The source tree is only written to with
+        # 'convert_in_place'. A converter passed in is left open on close,
+        # it belongs to the caller.
+        self._doc_converter = doc_converter
+        self._owns_doc_converter = False
+        self.converted_path = converted_path or config.converted_doc_cache_path
+        self.convert_in_place = convert_in_place
+
+    @property
+    def doc_converter(self) -> BatchConverter:
+        if self._doc_converter is None:
+            self._doc_converter = BatchConverter(convert_to="docx")
+            self._owns_doc_converter = True
+
+        return self._doc_converter
 
-    def _get_documents(self, source_path: str) -> list[Document]:
-        md = MarkItDown()
-        result = md.convert(source_path)
+    def close(self) -> None:
+        super().close()
 
-        return [Document(text=result.text_content)]
+        if self._owns_doc_converter and self._doc_converter is not None:
+            self._doc_converter.close()
+            self._doc_converter = None
+            self._owns_doc_converter = False
+
+    async def convert_doc_files(
+        self, source_paths: list[str]
+    ) -> dict[str, str]:
+        doc_paths = list(
+            dict.fromkeys(
+                source_path
+                for source_path in source_paths
+                if Path(source_path).suffix.lower() == ".doc"
+            )
+        )
+
+        if not len(doc_paths):
+            return {}
+
+        results = await self.doc_converter.convert(
+            source_paths=doc_paths,
+            outdir=None if self.convert_in_place else self.converted_path,
+            key_by_source=not self.convert_in_place,
+        )
+
+        for r in results:
+            if r.error is not None:
+                console.log(
+                    f"[bold yellow]WARNING:[/] skipping {r.source_path}: "
+                    f"{r.error}"
+                )
+
+        return {
+            r.source_path: r.output_path
+            for r in results
+            if r.output_path is not None
+        }
 
     async def get_documents(
         self,
@@ -21,7 +112,34 @@ class DocxLoader(TextLoader):
         if source_path is None:
             return []
 
-        return await asyncio.to_thread(
-            self._get_documents,
+        if Path(source_path).suffix.lower() == ".doc":
+            converted_paths = await self.convert_doc_files([source_path])
+            assert (
+                source_path in converted_paths
+            ), f"could not convert {source_path} to docx."
+
+            source_path = converted_paths[source_path]
+
+        return await self.run_parser(
+            get_docx_documents,
             source_path=source_path,
         )
+
+    async def batch_load(
+        self,
+        source_paths: list[str],
+        cached_load: bool = False,
+    ) -> list[Document]:
+        # NOTE: all '.doc' files are converted up front in LibreOffice
+        # batches; files that fail to convert are skipped.
+        converted_paths = await self.convert_doc_files(source_paths)
+
+        return await super().batch_load(
+            source_paths=[
+                converted_paths.get(source_path, source_path)
+                for source_path in source_paths
+                if Path(source_path).suffix.lower() != ".doc"
+                or source_path in converted_paths
+            ],
+            cached_load=cached_load,
+        )
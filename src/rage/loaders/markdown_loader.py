@@ -1,17 +1,29 @@
-import asyncio
+from typing import Literal
 
-from markitdown import MarkItDown
+from rage.stores import DocumentCache
 from rage.meta.interfaces import TextLoader, Document
+from .docx_loader import get_markitdown
 
 
-class MarkdownLoader(TextLoader):
-    def __init__(self):
-        super().__init__()
-        self.markitdown = MarkItDown()
+def get_markdown_documents(source_path: str) -> list[Document]:
+    markdown = get_markitdown().convert(source=source_path)
+    return [Document(text=markdown.markdown)]
+
 
-    def _get_documents(self, source_path: str) -> list[Document]:
-        markdown = self.markitdown.convert(source=source_path)
-        return [Document(text=markdown.markdown)]
+class MarkdownLoader(TextLoader):
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        executor: Literal["thread", "process", "inline"] = "thread",
+        max_workers: int | None = None,
+        document_cache: DocumentCache | None = None,
+    ):
+        super().__init__(
+            max_concurrency=max_concurrency,
+            executor=executor,
+            max_workers=max_workers,
+            document_cache=document_cache,
+        )
 
     async def get_documents(
         self,
@@ -20,7 +32,7 @@ class MarkdownLoader(TextLoader):
         if source_path is None:
             return []
 
-        return await asyncio.to_thread(
-            self._get_documents,
+        return await self.run_parser(
+            get_markdown_documents,
             source_path=source_path,
         )
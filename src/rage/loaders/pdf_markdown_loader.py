@@ -1,35 +1,172 @@
+import os
 import asyncio
-import pymupdf4llm
+
+from collections import deque
+from typing import Any, AsyncIterator, Literal
 
 from rich.console import Console
+from rage.stores import DocumentCache
 from rage.meta.interfaces import TextLoader, Document
 
 
 console = Console()
 
 
-class PDFMarkdownLoader(TextLoader):
-    def __init__(self):
-        super().__init__()
+def get_pdf_markdown_documents(source_path: str) -> list[Document]:
+    import pymupdf4llm
+
+    md_text = pymupdf4llm.to_markdown(
+        source_path,
+        use_ocr=False,
+        ignore_images=True,
+        ignore_graphics=True,
+        show_progress=True,
+    )
+
+    if not len(md_text):
+        console.log(f"[bold yellow]WARNING:[/] no text in file: {source_path}")
+
+        return []
+
+    return [Document(text=md_text)]  # type: ignore
+
+
+def get_pdf_page_count(source_path: str) -> int:
+    import pymupdf
+
+    with pymupdf.open(source_path) as doc:
+        return doc.page_count
+
+
+def get_pdf_markdown_range_documents(
+    source_path: str,
+    page_start: int,
+    page_end: int,
+) -> list[Document]:
+    import pymupdf
+    import pymupdf4llm
+
+    with pymupdf.open(source_path) as doc:
+        # NOTE: pages without a text layer (scans, figures) are dropped with
+        # a plain text extraction, before the much slower layout analysis.
+        pages = [
+            page_number
+            for page_number in range(page_start - 1, page_end)
+            if doc[page_number].get_text("text").strip()
+        ]
+
+        if not len(pages):
+            return []
 
-    def _get_documents(self, source_path: str) -> list[Document]:
         md_text = pymupdf4llm.to_markdown(
-            source_path,
+            doc,
+            pages=pages,
             use_ocr=False,
             ignore_images=True,
             ignore_graphics=True,
-            show_progress=True,
+            show_progress=False,
+        )
+
+    if not len(md_text.strip()):
+        return []
+
+    return [
+        Document(
+            text=md_text,
+            metadata={"page_start": page_start, "page_end": page_end},
+        )
+    ]
+
+
+class PDFMarkdownLoader(TextLoader):
+    # NOTE: with 'pages_per_shard' set, PDFs with more pages are split into
+    # ranges of that many pages, parsed in parallel on the loader's executor,
+    # with one document per range. Use executor="process" to parse ranges
+    # on several cores.
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        executor: Literal["thread", "process", "inline"] = "thread",
+        max_workers: int | None = None,
+        document_cache: DocumentCache | None = None,
+        pages_per_shard: int | None = None,
+    ):
+        super().__init__(
+            max_concurrency=max_concurrency,
+            executor=executor,
+            max_workers=max_workers,
+            document_cache=document_cache,
         )
 
-        if not len(md_text):
+        assert (
+            pages_per_shard is None or pages_per_shard > 0
+        ), "pages_per_shard must be positive."
+
+        self.pages_per_shard = pages_per_shard
+
+    def get_cache_options(self) -> dict[str, Any]:
+        if self.pages_per_shard is None:
+            return {}
+
+        return {"pages_per_shard": self.pages_per_shard}
+
+    async def iter_documents(
+        self,
+        source_path: str,
+    ) -> AsyncIterator[Document]:
+        if self.pages_per_shard is None:
+            async for document in super().iter_documents(source_path):
+                yield document
+
+            return
+
+        # NOTE: at most one range per executor worker is in flight, and
+        # documents are yielded in page order as soon as the ranges before
+        # them have finished.
+        max_in_flight = self.max_workers or os.cpu_count() or 1
+        num_pages = await self.run_parser(
+            get_pdf_page_count,  # type: ignore
+            source_path=source_path,
+        )
+
+        tasks: deque[asyncio.Future[list[Document]]] = deque()
+        num_documents = 0
+        try:
+            for page_start in range(1, num_pages + 1, self.pages_per_shard):
+                tasks.append(
+                    asyncio.ensure_future(
+                        self.run_parser(
+                            get_pdf_markdown_range_documents,
+                            source_path=source_path,
+                            page_start=page_start,
+                            page_end=min(
+                                page_start + self.pages_per_shard - 1,
+                                num_pages,
+                            ),
+                        )
+                    )
+                )
+
+                if len(tasks) < max_in_flight:
+                    continue
+
+                for document in await tasks.popleft():
+                    num_documents += 1
+                    yield document
+
+            while len(tasks):
+                for document in await tasks.popleft():
+                    num_documents += 1
+                    yield document
+        finally:
+            for t in tasks:
+                t.cancel()
+
+        if not num_documents:
             console.log(
                 f"[bold yellow]WARNING:[/] no text in file: {source_path}"
             )
 
-            return []
-
-        return [Document(text=md_text)]  # type: ignore
-
     async def get_documents(
         self,
         source_path: str | None = None,
@@ -37,7 +174,13 @@ class PDFMarkdownLoader(TextLoader):
         if source_path is None:
             return []
 
-        return await asyncio.to_thread(
-            self._get_documents,
-            source_path=source_path,
-        )
+        if self.pages_per_shard is None:
+            return await self.run_parser(
+                get_pdf_markdown_documents,
+                source_path=source_path,
+            )
+
+        return [
+            document
+            async for document in self.iter_documents(source_path=source_path)
+        ]
@@ -1,2 +1,19 @@
-from .text_loader import TextLoader, Document  # noqa
-from .text_splitter import TextSplitter, TextChunk  # noqa
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .text_loader import TextLoader, Document  # noqa
+    from .text_splitter import TextSplitter, TextChunk  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "TextLoader": ".text_loader",
+        "Document": ".text_loader",
+        "TextSplitter": ".text_splitter",
+        "TextChunk": ".text_splitter",
+    },
+)
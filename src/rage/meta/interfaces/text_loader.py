@@ -1,39 +1,30 @@
+import json
 import xxhash
-import joblib
 import asyncio
+import multiprocessing
 
-from typing import Any
 from pathlib import Path
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Literal
+from concurrent.futures import ProcessPoolExecutor
 from abc import ABC, abstractmethod
 
 from tqdm import tqdm  # type: ignore
 from more_itertools import flatten
 
-from aiocache import Cache, cached
-from aiocache.serializers import PickleSerializer
-
 from pydantic import BaseModel, StrictStr, Field
 
-from rage.config import config
-
-
-def get_cache_key(
-    func: Any,
-    _self: Any,
-    *args: Any,
-    **kwargs: Any,
-) -> str:
-    cache_key = joblib.hash(
-        (
-            func.__module__,
-            func.__qualname__,
-            args,
-            kwargs,
-        )
-    )
+from rage.telemetry import telemetry
+from rage.stores.document_cache import DocumentCache, get_document_cache
+
 
-    assert cache_key is not None
-    return cache_key
+def get_file_hash(source_path: str, block_size: int = 1 << 20) -> str:
+    file_hash = xxhash.xxh3_128()
+    with open(source_path, "rb") as f:
+        while block := f.read(block_size):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
 
 
 class Document(BaseModel):
@@ -45,9 +36,56 @@ class TextLoader(ABC):
     def __init__(
         self,
         max_concurrency: int = 10,
+        executor: Literal["thread", "process", "inline"] = "thread",
+        max_workers: int | None = None,
+        document_cache: DocumentCache | None = None,
     ):
 
         self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.executor = executor
+        self.max_workers = max_workers
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._document_cache = document_cache
+
+    @property
+    def document_cache(self) -> DocumentCache:
+        if self._document_cache is None:
+            self._document_cache = get_document_cache()
+
+        return self._document_cache
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        # NOTE: spawned workers import parser modules once and keep their
+        # module-level parser caches for the lifetime of the pool.
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return self._process_pool
+
+    async def run_parser(
+        self,
+        parser: Callable[..., list[Document]],
+        **kwargs: Any,
+    ) -> list[Document]:
+        if self.executor == "inline":
+            return parser(**kwargs)
+
+        if self.executor == "process":
+            return await asyncio.get_running_loop().run_in_executor(
+                self.process_pool,
+                partial(parser, **kwargs),
+            )
+
+        return await asyncio.to_thread(parser, **kwargs)
+
+    def close(self) -> None:
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
 
     @abstractmethod
     async def get_documents(
@@ -56,20 +94,117 @@ class TextLoader(ABC):
     ) -> list[Document]:
         pass
 
-    @cached(
-        cache=Cache.REDIS,
-        endpoint=config.redis_host,
-        port=config.redis_port,
-        db=config.redis_db,
-        serializer=PickleSerializer(),
-        key_builder=get_cache_key,
-        noself=True,
-    )
+    async def iter_documents(
+        self,
+        source_path: str,
+    ) -> AsyncIterator[Document]:
+        # NOTE: loaders that parse a file in parts override this to yield
+        # each part as soon as it is parsed, in document order.
+        for document in await self.get_documents(source_path=source_path):
+            yield document
+
+    def get_cache_options(self) -> dict[str, Any]:
+        # NOTE: loaders with options that change the parsed documents must
+        # return them here, so each variant is cached under its own key.
+        return {}
+
+    async def get_cache_key(self, source_path: str) -> str:
+        file_hash = await asyncio.to_thread(get_file_hash, source_path)
+        loader_key = json.dumps(
+            [
+                type(self).__module__,
+                type(self).__qualname__,
+                self.get_cache_options(),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+
+        return xxhash.xxh3_128_hexdigest(f"{loader_key}:{file_hash}")
+
+    async def _parse(self, source_path: str | None = None) -> list[Document]:
+        with telemetry.span(
+            "loader.parse", loader=type(self).__name__
+        ) as span:
+            documents = await self.get_documents(source_path=source_path)
+            span.set("documents", len(documents))
+
+        return documents
+
+    async def _get_documents_uncached(
+        self,
+        source_path: str,
+        cache_key: str,
+    ) -> list[Document]:
+        documents = await self._parse(source_path=source_path)
+        await self.document_cache.set(
+            cache_key,
+            [doc.model_dump() for doc in documents],
+        )
+
+        return documents
+
     async def get_documents_cached(
         self,
         source_path: str | None = None,
     ) -> list[Document]:
-        return await self.get_documents(source_path=source_path)
+        if source_path is None:
+            return await self._parse(source_path=source_path)
+
+        cache_key = await self.get_cache_key(source_path=source_path)
+        cached = await self.document_cache.get(cache_key)
+        telemetry.count(
+            (
+                "loader.cache_hits"
+                if cached is not None
+                else "loader.cache_misses"
+            ),
+            loader=type(self).__name__,
+        )
+
+        if cached is not None:
+            return [Document(**doc) for doc in cached]
+
+        return await self._get_documents_uncached(
+            source_path=source_path,
+            cache_key=cache_key,
+        )
+
+    def _get_loaded_documents(
+        self,
+        documents: list[Document],
+        source_path: str | None = None,
+        pbar: tqdm | None = None,
+        start: int = 1,
+    ) -> list[Document]:
+        file_name = Path(source_path).stem if source_path is not None else None
+
+        # NOTE: stale chunks are removed per 'source_path', which, unlike
+        # 'file_name', is unique across directories and extensions.
+        resolved_path = (
+            str(Path(source_path).resolve())
+            if source_path is not None
+            else None
+        )
+
+        if pbar is not None:
+            pbar.update(1)
+
+        return [
+            Document(
+                **doc.model_dump()
+                | {
+                    "metadata": doc.metadata
+                    | {
+                        "document_index": idx,
+                        "document_id": xxhash.xxh64(doc.text).hexdigest(),
+                        "file_name": file_name,
+                        "source_path": resolved_path,
+                    }
+                }
+            )
+            for idx, doc in enumerate(documents, start=start)
+        ]
 
     async def load(
         self,
@@ -78,33 +213,94 @@ class TextLoader(ABC):
         pbar: tqdm | None = None,
     ) -> list[Document]:
         async with self.semaphore:
-            documents = (
-                await self.get_documents(source_path=source_path)
-                if not cached_load
-                else await self.get_documents_cached(source_path=source_path)
-            )
+            with telemetry.span("loader.load", loader=type(self).__name__):
+                documents = (
+                    await self._parse(source_path=source_path)
+                    if not cached_load
+                    else await self.get_documents_cached(
+                        source_path=source_path
+                    )
+                )
 
-            file_name = (
-                Path(source_path).stem if source_path is not None else None
-            )
+                return self._get_loaded_documents(
+                    documents=documents,
+                    source_path=source_path,
+                    pbar=pbar,
+                )
+
+    async def iter_load(
+        self,
+        source_path: str,
+        cached_load: bool = False,
+        pbar: tqdm | None = None,
+    ) -> AsyncIterator[Document]:
+        # NOTE: streams the documents of 'iter_documents', so consumers
+        # start on the first parts of a large file while the rest is still
+        # parsed. Only cache misses keep the documents, to cache them.
+        async with self.semaphore:
+            cache_key = None
+            if cached_load:
+                cache_key = await self.get_cache_key(source_path=source_path)
+                cached = await self.document_cache.get(cache_key)
+                telemetry.count(
+                    (
+                        "loader.cache_hits"
+                        if cached is not None
+                        else "loader.cache_misses"
+                    ),
+                    loader=type(self).__name__,
+                )
+
+                if cached is not None:
+                    for document in self._get_loaded_documents(
+                        documents=[Document(**doc) for doc in cached],
+                        source_path=source_path,
+                        pbar=pbar,
+                    ):
+                        yield document
+
+                    return
+
+            documents = []
+            num_documents = 0
+            async for document in self.iter_documents(source_path=source_path):
+                num_documents += 1
+                if cache_key is not None:
+                    documents.append(document)
+
+                yield self._get_loaded_documents(
+                    documents=[document],
+                    source_path=source_path,
+                    start=num_documents,
+                )[0]
+
+            if cache_key is not None:
+                await self.document_cache.set(
+                    cache_key,
+                    [doc.model_dump() for doc in documents],
+                )
 
             if pbar is not None:
                 pbar.update(1)
 
-            return [
-                Document(
-                    **doc.model_dump()
-                    | {
-                        "metadata": doc.metadata
-                        | {
-                            "document_index": idx,
-                            "document_id": xxhash.xxh64(doc.text).hexdigest(),
-                            "file_name": file_name,
-                        }
-                    }
+    async def _load_missing(
+        self,
+        source_path: str,
+        cache_key: str,
+        pbar: tqdm | None = None,
+    ) -> list[Document]:
+        async with self.semaphore:
+            with telemetry.span("loader.load", loader=type(self).__name__):
+                documents = await self._get_documents_uncached(
+                    source_path=source_path,
+                    cache_key=cache_key,
+                )
+
+                return self._get_loaded_documents(
+                    documents=documents,
+                    source_path=source_path,
+                    pbar=pbar,
                 )
-                for idx, doc in enumerate(documents, start=1)
-            ]
 
     async def batch_load(
         self,
@@ -116,16 +312,73 @@ class TextLoader(ABC):
             ascii=" ##",
             colour="#808080",
         ) as pbar:
+            cache_keys: dict[str, str] = {}
+            cached: dict[str, Any] = {}
+            if cached_load:
+                # NOTE: all files are looked up with a single bulk request
+                # per cache tier, misses are parsed without another lookup.
+                async with asyncio.TaskGroup() as tg:
+                    key_tasks = {
+                        source_path: tg.create_task(
+                            self.get_cache_key(source_path=source_path)
+                        )
+                        for source_path in set(source_paths)
+                    }
+
+                cache_keys = {
+                    source_path: t.result()
+                    for source_path, t in key_tasks.items()
+                }
+
+                cached = await self.document_cache.mget(
+                    list(cache_keys.values())
+                )
+
+                num_hits = sum(cache_keys[p] in cached for p in source_paths)
+                telemetry.count(
+                    "loader.cache_hits",
+                    num_hits,
+                    loader=type(self).__name__,
+                )
+
+                telemetry.count(
+                    "loader.cache_misses",
+                    len(source_paths) - num_hits,
+                    loader=type(self).__name__,
+                )
+
             async with asyncio.TaskGroup() as tg:
-                tasks = [
-                    tg.create_task(
+                tasks = {
+                    idx: tg.create_task(
                         self.load(
                             source_path=source_path,
-                            cached_load=cached_load,
+                            pbar=pbar,
+                        )
+                        if not cached_load
+                        else self._load_missing(
+                            source_path=source_path,
+                            cache_key=cache_keys[source_path],
                             pbar=pbar,
                         )
                     )
-                    for source_path in source_paths
-                ]
+                    for idx, source_path in enumerate(source_paths)
+                    if cache_keys.get(source_path) not in cached
+                }
 
-            return list(flatten((t.result() for t in tasks)))
+            return list(
+                flatten(
+                    (
+                        tasks[idx].result()
+                        if idx in tasks
+                        else self._get_loaded_documents(
+                            documents=[
+                                Document(**doc)
+                                for doc in cached[cache_keys[source_path]]
+                            ],
+                            source_path=source_path,
+                            pbar=pbar,
+                        )
+                    )
+                    for idx, source_path in enumerate(source_paths)
+                )
+            )
@@ -4,6 +4,7 @@ import tiktoken
 from abc import ABC, abstractmethod
 from pydantic import NonNegativeInt
 
+from rage.telemetry import telemetry
 from .text_loader import Document
 
 
@@ -12,11 +13,23 @@ class TextChunk(Document):
 
 
 class TextSplitter(ABC):
-    def __init__(self, tt_encoder_name: str = "gpt-4o"):
+    def __init__(
+        self,
+        tt_encoder_name: str = "gpt-4o",
+        num_threads: int = 8,
+    ):
         self.tt_encoder = tiktoken.encoding_for_model(tt_encoder_name)
+        self.num_threads = num_threads
 
     def _get_num_tokens(self, text: str) -> int:
-        return len(self.tt_encoder.encode(text))
+        return len(self.tt_encoder.encode(text, disallowed_special=()))
+
+    def _encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return self.tt_encoder.encode_batch(
+            texts,
+            num_threads=self.num_threads,
+            disallowed_special=(),
+        )
 
     @abstractmethod
     def _split_documents(
@@ -29,42 +42,28 @@ class TextSplitter(ABC):
         self,
         documents: list[Document],
     ) -> list[TextChunk]:
-        text_chunks_ = self._split_documents(documents=documents)
-        text_chunks_ = [
-            TextChunk(
-                text=tc.text,
-                metadata=tc.metadata
-                | {
-                    "chunk_id": xxhash.xxh64(tc.text).hexdigest(),
-                    "chunk_index": idx,
-                },
-                num_tokens=tc.num_tokens,
-            )
-            for idx, tc in enumerate(text_chunks_, start=1)
-        ]
-
-        text_chunks = []
-        for idx, tc in enumerate(text_chunks_):
-            previous_chunk_id = (
-                None if idx == 0 else text_chunks_[idx - 1].metadata["chunk_id"]
-            )
+        with telemetry.span(
+            "splitter.split_documents",
+            splitter=type(self).__name__,
+        ) as span:
+            text_chunks = self._split_documents(documents=documents)
+            if telemetry.enabled:
+                span.set("documents", len(documents))
+                span.set("chunks", len(text_chunks))
+                span.set("tokens", sum(tc.num_tokens for tc in text_chunks))
 
-            next_chunk_id = (
-                None
-                if idx == len(text_chunks_) - 1
-                else text_chunks_[idx + 1].metadata["chunk_id"]
-            )
+        chunk_ids = [xxhash.xxh64(tc.text).hexdigest() for tc in text_chunks]
 
-            text_chunks.append(
-                TextChunk(
-                    text=tc.text,
-                    metadata=tc.metadata
-                    | {
-                        "previous_chunk_id": previous_chunk_id,
-                        "next_chunk_id": next_chunk_id,
-                    },
-                    num_tokens=tc.num_tokens,
-                )
-            )
+        # NOTE: chunks are updated in place instead of being rebuilt, and get
+        # a fresh metadata dict since splitters share the document's one.
+        for idx, tc in enumerate(text_chunks):
+            tc.metadata = tc.metadata | {
+                "chunk_id": chunk_ids[idx],
+                "chunk_index": idx + 1,
+                "previous_chunk_id": None if idx == 0 else chunk_ids[idx - 1],
+                "next_chunk_id": (
+                    None if idx == len(chunk_ids) - 1 else chunk_ids[idx + 1]
+                ),
+            }
 
         return text_chunks
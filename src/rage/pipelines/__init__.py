@@ -0,0 +1,16 @@
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .ingestion_pipeline import IngestionPipeline, IngestionStats  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "IngestionPipeline": ".ingestion_pipeline",
+        "IngestionStats": ".ingestion_pipeline",
+    },
+)
@@ -0,0 +1,291 @@
+import time
+import asyncio
+
+from typing import Iterable, Literal
+from collections import defaultdict
+
+from tqdm import tqdm  # type: ignore
+from rich.console import Console
+from pydantic import BaseModel, NonNegativeInt, NonNegativeFloat
+
+from rage.telemetry import telemetry
+from rage.retriever import Retriever
+from rage.meta.interfaces import TextLoader, TextSplitter, Document, TextChunk
+
+
+console = Console()
+
+
+class IngestionStats(BaseModel):
+    num_files: NonNegativeInt = 0
+    num_documents: NonNegativeInt = 0
+    num_chunks: NonNegativeInt = 0
+    num_points: NonNegativeInt = 0
+    num_duplicates: NonNegativeInt = 0
+    elapsed: NonNegativeFloat = 0.0
+
+
+class IngestionPipeline:
+    # NOTE: stages are connected through bounded queues, so a slow stage
+    # blocks the ones before it and memory stays bounded by the queue sizes
+    # instead of the corpus size.
+    def __init__(
+        self,
+        loader: TextLoader,
+        splitter: TextSplitter,
+        retriever: Retriever,
+        collection_name: str,
+        load_concurrency: int = 4,
+        split_concurrency: int = 2,
+        insert_concurrency: int = 2,
+        batch_size: int = 256,
+        queue_size: int = 8,
+        cached_load: bool = False,
+        remove_stale: bool = True,
+        source_key: str = "source_path",
+        deduplicate: Literal["exact", "near"] | None = None,
+        tenant_id: str | None = None,
+    ):
+        # NOTE: checked up front, stale removal runs at the end of a run and
+        # is scoped to a single tenant.
+        assert (
+            tenant_id is None or retriever.tenant_key is not None
+        ), "tenant_id requires a tenant_key."
+
+        assert not (
+            remove_stale
+            and retriever.tenant_key is not None
+            and tenant_id is None
+        ), "remove_stale requires a tenant_id with a tenant_key."
+
+        self.loader = loader
+        self.splitter = splitter
+        self.retriever = retriever
+        self.collection_name = collection_name
+
+        self.load_concurrency = load_concurrency
+        self.split_concurrency = split_concurrency
+        self.insert_concurrency = insert_concurrency
+
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+        self.cached_load = cached_load
+        self.remove_stale = remove_stale
+        self.source_key = source_key
+        self.deduplicate = deduplicate
+        self.tenant_id = tenant_id
+
+    async def _produce_paths(
+        self,
+        source_paths: Iterable[str],
+        path_queue: asyncio.Queue,
+    ) -> None:
+        for source_path in source_paths:
+            await path_queue.put(source_path)
+
+        for _ in range(self.load_concurrency):
+            await path_queue.put(None)
+
+    async def _load_worker(
+        self,
+        path_queue: asyncio.Queue,
+        document_queue: asyncio.Queue,
+        stats: IngestionStats,
+        pbar: tqdm,
+    ) -> None:
+        while (source_path := await path_queue.get()) is not None:
+            # NOTE: documents are passed on as the loader yields them, so
+            # the parts of a large file are split and inserted while the
+            # rest of the file is still parsed.
+            with telemetry.span(
+                "loader.load", loader=type(self.loader).__name__
+            ):
+                async for document in self.loader.iter_load(
+                    source_path=source_path,
+                    cached_load=self.cached_load,
+                    pbar=pbar,
+                ):
+                    stats.num_documents += 1
+                    await document_queue.put([document])
+
+            stats.num_files += 1
+
+    async def _split_worker(
+        self,
+        document_queue: asyncio.Queue,
+        chunk_queue: asyncio.Queue,
+    ) -> None:
+        while (documents := await document_queue.get()) is not None:
+            text_chunks = await asyncio.to_thread(
+                self.splitter.split_documents,
+                documents=documents,
+            )
+
+            await chunk_queue.put(text_chunks)
+
+    async def _batch_chunks(
+        self,
+        chunk_queue: asyncio.Queue,
+        batch_queue: asyncio.Queue,
+        source_document_ids: dict[str, set[str]],
+    ) -> None:
+        batch: list[TextChunk] = []
+        while (text_chunks := await chunk_queue.get()) is not None:
+            for tc in text_chunks:
+                source = tc.metadata.get(self.source_key)
+                document_id = tc.metadata.get("document_id")
+                if source is not None and document_id is not None:
+                    source_document_ids[source].add(document_id)
+
+            batch.extend(text_chunks)
+            while len(batch) >= self.batch_size:
+                await batch_queue.put(batch[: self.batch_size])
+                batch = batch[self.batch_size :]
+
+        if len(batch):
+            await batch_queue.put(batch)
+
+        for _ in range(self.insert_concurrency):
+            await batch_queue.put(None)
+
+    async def _insert_worker(
+        self,
+        batch_queue: asyncio.Queue,
+        stats: IngestionStats,
+    ) -> None:
+        while (batch := await batch_queue.get()) is not None:
+            insert_stats = await self.retriever.insert_text_chunks(
+                collection_name=self.collection_name,
+                text_chunks=batch,
+                batch_size=self.batch_size,
+                remove_stale=False,
+                deduplicate=self.deduplicate,
+                tenant_id=self.tenant_id,
+            )
+
+            stats.num_chunks += len(batch)
+            stats.num_points += insert_stats.num_points
+            stats.num_duplicates += insert_stats.num_duplicates
+
+    async def _run_stage(
+        self,
+        workers: list,
+        output_queue: asyncio.Queue,
+        num_consumers: int,
+    ) -> None:
+        async with asyncio.TaskGroup() as tg:
+            for worker in workers:
+                tg.create_task(worker)
+
+        for _ in range(num_consumers):
+            await output_queue.put(None)
+
+    async def run(
+        self,
+        source_paths: Iterable[str],
+        total: int | None = None,
+    ) -> IngestionStats:
+        stats = IngestionStats()
+        if not await self.retriever.collection_exists(
+            collection_name=self.collection_name
+        ):
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {self.collection_name} doesn't exist."
+            )
+
+            return stats
+
+        source_document_ids: dict[str, set[str]] = defaultdict(set)
+
+        path_queue: asyncio.Queue[str | None] = asyncio.Queue(
+            maxsize=self.queue_size
+        )
+
+        document_queue: asyncio.Queue[list[Document] | None] = asyncio.Queue(
+            maxsize=self.queue_size
+        )
+
+        chunk_queue: asyncio.Queue[list[TextChunk] | None] = asyncio.Queue(
+            maxsize=self.queue_size
+        )
+
+        batch_queue: asyncio.Queue[list[TextChunk] | None] = asyncio.Queue(
+            maxsize=self.insert_concurrency
+        )
+
+        start = time.perf_counter()
+        with tqdm(  # type: ignore
+            total=total,
+            ascii=" ##",
+            colour="#808080",
+        ) as pbar:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(
+                    self._produce_paths(
+                        source_paths=source_paths,
+                        path_queue=path_queue,
+                    )
+                )
+
+                tg.create_task(
+                    self._run_stage(
+                        workers=[
+                            self._load_worker(
+                                path_queue=path_queue,
+                                document_queue=document_queue,
+                                stats=stats,
+                                pbar=pbar,
+                            )
+                            for _ in range(self.load_concurrency)
+                        ],
+                        output_queue=document_queue,
+                        num_consumers=self.split_concurrency,
+                    )
+                )
+
+                tg.create_task(
+                    self._run_stage(
+                        workers=[
+                            self._split_worker(
+                                document_queue=document_queue,
+                                chunk_queue=chunk_queue,
+                            )
+                            for _ in range(self.split_concurrency)
+                        ],
+                        output_queue=chunk_queue,
+                        num_consumers=1,
+                    )
+                )
+
+                tg.create_task(
+                    self._batch_chunks(
+                        chunk_queue=chunk_queue,
+                        batch_queue=batch_queue,
+                        source_document_ids=source_document_ids,
+                    )
+                )
+
+                for _ in range(self.insert_concurrency):
+                    tg.create_task(
+                        self._insert_worker(
+                            batch_queue=batch_queue,
+                            stats=stats,
+                        )
+                    )
+
+        if self.remove_stale:
+            await self.retriever.delete_stale_documents(
+                collection_name=self.collection_name,
+                source_document_ids=source_document_ids,
+                source_key=self.source_key,
+                tenant_id=self.tenant_id,
+            )
+
+        stats.elapsed = time.perf_counter() - start
+        console.log(
+            f"ingested {stats.num_chunks} chunks ({stats.num_points} upserted) "
+            f"from {stats.num_files} files in {stats.elapsed:.1f}s"
+        )
+
+        return stats
@@ -1 +1,36 @@
-from .retriever import Retriever, RetrieverItem, WeightedMetadataItem  # noqa
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .retriever import (  # noqa
+        Retriever,
+        RetrieverItem,
+        InsertStats,
+        WeightedMetadataItem,
+    )
+    from .embedded_retriever import EmbeddedRetriever  # noqa
+    from .collection_profile import CollectionProfile  # noqa
+    from .reranker import Reranker, RerankerStats  # noqa
+    from .result_cache import ResultCache, ResultCacheStats  # noqa
+    from .collection_exporter import CollectionExporter, ExportStats  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "Retriever": ".retriever",
+        "RetrieverItem": ".retriever",
+        "InsertStats": ".retriever",
+        "WeightedMetadataItem": ".retriever",
+        "EmbeddedRetriever": ".embedded_retriever",
+        "CollectionProfile": ".collection_profile",
+        "Reranker": ".reranker",
+        "RerankerStats": ".reranker",
+        "ResultCache": ".result_cache",
+        "ResultCacheStats": ".result_cache",
+        "CollectionExporter": ".collection_exporter",
+        "ExportStats": ".collection_exporter",
+    },
+)
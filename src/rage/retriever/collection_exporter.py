@@ -0,0 +1,257 @@
+import json
+import time
+import shutil
+import asyncio
+import numpy as np
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, Protocol
+from contextlib import aclosing
+
+from pydantic import BaseModel, StrictStr, NonNegativeInt, NonNegativeFloat
+from qdrant_client import models
+
+from rage.telemetry import telemetry
+
+if TYPE_CHECKING:
+    from .retriever import Retriever
+
+
+class ExportStats(BaseModel):
+    num_records: NonNegativeInt = 0
+    elapsed: NonNegativeFloat = 0.0
+    records_per_second: NonNegativeFloat = 0.0
+    paths: list[StrictStr] = []
+
+
+class RecordWriter(Protocol):
+    def write(self, records: list[models.Record]) -> None: ...
+
+    def close(self) -> list[str]: ...
+
+
+def get_vectors(record: models.Record) -> dict[str, Any]:
+    if isinstance(record.vector, dict):
+        return record.vector
+
+    # NOTE: collections with a single unnamed vector return a plain list.
+    return {"": record.vector} if record.vector is not None else {}
+
+
+class ParquetRecordWriter:
+    # NOTE: every page becomes a row group, so only one page is held in
+    # memory. Dense vectors are fixed size lists, sparse vectors are split
+    # into '<name>_indices' and '<name>_values' columns and metadata is
+    # stored as a JSON string, since its keys vary between chunks.
+    def __init__(self, output_path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetRecordWriter requires 'pyarrow'.") from e
+
+        self.pa = pa
+        self.pq = pq
+        self.output_path = output_path
+        self.schema: Any = None
+        self.writer: Any = None
+
+    def _get_schema(self, record: models.Record) -> Any:
+        pa = self.pa
+        fields = [
+            pa.field("id", pa.string()),
+            pa.field("page_content", pa.string()),
+            pa.field("metadata", pa.string()),
+        ]
+
+        for name, vector in get_vectors(record).items():
+            name = name or "vector"
+            if isinstance(vector, models.SparseVector):
+                fields.append(
+                    pa.field(f"{name}_indices", pa.list_(pa.uint32()))
+                )
+                fields.append(
+                    pa.field(f"{name}_values", pa.list_(pa.float32()))
+                )
+            else:
+                fields.append(
+                    pa.field(name, pa.list_(pa.float32(), len(vector)))
+                )
+
+        return pa.schema(fields)
+
+    def write(self, records: list[models.Record]) -> None:
+        if self.writer is None:
+            self.schema = self._get_schema(records[0])
+            Path(self.output_path).parent.mkdir(parents=True, exist_ok=True)
+            self.writer = self.pq.ParquetWriter(self.output_path, self.schema)
+
+        columns: dict[str, list] = {name: [] for name in self.schema.names}
+        for record in records:
+            payload = record.payload or {}
+            columns["id"].append(str(record.id))
+            columns["page_content"].append(payload.get("page_content"))
+            columns["metadata"].append(
+                json.dumps(payload["metadata"])
+                if "metadata" in payload
+                else None
+            )
+
+            for name, vector in get_vectors(record).items():
+                name = name or "vector"
+                if isinstance(vector, models.SparseVector):
+                    columns[f"{name}_indices"].append(vector.indices)
+                    columns[f"{name}_values"].append(vector.values)
+                else:
+                    columns[name].append(vector)
+
+        self.writer.write_table(
+            self.pa.table(columns, schema=self.schema),
+        )
+
+    def close(self) -> list[str]:
+        if self.writer is None:
+            return []
+
+        self.writer.close()
+        return [self.output_path]
+
+
+class NumpyRecordWriter:
+    # NOTE: writes '<output_path>.jsonl' with one chunk per line, sparse
+    # vectors included, and one '<output_path>.<name>.npy' float32 matrix per
+    # dense vector, in the same row order. Rows are appended to a raw file
+    # and the .npy header, which holds the row count, is written on close.
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.jsonl_file = open(f"{output_path}.jsonl", "w")
+        self.raw_files: dict[str, Any] = {}
+        self.dimensions: dict[str, int] = {}
+        self.num_rows = 0
+
+    def write(self, records: list[models.Record]) -> None:
+        dense_vectors: dict[str, list] = {name: [] for name in self.raw_files}
+        for record in records:
+            payload = record.payload or {}
+            line = {
+                "id": str(record.id),
+                "page_content": payload.get("page_content"),
+                "metadata": payload.get("metadata"),
+            }
+
+            for name, vector in get_vectors(record).items():
+                name = name or "vector"
+                if isinstance(vector, models.SparseVector):
+                    line[name] = vector.model_dump()
+                else:
+                    dense_vectors.setdefault(name, []).append(vector)
+
+            self.jsonl_file.write(json.dumps(line) + "\n")
+
+        for name, vectors in dense_vectors.items():
+            assert len(vectors) == len(
+                records
+            ), f"Records without a '{name}' vector."
+
+            if name not in self.raw_files:
+                assert self.num_rows == 0, f"Vector '{name}' appeared late."
+                self.raw_files[name] = open(
+                    f"{self.output_path}.{name}.raw", "wb"
+                )
+
+            matrix = np.asarray(vectors, dtype=np.float32)
+            self.dimensions[name] = matrix.shape[1]
+            self.raw_files[name].write(matrix.tobytes())
+
+        self.num_rows += len(records)
+
+    def close(self) -> list[str]:
+        self.jsonl_file.close()
+        paths = [f"{self.output_path}.jsonl"]
+        for name, raw_file in self.raw_files.items():
+            raw_file.close()
+            raw_path = Path(f"{self.output_path}.{name}.raw")
+            npy_path = f"{self.output_path}.{name}.npy"
+            with open(npy_path, "wb") as f, open(raw_path, "rb") as raw:
+                np.lib.format.write_array_header_1_0(
+                    f,
+                    {
+                        "descr": np.lib.format.dtype_to_descr(
+                            np.dtype(np.float32)
+                        ),
+                        "fortran_order": False,
+                        "shape": (self.num_rows, self.dimensions[name]),
+                    },
+                )
+
+                shutil.copyfileobj(raw, f)
+
+            raw_path.unlink()
+            paths.append(npy_path)
+
+        return paths
+
+
+class CollectionExporter:
+    # NOTE: streams a collection page by page through `Retriever.scan`, so
+    # memory is bounded by 'batch_size' and 'num_partitions', not by the
+    # collection size. Pages are written in a thread while the next ones
+    # load. With 'num_partitions' > 1 rows are not in id order.
+    def __init__(
+        self,
+        retriever: "Retriever",
+        format: Literal["parquet", "numpy"] = "numpy",
+        batch_size: int = 1024,
+        num_partitions: int = 1,
+    ):
+        self.retriever = retriever
+        self.format = format
+        self.batch_size = batch_size
+        self.num_partitions = num_partitions
+
+    def _get_writer(self, output_path: str) -> RecordWriter:
+        if self.format == "parquet":
+            return ParquetRecordWriter(output_path=output_path)
+
+        return NumpyRecordWriter(output_path=output_path)
+
+    async def export(
+        self,
+        collection_name: str,
+        output_path: str,
+        scroll_filter: models.Filter | None = None,
+        with_vectors: bool | list[str] = True,
+    ) -> ExportStats:
+        start = time.perf_counter()
+        writer = self._get_writer(output_path=output_path)
+        num_records = 0
+
+        with telemetry.span("retriever.export", format=self.format) as span:
+            try:
+                async with aclosing(
+                    self.retriever.scan(
+                        collection_name=collection_name,
+                        batch_size=self.batch_size,
+                        scroll_filter=scroll_filter,
+                        with_payload=True,
+                        with_vectors=with_vectors,
+                        num_partitions=self.num_partitions,
+                    )
+                ) as pages:
+                    async for page in pages:
+                        await asyncio.to_thread(writer.write, page)
+                        num_records += len(page)
+            finally:
+                paths = await asyncio.to_thread(writer.close)
+
+            span.set("records", num_records)
+
+        elapsed = time.perf_counter() - start
+        return ExportStats(
+            num_records=num_records,
+            elapsed=elapsed,
+            records_per_second=num_records / elapsed if elapsed else 0.0,
+            paths=paths,
+        )
@@ -0,0 +1,118 @@
+from typing import Literal
+
+from qdrant_client import models
+from pydantic import (
+    BaseModel,
+    PositiveInt,
+    NonNegativeInt,
+    StrictBool,
+    confloat,
+)
+
+
+class CollectionProfile(BaseModel):
+    distance: models.Distance = models.Distance.COSINE
+    datatype: models.Datatype | None = None
+    on_disk: StrictBool = False
+
+    quantization: Literal["scalar", "binary", "product"] | None = None
+    quantization_always_ram: StrictBool = True
+    scalar_quantile: confloat(gt=0.5, le=1.0) | None = 0.99  # type: ignore
+    product_compression: models.CompressionRatio = models.CompressionRatio.X16
+
+    hnsw_m: NonNegativeInt | None = None
+    hnsw_ef_construct: PositiveInt | None = None
+    hnsw_on_disk: StrictBool | None = None
+
+    sparse_on_disk: StrictBool = False
+    on_disk_payload: StrictBool | None = None
+
+    indexing_threshold: NonNegativeInt | None = None
+    memmap_threshold: NonNegativeInt | None = None
+    default_segment_number: PositiveInt | None = None
+
+    # NOTE: with tenant sharding, points are routed by tenant shard key and
+    # land in a shared fallback shard until their tenant gets its own.
+    tenant_sharding: StrictBool = False
+
+    def get_quantization_config(self) -> models.QuantizationConfig | None:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=self.scalar_quantile,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+
+        if self.quantization == "product":
+            return models.ProductQuantization(
+                product=models.ProductQuantizationConfig(
+                    compression=self.product_compression,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+
+        return None
+
+    def get_hnsw_config(self) -> models.HnswConfigDiff | None:
+        if (
+            self.hnsw_m is None
+            and self.hnsw_ef_construct is None
+            and self.hnsw_on_disk is None
+        ):
+            return None
+
+        return models.HnswConfigDiff(
+            m=self.hnsw_m,
+            ef_construct=self.hnsw_ef_construct,
+            on_disk=self.hnsw_on_disk,
+        )
+
+    def get_optimizers_config(self) -> models.OptimizersConfigDiff | None:
+        if (
+            self.indexing_threshold is None
+            and self.memmap_threshold is None
+            and self.default_segment_number is None
+        ):
+            return None
+
+        return models.OptimizersConfigDiff(
+            indexing_threshold=self.indexing_threshold,
+            memmap_threshold=self.memmap_threshold,
+            default_segment_number=self.default_segment_number,
+        )
+
+    def get_sharding_method(self) -> models.ShardingMethod | None:
+        if not self.tenant_sharding:
+            return None
+
+        return models.ShardingMethod.CUSTOM
+
+    def get_vectors_config(self, size: int) -> dict[str, models.VectorParams]:
+        return {
+            "dense": models.VectorParams(
+                size=size,
+                distance=self.distance,
+                datatype=self.datatype,
+                on_disk=self.on_disk or None,
+                hnsw_config=self.get_hnsw_config(),
+                quantization_config=self.get_quantization_config(),
+            )
+        }
+
+    def get_sparse_vectors_config(
+        self,
+    ) -> dict[str, models.SparseVectorParams]:
+        return {
+            "sparse": models.SparseVectorParams(
+                index=models.SparseIndexParams(on_disk=self.sparse_on_disk)
+            )
+        }
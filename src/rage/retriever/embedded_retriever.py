@@ -0,0 +1,946 @@
+import time
+import shutil
+import asyncio
+import tempfile
+import numpy as np
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, NoReturn
+from more_itertools import chunked
+
+from rich.console import Console
+from qdrant_client import models
+from qdrant_client.conversions.common_types import PointId
+from qdrant_client.local.local_collection import LocalCollection
+from qdrant_client.hybrid.fusion import (
+    reciprocal_rank_fusion,
+    distribution_based_score_fusion,
+)
+
+from langchain_core.embeddings import Embeddings
+
+from rage.telemetry import traced
+from rage.embeddings.query_embeddings import aembed_queries
+from rage.stores.embedded_index import EmbeddedIndex
+from rage.meta.interfaces import TextChunk
+
+from .collection_profile import CollectionProfile
+from .reranker import Reranker, reranked
+from .result_cache import ResultCache, cached_search
+from .retriever import (
+    Retriever,
+    RetrieverItem,
+    InsertStats,
+    WeightedMetadataItem,
+)
+
+
+if TYPE_CHECKING:
+    from langchain_qdrant.sparse_embeddings import SparseEmbeddings
+
+
+console = Console()
+
+
+class EmbeddedRetriever(Retriever):
+    # NOTE: serves the Retriever API from in-process EmbeddedIndex
+    # collections stored under 'root_path', without a Qdrant server. Search
+    # is exact, so 'search_params' are accepted and ignored. Aliases,
+    # reindexing and tenant shards need a Qdrant server and fail with an
+    # AssertionError.
+    def __init__(
+        self,
+        dense_embeddings: Embeddings,
+        root_path: str | None = None,
+        dtype: Literal["float32", "float16"] = "float32",
+        sparse_embed_model_name: str = "Qdrant/bm25",
+        result_cache: ResultCache | None = None,
+        sparse_embeddings: "SparseEmbeddings | None" = None,
+        reranker: Reranker | None = None,
+        tenant_key: str | None = None,
+    ):
+        super().__init__(
+            dense_embeddings=dense_embeddings,
+            sparse_embed_model_name=sparse_embed_model_name,
+            result_cache=result_cache,
+            sparse_embeddings=sparse_embeddings,
+            reranker=reranker,
+            tenant_key=tenant_key,
+        )
+
+        self.dtype = dtype
+        self._tmp_root_path = (
+            tempfile.mkdtemp(prefix="rage-embedded-")
+            if root_path is None
+            else None
+        )
+
+        self.root_path = Path(root_path or self._tmp_root_path)
+        self.root_path.mkdir(parents=True, exist_ok=True)
+        self.indexes: dict[str, EmbeddedIndex] = {}
+
+    def _unsupported(self, feature: str) -> NoReturn:
+        raise AssertionError(f"EmbeddedRetriever doesn't support {feature}.")
+
+    async def warmup(self) -> None:
+        for path in self.root_path.iterdir():
+            self._get_index(path.name)
+
+        await asyncio.gather(
+            asyncio.to_thread(self._init_dense_embeddings),
+            asyncio.to_thread(self._warmup_sparse_embeddings),
+            self._warmup_reranker(),
+        )
+
+    def _get_index(self, collection_name: str) -> EmbeddedIndex | None:
+        if collection_name not in self.indexes:
+            if not (self.root_path / collection_name / "meta.json").exists():
+                return None
+
+            self.indexes[collection_name] = EmbeddedIndex(
+                root_path=str(self.root_path / collection_name),
+                dimensions=self.dense_embed_dimensions,
+            )
+
+        return self.indexes[collection_name]
+
+    def _get_existing_index(self, collection_name: str) -> EmbeddedIndex:
+        index = self._get_index(collection_name)
+        assert (
+            index is not None
+        ), f"collection {collection_name} doesn't exist."
+
+        return index
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        return self._get_index(collection_name) is not None
+
+    @traced("retriever", method="create_collection", backend="embedded")
+    async def create_collection(
+        self,
+        collection_name: str,
+        profile: CollectionProfile | None = None,
+    ) -> None:
+        if self._get_index(collection_name) is not None:
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {collection_name} already exists."
+            )
+
+            return
+
+        profile = profile if profile is not None else CollectionProfile()
+        assert (
+            not profile.tenant_sharding
+        ), "EmbeddedRetriever doesn't support tenant sharding."
+
+        self.indexes[collection_name] = EmbeddedIndex(
+            root_path=str(self.root_path / collection_name),
+            dimensions=self.dense_embed_dimensions,
+            dtype=self.dtype,
+            distance=profile.distance,
+        )
+
+        await self._invalidate_results(collection_name=collection_name)
+
+    async def create_payload_index(
+        self,
+        collection_name: str,
+        field_name: str,
+        field_type: (
+            models.PayloadSchemaType | models.PayloadSchemaParams
+        ) = models.PayloadSchemaType.KEYWORD,
+    ) -> None:
+        # NOTE: keyword indexes are also built on first use of a field in a
+        # match filter; other field types are evaluated by a scan.
+        index = self._get_existing_index(collection_name)
+        if field_type != models.PayloadSchemaType.KEYWORD and not isinstance(
+            field_type, models.KeywordIndexParams
+        ):
+            console.log(
+                f"[bold yellow]WARNING:[/] EmbeddedRetriever only builds "
+                f"keyword indexes, {field_name} is filtered by a scan."
+            )
+
+            return
+
+        await asyncio.to_thread(index.create_keyword_index, field_name)
+
+    async def _ensure_payload_index(
+        self,
+        collection_name: str,
+        field_name: str,
+        field_type: (
+            models.PayloadSchemaType | models.PayloadSchemaParams
+        ) = models.PayloadSchemaType.KEYWORD,
+    ) -> None:
+        await self.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_type=field_type,
+        )
+
+    @traced("retriever", method="delete_collection", backend="embedded")
+    async def delete_collection(self, collection_name: str) -> None:
+        index = self._get_index(collection_name)
+        if index is not None:
+            index.close()
+            del self.indexes[collection_name]
+            shutil.rmtree(self.root_path / collection_name, ignore_errors=True)
+
+        self._forget_collection(collection_name)
+        await self._invalidate_results(collection_name=collection_name)
+
+    async def create_tenant_shard(
+        self,
+        collection_name: str,
+        tenant_id: str,
+    ) -> None:
+        self._unsupported("tenant sharding")
+
+    async def get_alias_collection(self, alias: str) -> str | None:
+        self._unsupported("aliases")
+
+    async def create_shadow_collection(
+        self,
+        alias: str,
+        profile: CollectionProfile | None = None,
+    ) -> str:
+        self._unsupported("aliases")
+
+    async def finalize_shadow_collection(
+        self,
+        collection_name: str,
+        profile: CollectionProfile | None = None,
+        timeout: float = 3600.0,
+        poll_interval: float = 1.0,
+        start_timeout: float = 30.0,
+    ) -> None:
+        self._unsupported("aliases")
+
+    async def swap_alias(
+        self,
+        alias: str,
+        collection_name: str,
+        delete_previous: bool = False,
+    ) -> str | None:
+        self._unsupported("aliases")
+
+    async def reindex(
+        self,
+        alias: str,
+        text_chunks: list[TextChunk],
+        profile: CollectionProfile | None = None,
+        batch_size: int = 256,
+        max_in_flight: int = 4,
+        deduplicate: Literal["exact", "near"] | None = None,
+        delete_previous: bool = True,
+    ) -> InsertStats:
+        self._unsupported("aliases")
+
+    async def delete_stale_documents(
+        self,
+        collection_name: str,
+        source_document_ids: dict[str, set[str]],
+        source_key: str = "source_path",
+        tenant_id: str | None = None,
+    ) -> None:
+        self._check_tenant(tenant_id)
+        index = self._get_existing_index(collection_name)
+        with index.lock:
+            stale_rows = [
+                row
+                for row in index.id_rows.values()
+                if (
+                    tenant_id is None
+                    or index.payloads[row]["metadata"].get(self.tenant_key)  # type: ignore
+                    == tenant_id
+                )
+                and (
+                    (metadata := index.payloads[row]["metadata"]).get(source_key)  # type: ignore
+                    in source_document_ids
+                )
+                and metadata.get("document_id")
+                not in source_document_ids[metadata[source_key]]
+            ]
+
+            index.delete(stale_rows)
+
+        if len(stale_rows):
+            await self._invalidate_results(collection_name=collection_name)
+
+    @traced("retriever", method="delete_documents", backend="embedded")
+    async def delete_documents(
+        self,
+        collection_name: str,
+        document_ids: list[str],
+        tenant_id: str | None = None,
+    ) -> None:
+        # NOTE: points are never shared between documents here, since
+        # deduplication is not supported.
+        if not len(document_ids):
+            return
+
+        await self.delete_chunks(
+            collection_name=collection_name,
+            key="metadata.document_id",
+            value=sorted(document_ids),
+            tenant_id=tenant_id,
+        )
+
+    @traced("retriever", method="insert_text_chunks", backend="embedded")
+    async def insert_text_chunks(
+        self,
+        collection_name: str,
+        text_chunks: list[TextChunk],
+        batch_size: int = 256,
+        skip_existing: bool = True,
+        remove_stale: bool = True,
+        source_key: str = "source_path",
+        max_in_flight: int = 4,
+        deduplicate: Literal["exact", "near"] | None = None,
+        near_duplicate_threshold: float = 0.85,
+        tenant_id: str | None = None,
+    ) -> InsertStats:
+        assert (
+            deduplicate is None
+        ), "EmbeddedRetriever doesn't support deduplication."
+
+        index = self._get_index(collection_name)
+        if index is None:
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exists."
+            )
+
+            return InsertStats()
+
+        if self.tenant_key is not None and tenant_id is None:
+            return await self._insert_per_tenant(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                batch_size=batch_size,
+                skip_existing=skip_existing,
+                remove_stale=remove_stale,
+                source_key=source_key,
+                max_in_flight=max_in_flight,
+            )
+
+        start = time.perf_counter()
+        text_chunks = self._set_tenant(text_chunks, tenant_id=tenant_id)
+        id_chunks = {
+            self._get_point_id(tc, source_key=source_key): tc
+            for tc in text_chunks
+        }
+
+        num_updated = 0
+        if skip_existing:
+            with index.lock:
+                updated_rows = {
+                    index.id_rows[point_id]: {
+                        "page_content": tc.text,
+                        "metadata": tc.metadata,
+                    }
+                    for point_id, tc in id_chunks.items()
+                    if point_id in index.id_rows
+                    and index.payloads[index.id_rows[point_id]]["metadata"]
+                    != tc.metadata
+                }
+
+                index.set_payloads(
+                    rows=list(updated_rows),
+                    payloads=list(updated_rows.values()),
+                )
+
+            num_updated = len(updated_rows)
+            id_chunks = {
+                point_id: tc
+                for point_id, tc in id_chunks.items()
+                if point_id not in index.id_rows
+            }
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def upsert_batch(batch: list[tuple[str, TextChunk]]) -> None:
+            async with semaphore:
+                points = await self._get_points(
+                    point_ids=[point_id for point_id, _ in batch],
+                    text_chunks=[tc for _, tc in batch],
+                )
+
+            index.upsert(
+                ids=[str(p.id) for p in points],
+                dense_vectors=[p.vector["dense"] for p in points],  # type: ignore
+                sparse_vectors=[p.vector["sparse"] for p in points],  # type: ignore
+                payloads=[p.payload for p in points],  # type: ignore
+            )
+
+        async with asyncio.TaskGroup() as tg:
+            for batch in chunked(id_chunks.items(), batch_size):
+                tg.create_task(upsert_batch(batch))
+
+        if remove_stale:
+            await self.delete_stale_chunks(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                source_key=source_key,
+                tenant_id=tenant_id,
+            )
+
+        if len(id_chunks) or num_updated:
+            await self._invalidate_results(collection_name=collection_name)
+
+        elapsed = time.perf_counter() - start
+        return InsertStats(
+            num_points=len(id_chunks),
+            elapsed=elapsed,
+            points_per_second=len(id_chunks) / elapsed if elapsed else 0.0,
+        )
+
+    def _get_scored_points(
+        self,
+        index: EmbeddedIndex,
+        results: list[tuple[int, float]],
+    ) -> list[models.ScoredPoint]:
+        return [
+            models.ScoredPoint(
+                id=index.ids[row],
+                version=0,
+                score=score,
+                payload=index.payloads[row],
+            )
+            for row, score in results
+        ]
+
+    def _search(
+        self,
+        collection_name: str,
+        dense_vectors: list[list[float]] | None,
+        sparse_vectors: list[models.SparseVector] | None,
+        k: int,
+        score_threshold: float | None,
+        search_filter: models.Filter | None,
+        fusion: models.Fusion = models.Fusion.RRF,
+        prefetch_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        index = self._get_existing_index(collection_name)
+        with index.lock:
+            return self._search_index(
+                index=index,
+                mask=index.get_mask(
+                    self._get_tenant_filter(tenant_id, search_filter)
+                ),
+                dense_vectors=dense_vectors,
+                sparse_vectors=sparse_vectors,
+                k=k,
+                score_threshold=score_threshold,
+                fusion=fusion,
+                prefetch_k=prefetch_k,
+            )
+
+    def _search_index(
+        self,
+        index: EmbeddedIndex,
+        mask: np.ndarray,
+        dense_vectors: list[list[float]] | None,
+        sparse_vectors: list[models.SparseVector] | None,
+        k: int,
+        score_threshold: float | None,
+        fusion: models.Fusion,
+        prefetch_k: int | None,
+    ) -> list[list[RetrieverItem]]:
+        hybrid = dense_vectors is not None and sparse_vectors is not None
+        limit = (prefetch_k if prefetch_k is not None else k) if hybrid else k
+        threshold = None if hybrid else score_threshold
+
+        responses: list[list[list[models.ScoredPoint]]] = []
+        if dense_vectors is not None:
+            responses.append(
+                [
+                    self._get_scored_points(index=index, results=results)
+                    for results in index.dense_search(
+                        vectors=dense_vectors,
+                        k=limit,
+                        mask=mask,
+                        score_threshold=threshold,
+                    )
+                ]
+            )
+
+        if sparse_vectors is not None:
+            responses.append(
+                [
+                    self._get_scored_points(
+                        index=index,
+                        results=index.sparse_search(
+                            sparse_vector=sparse_vector,
+                            k=limit,
+                            mask=mask,
+                            score_threshold=threshold,
+                        ),
+                    )
+                    for sparse_vector in sparse_vectors
+                ]
+            )
+
+        if not hybrid:
+            (points,) = responses
+            return [self._parse_points(points=p) for p in points]
+
+        fused = [
+            (
+                reciprocal_rank_fusion(
+                    responses=list(query_responses), limit=k
+                )
+                if fusion == models.Fusion.RRF
+                else distribution_based_score_fusion(
+                    responses=list(query_responses),
+                    limit=k,
+                )
+            )
+            for query_responses in zip(*responses)
+        ]
+
+        return [
+            self._parse_points(
+                points=[
+                    p
+                    for p in points
+                    if score_threshold is None or p.score >= score_threshold
+                ]
+            )
+            for points in fused
+        ]
+
+    @traced("retriever", method="dense_search", backend="embedded")
+    @reranked
+    @cached_search(mode="dense")
+    async def dense_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        vector = await self.dense_embeddings.aembed_query(text=query)
+        (retriever_items,) = self._search(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=[vector],
+            sparse_vectors=None,
+            k=k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="dense_search_batch", backend="embedded")
+    @reranked
+    async def dense_search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        vectors = await aembed_queries(self.dense_embeddings, queries)
+        return self._search(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=vectors,
+            sparse_vectors=None,
+            k=k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+        )
+
+    @traced("retriever", method="hybrid_search", backend="embedded")
+    @reranked
+    @cached_search(mode="hybrid")
+    async def hybrid_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        fusion: models.Fusion = models.Fusion.RRF,
+        prefetch_k: int | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        dense_vector, sparse_vector = await asyncio.gather(
+            self.dense_embeddings.aembed_query(text=query),
+            self._get_sparse_vector(query=query),
+        )
+
+        (retriever_items,) = self._search(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=[dense_vector],
+            sparse_vectors=[sparse_vector],
+            k=k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+            fusion=fusion,
+            prefetch_k=prefetch_k,
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="hybrid_search_batch", backend="embedded")
+    @reranked
+    async def hybrid_search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        fusion: models.Fusion = models.Fusion.RRF,
+        prefetch_k: int | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        dense_vectors, sparse_vectors = await asyncio.gather(
+            aembed_queries(self.dense_embeddings, queries),
+            self._get_sparse_query_vectors(queries=queries),
+        )
+
+        return self._search(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=dense_vectors,
+            sparse_vectors=sparse_vectors,
+            k=k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+            fusion=fusion,
+            prefetch_k=prefetch_k,
+        )
+
+    @traced("retriever", method="sparse_search", backend="embedded")
+    @reranked
+    @cached_search(mode="sparse")
+    async def sparse_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        sparse_vector = await self._get_sparse_vector(query=query)
+        (retriever_items,) = self._search(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=None,
+            sparse_vectors=[sparse_vector],
+            k=k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="sparse_search_batch", backend="embedded")
+    @reranked
+    async def sparse_search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        sparse_vectors = await self._get_sparse_query_vectors(queries=queries)
+        return self._search(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=None,
+            sparse_vectors=sparse_vectors,
+            k=k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+        )
+
+    def _search_weighted(
+        self,
+        collection_name: str,
+        dense_vectors: list[list[float]],
+        weighted_metadata_items: list[WeightedMetadataItem],
+        k: int,
+        pre_k: int,
+        score_threshold: float | None,
+        search_filter: models.Filter | None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        # NOTE: like the Qdrant formula query, the best 'pre_k' dense hits
+        # are rescored by score * (1 + sum of the weights of the matching
+        # metadata items), with one boost per row from the payload masks.
+        index = self._get_existing_index(collection_name)
+        with index.lock:
+            boosts = np.ones(len(index.ids), dtype=np.float32)
+            for wmi in weighted_metadata_items:
+                boosts += wmi.weight * index.get_mask(
+                    models.Filter(
+                        must=[
+                            models.FieldCondition(
+                                key=wmi.key,
+                                match=models.MatchValue(value=wmi.value),
+                            )
+                        ]
+                    )
+                )
+
+            results = index.dense_search(
+                vectors=dense_vectors,
+                k=pre_k,
+                mask=index.get_mask(
+                    self._get_tenant_filter(tenant_id, search_filter)
+                ),
+            )
+
+            retriever_items = []
+            for query_results in results:
+                rescored = sorted(
+                    (
+                        (row, score * float(boosts[row]))
+                        for row, score in query_results
+                    ),
+                    key=lambda result: result[1],
+                    reverse=True,
+                )
+
+                retriever_items.append(
+                    self._parse_points(
+                        points=self._get_scored_points(
+                            index=index,
+                            results=[
+                                (row, score)
+                                for row, score in rescored[:k]
+                                if score_threshold is None
+                                or score >= score_threshold
+                            ],
+                        )
+                    )
+                )
+
+            return retriever_items
+
+    @traced("retriever", method="dense_search_weighted", backend="embedded")
+    @reranked
+    @cached_search(mode="dense_weighted")
+    async def dense_search_weighted(
+        self,
+        collection_name: str,
+        query: str,
+        weighted_metadata_items: list[WeightedMetadataItem],
+        k: int = 10,
+        pre_k: int = 50,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        vector = await self.dense_embeddings.aembed_query(text=query)
+        (retriever_items,) = self._search_weighted(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=[vector],
+            weighted_metadata_items=weighted_metadata_items,
+            k=k,
+            pre_k=pre_k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+        )
+
+        return retriever_items
+
+    @traced(
+        "retriever",
+        method="dense_search_weighted_batch",
+        backend="embedded",
+    )
+    @reranked
+    async def dense_search_weighted_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        weighted_metadata_items: list[WeightedMetadataItem],
+        k: int = 10,
+        pre_k: int = 50,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        vectors = await aembed_queries(self.dense_embeddings, queries)
+        return self._search_weighted(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            dense_vectors=vectors,
+            weighted_metadata_items=weighted_metadata_items,
+            k=k,
+            pre_k=pre_k,
+            score_threshold=score_threshold,
+            search_filter=search_filter,
+        )
+
+    @traced("retriever", method="scroll", backend="embedded")
+    async def scroll(
+        self,
+        collection_name: str,
+        limit: int = 10,
+        scroll_filter: models.Filter | None = None,
+        order_by: models.OrderBy | None = None,
+        offset: PointId | None = None,
+        with_payload: bool = True,
+        tenant_id: str | None = None,
+    ) -> list[models.Record]:
+        index = self._get_existing_index(collection_name)
+        with index.lock:
+            rows = index.scroll(
+                limit=limit,
+                mask=index.get_mask(
+                    self._get_tenant_filter(tenant_id, scroll_filter)
+                ),
+                offset=str(offset) if offset is not None else None,
+                order_by=order_by,
+            )
+
+            return [
+                models.Record(
+                    id=index.ids[row],
+                    payload=index.payloads[row] if with_payload else None,
+                )
+                for row in rows
+            ]
+
+    def _get_page(
+        self,
+        collection_name: str,
+        limit: int,
+        offset: PointId | None,
+        scroll_filter: models.Filter | None,
+        with_payload: models.PayloadSelector | bool | list[str],
+        with_vectors: bool | list[str],
+    ) -> tuple[list[models.Record], PointId | None]:
+        # NOTE: sparse vectors are stored inverted and are not returned.
+        assert (
+            isinstance(with_vectors, bool) or "sparse" not in with_vectors
+        ), "EmbeddedRetriever only returns dense vectors."
+
+        # NOTE: pages are read in a worker thread while the event loop can
+        # write, so the whole page is read under the index lock.
+        index = self._get_existing_index(collection_name)
+        with index.lock:
+            rows = index.scroll(
+                limit=limit + 1,
+                mask=index.get_mask(scroll_filter),
+                offset=str(offset) if offset is not None else None,
+            )
+
+            next_offset = index.ids[rows[limit]] if len(rows) > limit else None
+            rows = rows[:limit]
+            vectors = index.get_dense_vectors(rows) if with_vectors else None
+
+            return [
+                models.Record(
+                    id=index.ids[row],
+                    payload=LocalCollection._process_payload(
+                        index.payloads[row],  # type: ignore
+                        with_payload,
+                    ),
+                    vector=(
+                        {"dense": vectors[idx].tolist()}
+                        if vectors is not None
+                        else None
+                    ),
+                )
+                for idx, row in enumerate(rows)
+            ], next_offset
+
+    async def _scroll_page(
+        self,
+        collection_name: str,
+        limit: int,
+        offset: PointId | None,
+        scroll_filter: models.Filter | None,
+        with_payload: models.PayloadSelector | bool | list[str],
+        with_vectors: bool | list[str],
+        tenant_id: str | None = None,
+    ) -> tuple[list[models.Record], PointId | None]:
+        # NOTE: pages are read in a thread, so a prefetched page loads while
+        # the caller processes the current one.
+        return await asyncio.to_thread(
+            self._get_page,
+            collection_name=collection_name,
+            limit=limit,
+            offset=offset,
+            scroll_filter=scroll_filter,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+
+    @traced("retriever", method="delete_chunks", backend="embedded")
+    async def delete_chunks(
+        self,
+        collection_name: str,
+        key: str,
+        value: str | int | bool | list[str] | list[int],
+        tenant_id: str | None = None,
+    ) -> None:
+        index = self._get_index(collection_name)
+        if index is None:
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exist."
+            )
+
+            return
+
+        match = (
+            models.MatchAny(any=value)
+            if isinstance(value, list)
+            else models.MatchValue(value=value)
+        )
+
+        with index.lock:
+            mask = index.get_mask(
+                self._get_tenant_filter(
+                    tenant_id,
+                    models.Filter(
+                        must=[models.FieldCondition(key=key, match=match)]
+                    ),
+                )
+            )
+
+            index.delete(mask.nonzero()[0].tolist())
+
+        await self._invalidate_results(collection_name=collection_name)
+
+    def close(self) -> None:
+        for index in self.indexes.values():
+            index.close()
+
+        self.indexes.clear()
+        if self._tmp_root_path is not None:
+            shutil.rmtree(self._tmp_root_path, ignore_errors=True)
@@ -0,0 +1,258 @@
+import math
+import inspect
+import xxhash
+import asyncio
+import threading
+
+from functools import partial, wraps
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from rich.console import Console
+from pydantic import BaseModel, NonNegativeInt
+
+from rage.config import config
+from rage.telemetry import telemetry
+
+if TYPE_CHECKING:
+    from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+
+console = Console()
+
+
+class RerankerStats(BaseModel):
+    hits: NonNegativeInt = 0
+    misses: NonNegativeInt = 0
+    timeouts: NonNegativeInt = 0
+    saturated: NonNegativeInt = 0
+
+
+class Reranker:
+    # NOTE: scores (query, chunk) pairs with a fastembed cross-encoder on the
+    # CPU. Pair scores are cached by query hash and chunk_id. When scoring
+    # takes longer than 'timeout' seconds, results keep their first-stage
+    # order; the pairs are still scored in the background and cached.
+    # Scoring runs on the reranker's own executor of 'max_in_flight'
+    # threads; when all are busy, results keep their first-stage order
+    # without queueing more work.
+    def __init__(
+        self,
+        model: str = "Xenova/ms-marco-MiniLM-L-6-v2",
+        cache_dir: str | None = None,
+        batch_size: int = 64,
+        cache_size: int = 100_000,
+        timeout: float | None = None,
+        threads: int | None = None,
+        max_in_flight: int = 2,
+    ):
+        self.model = model
+        self.cache_dir = (
+            cache_dir
+            if cache_dir is not None
+            else config.fast_embed_rerank_cache
+        )
+
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.threads = threads
+        self.max_in_flight = max_in_flight
+
+        self.stats = RerankerStats()
+        self.lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight,
+            thread_name_prefix="rage-reranker",
+        )
+        self.scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._cross_encoder: "TextCrossEncoder | None" = None
+
+    @property
+    def cross_encoder(self) -> "TextCrossEncoder":
+        # NOTE: the model loads under its own lock, so cache lookups on the
+        # event loop never wait for it.
+        if self._cross_encoder is None:
+            with self._model_lock:
+                if self._cross_encoder is None:
+                    from fastembed.rerank.cross_encoder import (
+                        TextCrossEncoder,
+                    )
+
+                    self._cross_encoder = TextCrossEncoder(
+                        model_name=self.model,
+                        cache_dir=self.cache_dir,
+                        threads=self.threads,
+                    )
+
+        return self._cross_encoder
+
+    def _get_key(self, query: str, item: Any) -> tuple[str, str]:
+        chunk_id = item.metadata.get(
+            "chunk_id",
+            xxhash.xxh64(item.text).hexdigest(),
+        )
+
+        return xxhash.xxh64(query).hexdigest(), chunk_id
+
+    def _score_pairs(
+        self,
+        keys: list[tuple[str, str]],
+        pairs: list[tuple[str, str]],
+    ) -> list[float]:
+        # NOTE: logits are squashed to (0, 1) to stay valid scores. The slot
+        # taken in 'rerank_batch' is released once scoring ends.
+        try:
+            scores = [
+                1.0 / (1.0 + math.exp(-logit))
+                for logit in self.cross_encoder.rerank_pairs(
+                    pairs,
+                    batch_size=self.batch_size,
+                )
+            ]
+        finally:
+            self._slots.release()
+
+        with self.lock:
+            for key, score in zip(keys, scores):
+                self.scores[key] = score
+                self.scores.move_to_end(key)
+
+            while len(self.scores) > self.cache_size:
+                self.scores.popitem(last=False)
+
+        return scores
+
+    def _get_cached(self, key: tuple[str, str]) -> float | None:
+        with self.lock:
+            score = self.scores.get(key)
+            if score is not None:
+                self.scores.move_to_end(key)
+
+            return score
+
+    async def rerank_batch(
+        self,
+        queries: list[str],
+        results: list[list[Any]],
+        k: int,
+        timeout: float | None = None,
+    ) -> list[list[Any]]:
+        # NOTE: all uncached pairs of all queries are scored together. Scores
+        # are kept locally once read or computed, since the cache can evict
+        # them before the results are sorted.
+        scores: dict[tuple[str, str], float] = {}
+        missing: dict[tuple[str, str], tuple[str, str]] = {}
+        for query, items in zip(queries, results):
+            for item in items:
+                key = self._get_key(query=query, item=item)
+                if key in scores or key in missing:
+                    continue
+
+                score = self._get_cached(key)
+                if score is not None:
+                    scores[key] = score
+                else:
+                    missing[key] = (query, item.text)
+
+        num_pairs = sum(len(items) for items in results)
+        self.stats.misses += len(missing)
+        self.stats.hits += num_pairs - len(missing)
+
+        with telemetry.span("reranker", model=self.model) as span:
+            span.set("pairs", num_pairs)
+            span.set("scored_pairs", len(missing))
+
+            timeout = timeout if timeout is not None else self.timeout
+            if len(missing):
+                if not self._slots.acquire(blocking=False):
+                    self.stats.saturated += 1
+                    span.set("saturated", 1)
+                    console.log(
+                        f"[bold yellow]WARNING:[/] reranker busy, skipping "
+                        f"{len(missing)} pairs, keeping first-stage order"
+                    )
+
+                    return [items[:k] for items in results]
+
+                scoring = asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    partial(
+                        self._score_pairs,
+                        keys=list(missing),
+                        pairs=list(missing.values()),
+                    ),
+                )
+
+                try:
+                    missing_scores = await asyncio.wait_for(
+                        asyncio.shield(scoring),
+                        timeout=timeout,
+                    )
+                except TimeoutError:
+                    self.stats.timeouts += 1
+                    span.set("timeouts", 1)
+                    console.log(
+                        f"[bold yellow]WARNING:[/] reranking {len(missing)} "
+                        f"pairs exceeded {timeout}s, keeping first-stage order"
+                    )
+
+                    return [items[:k] for items in results]
+
+                scores.update(zip(missing, missing_scores))
+
+        reranked = []
+        for query, items in zip(queries, results):
+            scored = []
+            for item in items:
+                score = scores[self._get_key(query=query, item=item)]
+                scored.append(item.model_copy(update={"score": score}))
+
+            scored.sort(key=lambda item: item.score, reverse=True)
+            reranked.append(scored[:k])
+
+        return reranked
+
+
+def reranked(func: Callable[..., Awaitable[list]]) -> Callable:
+    # NOTE: with 'rerank_k' set, the search fetches 'rerank_k' candidates and
+    # the retriever's reranker keeps the best 'k'. The wrapped search runs
+    # with rerank_k=None, so its result cache holds first-stage results.
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> list:
+        bound_args = signature.bind(self, *args, **kwargs)
+        bound_args.apply_defaults()
+
+        rerank_k = bound_args.arguments["rerank_k"]
+        if rerank_k is None:
+            return await func(self, *args, **kwargs)
+
+        reranker: Reranker | None = self.reranker
+        assert reranker is not None, "rerank_k requires a reranker."
+
+        k = bound_args.arguments["k"]
+        bound_args.arguments["k"] = max(k, rerank_k)
+        bound_args.arguments["rerank_k"] = None
+
+        results = await func(*bound_args.args, **bound_args.kwargs)
+        if "queries" in bound_args.arguments:
+            return await reranker.rerank_batch(
+                queries=bound_args.arguments["queries"],
+                results=results,
+                k=k,
+            )
+
+        (items,) = await reranker.rerank_batch(
+            queries=[bound_args.arguments["query"]],
+            results=[results],
+            k=k,
+        )
+
+        return items
+
+    return wrapper
@@ -0,0 +1,256 @@
+import re
+import json
+import time
+import xxhash
+import inspect
+
+from enum import Enum
+from functools import wraps
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from rich.console import Console
+from pydantic import BaseModel, NonNegativeInt
+
+from aiocache import Cache
+from aiocache.serializers import PickleSerializer
+
+from rage.config import config
+
+
+console = Console()
+
+
+class ResultCacheStats(BaseModel):
+    hits: NonNegativeInt = 0
+    redis_hits: NonNegativeInt = 0
+    misses: NonNegativeInt = 0
+    evictions: NonNegativeInt = 0
+    expirations: NonNegativeInt = 0
+    invalidations: NonNegativeInt = 0
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+
+    if isinstance(value, Enum):
+        return value.value
+
+    return str(value)
+
+
+def normalize_query(query: str) -> str:
+    # NOTE: only whitespace is collapsed; dense and sparse embeddings are
+    # case sensitive, so queries differing in case are cached separately.
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class ResultCache:
+    # NOTE: every key embeds the collection generation, which is bumped on
+    # any write to the collection, so results cached before a write are
+    # never served afterwards and simply age out. The redis generation is
+    # kept in-process for 'generation_ttl' seconds to save a redis round
+    # trip per lookup, so writes of other processes invalidate with up to
+    # that delay; writes of this process invalidate immediately.
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl: float = 300.0,
+        use_redis: bool = False,
+        redis_ttl: int | None = None,
+        redis_retry_interval: float = 30.0,
+        namespace: str = "rage:results",
+        generation_ttl: float = 1.0,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl if redis_ttl is not None else int(ttl)
+        self.generation_ttl = generation_ttl
+
+        self.lru: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self.generations: dict[str, int] = {}
+        self.redis_generations: dict[str, tuple[float, int]] = {}
+        self.stats = ResultCacheStats()
+
+        self.redis_retry_interval = redis_retry_interval
+        self._redis_retry_at = 0.0
+
+        self.redis = (
+            Cache(
+                Cache.REDIS,
+                endpoint=config.redis_host,
+                port=config.redis_port,
+                db=config.redis_db,
+                serializer=PickleSerializer(),
+                namespace=namespace,
+            )
+            if use_redis
+            else None
+        )
+
+    @property
+    def redis_available(self) -> bool:
+        return (
+            self.redis is not None and time.monotonic() >= self._redis_retry_at
+        )
+
+    def _on_redis_error(self, e: Exception) -> None:
+        # NOTE: redis is skipped for a while after an error, so an outage
+        # degrades to the in-process tier instead of failing searches.
+        self._redis_retry_at = time.monotonic() + self.redis_retry_interval
+        console.log(f"[bold yellow]WARNING:[/] result cache redis error: {e}")
+
+    async def get_generation(self, collection_name: str) -> str:
+        # NOTE: the local counter is part of the generation too, so writes
+        # made by this process while redis is unreachable still invalidate.
+        local_generation = self.generations.get(collection_name, 0)
+        redis_generation = 0
+
+        expires_at, cached_generation = self.redis_generations.get(
+            collection_name, (0.0, 0)
+        )
+
+        if expires_at >= time.monotonic():
+            redis_generation = cached_generation
+
+        elif self.redis_available:
+            try:
+                redis_generation = await self.redis.get(  # type: ignore
+                    f"generation:{collection_name}",
+                    loads_fn=lambda v: int(v) if v is not None else 0,
+                )
+
+                self.redis_generations[collection_name] = (
+                    time.monotonic() + self.generation_ttl,
+                    redis_generation,
+                )
+            except Exception as e:
+                self._on_redis_error(e)
+
+        return f"{redis_generation}.{local_generation}"
+
+    async def invalidate(self, collection_name: str) -> None:
+        self.stats.invalidations += 1
+        self.generations[collection_name] = (
+            self.generations.get(collection_name, 0) + 1
+        )
+
+        self.redis_generations.pop(collection_name, None)
+        if self.redis_available:
+            try:
+                await self.redis.increment(  # type: ignore
+                    f"generation:{collection_name}"
+                )
+            except Exception as e:
+                self._on_redis_error(e)
+
+    async def get_key(
+        self,
+        mode: str,
+        collection_name: str,
+        arguments: dict[str, Any],
+    ) -> str:
+        generation = await self.get_generation(collection_name)
+        arguments = arguments | {"query": normalize_query(arguments["query"])}
+
+        key_data = json.dumps(
+            [mode, collection_name, generation, arguments],
+            default=_serialize,
+            sort_keys=True,
+        )
+
+        key_hash = xxhash.xxh3_128_hexdigest(key_data)
+        return f"{collection_name}:{generation}:{key_hash}"
+
+    def _get_local(self, key: str) -> list | None:
+        item = self.lru.get(key)
+        if item is None:
+            return None
+
+        expires_at, results = item
+        if expires_at < time.monotonic():
+            del self.lru[key]
+            self.stats.expirations += 1
+            return None
+
+        self.lru.move_to_end(key)
+        return results
+
+    def _set_local(self, key: str, results: list) -> None:
+        self.lru[key] = (time.monotonic() + self.ttl, results)
+        self.lru.move_to_end(key)
+
+        while len(self.lru) > self.max_size:
+            self.lru.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get(self, key: str) -> list | None:
+        results = self._get_local(key)
+        if results is not None:
+            self.stats.hits += 1
+            return results
+
+        if self.redis_available:
+            try:
+                results = await self.redis.get(key)  # type: ignore
+            except Exception as e:
+                self._on_redis_error(e)
+
+            if results is not None:
+                self.stats.hits += 1
+                self.stats.redis_hits += 1
+                self._set_local(key, results)
+                return results
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, results: list) -> None:
+        self._set_local(key, results)
+        if self.redis_available:
+            try:
+                await self.redis.set(  # type: ignore
+                    key,
+                    results,
+                    ttl=self.redis_ttl,
+                )
+            except Exception as e:
+                self._on_redis_error(e)
+
+    def clear(self) -> None:
+        self.lru.clear()
+
+
+def cached_search(mode: str) -> Callable:
+    def decorator(func: Callable[..., Awaitable[list]]) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> list:
+            result_cache: ResultCache | None = self.result_cache
+            if result_cache is None:
+                return await func(self, *args, **kwargs)
+
+            bound_args = signature.bind(self, *args, **kwargs)
+            bound_args.apply_defaults()
+
+            arguments = dict(bound_args.arguments)
+            del arguments["self"]
+
+            key = await result_cache.get_key(
+                mode=mode,
+                collection_name=arguments.pop("collection_name"),
+                arguments=arguments,
+            )
+
+            results = await result_cache.get(key)
+            if results is None:
+                results = await func(self, *args, **kwargs)
+                await result_cache.set(key, results)
+
+            return [item.model_copy(deep=True) for item in results]
+
+        return wrapper
+
+    return decorator
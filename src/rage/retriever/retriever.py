@@ -1,10 +1,20 @@
-from uuid import uuid4
-from functools import lru_cache
+import time
+import xxhash
+import asyncio
+import weakref
+import threading
+
+from contextlib import aclosing
+from typing import TYPE_CHECKING, Any, AsyncIterator, Literal
+from uuid import UUID, uuid4, uuid5, NAMESPACE_OID
+from collections import OrderedDict, defaultdict
+from more_itertools import chunked
 
 from rich.console import Console
 from pydantic import (
     BaseModel,
     StrictStr,
+    NonNegativeInt,
     NonNegativeFloat,
     StrictFloat,
     StrictInt,
@@ -13,19 +23,29 @@ from pydantic import (
 from qdrant_client import QdrantClient, AsyncQdrantClient, models
 from qdrant_client.conversions.common_types import PointId
 
-from langchain_classic.storage import LocalFileStore
-from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_classic.embeddings import CacheBackedEmbeddings
-
-from langchain_qdrant import QdrantVectorStore, FastEmbedSparse, RetrievalMode
 
 from rage.config.config import config
+from rage.stores import MmapEmbeddingStore
+from rage.telemetry import telemetry, traced
+from rage.embeddings.instrumented_embeddings import InstrumentedEmbeddings
+from rage.embeddings.query_embeddings import aembed_queries
+from rage.utils.minhash import MinHasher
 from rage.meta.interfaces import TextChunk
 
+from .collection_profile import CollectionProfile
+from .reranker import Reranker, reranked
+from .result_cache import ResultCache, cached_search
+
+
+if TYPE_CHECKING:
+    from langchain_qdrant.sparse_embeddings import SparseEmbeddings
+
 
 console = Console()
 
+FALLBACK_SHARD_KEY = "default"
+
 
 class RetrieverItem(BaseModel):
     text: StrictStr
@@ -33,6 +53,13 @@ class RetrieverItem(BaseModel):
     score: NonNegativeFloat | None = None
 
 
+class InsertStats(BaseModel):
+    num_points: NonNegativeInt = 0
+    num_duplicates: NonNegativeInt = 0
+    elapsed: NonNegativeFloat = 0.0
+    points_per_second: NonNegativeFloat = 0.0
+
+
 class WeightedMetadataItem(BaseModel):
     key: StrictStr
     value: StrictStr | StrictInt | StrictFloat
@@ -44,6 +71,12 @@ class Retriever:
         self,
         dense_embeddings: Embeddings,
         sparse_embed_model_name: str = "Qdrant/bm25",
+        result_cache: ResultCache | None = None,
+        neighbor_cache_size: int = 10_000,
+        sparse_embeddings: "SparseEmbeddings | None" = None,
+        reranker: Reranker | None = None,
+        tenant_key: str | None = None,
+        collection_cache_size: int = 1024,
     ):
         assert dense_embeddings.dimensions is not None, (  # type: ignore
             "Expected 'dense_embeddings.dimensions' to be set."
@@ -53,28 +86,150 @@ class Retriever:
             "Expected 'dense_embeddings.model' to be set."
         )
 
-        self.dense_embed_dimensions = dense_embeddings.dimensions
-        self.dense_embeddings = self._get_dense_embeddings(
-            dense_embeddings=dense_embeddings,
-            dense_embed_doc_cache_path=config.dense_embed_doc_cache_path,
-            dense_embed_query_cache_path=config.dense_embed_query_cache_path,
+        self.result_cache = result_cache
+        self.reranker = reranker
+        self.neighbor_cache_size = neighbor_cache_size
+        self.neighbor_cache: OrderedDict[tuple, tuple[str, dict]] = (
+            OrderedDict()
+        )
+        # NOTE: with 'tenant_key' set, chunks are stored with their tenant
+        # in 'metadata.<tenant_key>' and every search, scroll, insert and
+        # delete requires a 'tenant_id' and is scoped to it.
+        self.tenant_key = tenant_key
+
+        # NOTE: per collection state is kept in bounded LRU caches, so many
+        # collection names don't grow the retriever without limit.
+        self.collection_cache_size = collection_cache_size
+        self._payload_indexes: OrderedDict[tuple[str, str], None] = (
+            OrderedDict()
         )
+        self._tenant_sharding: OrderedDict[str, bool] = OrderedDict()
 
-        self.sparse_embeddings = FastEmbedSparse(
-            model_name=sparse_embed_model_name,
-            cache_dir=config.fast_embed_sparse_cache,
+        self.min_hasher = MinHasher()
+        self._dedup_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
         )
 
-        self.qadrant_client = QdrantClient(
-            url=config.qdrant_host,
-            port=config.qdrant_port,
-            grpc_port=config.qdrant_grpc_port,
+        self.dense_embed_dimensions = dense_embeddings.dimensions
+        self.sparse_embed_model_name = sparse_embed_model_name
+
+        # NOTE: the embedding cache, the sparse model and the clients are
+        # built on first use, or up front with 'warmup'. Each has its own
+        # lock, only taken until it is built, so loading the sparse model in
+        # a worker thread never blocks the event loop on a client.
+        self._dense_embeddings_lock = threading.Lock()
+        self._sparse_embeddings_lock = threading.Lock()
+        self._qdrant_client_lock = threading.Lock()
+        self._dense_embeddings_model = dense_embeddings
+        self._dense_embeddings: Embeddings | None = None
+        self._sparse_embeddings = sparse_embeddings
+        self._qdrant_client: QdrantClient | None = None
+        self._qdrant_async_client: AsyncQdrantClient | None = None
+
+    def _init_dense_embeddings(self) -> Embeddings:
+        if self._dense_embeddings is None:
+            with self._dense_embeddings_lock:
+                if self._dense_embeddings is None:
+                    self._dense_embeddings = self._get_dense_embeddings(
+                        dense_embeddings=self._dense_embeddings_model,
+                        dense_embed_doc_cache_path=config.dense_embed_doc_cache_path,
+                        dense_embed_query_cache_path=config.dense_embed_query_cache_path,
+                    )
+
+        return self._dense_embeddings
+
+    @property
+    def dense_embeddings(self) -> Embeddings:
+        return self._init_dense_embeddings()
+
+    def _init_sparse_embeddings(self) -> "SparseEmbeddings":
+        # NOTE: loading the model takes seconds, call this from a worker
+        # thread, never from the event loop.
+        if self._sparse_embeddings is None:
+            with self._sparse_embeddings_lock:
+                if self._sparse_embeddings is None:
+                    from langchain_qdrant import FastEmbedSparse
+
+                    self._sparse_embeddings = FastEmbedSparse(
+                        model_name=self.sparse_embed_model_name,
+                        cache_dir=config.fast_embed_sparse_cache,
+                    )
+
+        return self._sparse_embeddings
+
+    @property
+    def sparse_embeddings(self) -> "SparseEmbeddings":
+        return self._init_sparse_embeddings()
+
+    def _get_qdrant_kwargs(self) -> dict:
+        # NOTE: 'qdrant_location=":memory:"' selects qdrant-client's local
+        # in-process mode, used by the offline benchmarks. The sync and the
+        # async client then hold separate data; the retriever only uses the
+        # async one.
+        if config.qdrant_location is not None:
+            return {"location": config.qdrant_location}
+
+        return {
+            "url": config.qdrant_host,
+            "port": config.qdrant_port,
+            "grpc_port": config.qdrant_grpc_port,
+            "prefer_grpc": config.qdrant_prefer_grpc,
+        }
+
+    def _init_qdrant_client(self) -> QdrantClient:
+        if self._qdrant_client is None:
+            with self._qdrant_client_lock:
+                if self._qdrant_client is None:
+                    self._qdrant_client = QdrantClient(
+                        **self._get_qdrant_kwargs()
+                    )
+
+        return self._qdrant_client
+
+    @property
+    def qadrant_client(self) -> QdrantClient:
+        return self._init_qdrant_client()
+
+    def _init_qdrant_async_client(self) -> AsyncQdrantClient:
+        if self._qdrant_async_client is None:
+            with self._qdrant_client_lock:
+                if self._qdrant_async_client is None:
+                    self._qdrant_async_client = AsyncQdrantClient(
+                        **self._get_qdrant_kwargs()
+                    )
+
+        return self._qdrant_async_client
+
+    @property
+    def qadrant_async_client(self) -> AsyncQdrantClient:
+        return self._init_qdrant_async_client()
+
+    def _warmup_sparse_embeddings(self) -> None:
+        self._init_sparse_embeddings().embed_query("warmup")
+
+    async def warmup(self) -> None:
+        await asyncio.gather(
+            asyncio.to_thread(self._init_dense_embeddings),
+            asyncio.to_thread(self._init_qdrant_client),
+            asyncio.to_thread(self._warmup_sparse_embeddings),
+            self._init_qdrant_async_client().get_collections(),
+            self._warmup_reranker(),
         )
 
-        self.qadrant_async_client = AsyncQdrantClient(
-            url=config.qdrant_host,
-            port=config.qdrant_port,
-            grpc_port=config.qdrant_grpc_port,
+    async def _warmup_reranker(self) -> None:
+        if self.reranker is not None:
+            await asyncio.to_thread(lambda: self.reranker.cross_encoder)  # type: ignore
+
+    def _get_embedding_store(
+        self,
+        root_path: str,
+        namespace: str,
+    ) -> MmapEmbeddingStore:
+        return MmapEmbeddingStore(
+            root_path=root_path,
+            namespace=namespace,
+            dtype=config.dense_embed_cache_dtype,
+            max_bytes=config.dense_embed_cache_max_bytes,
         )
 
     def _get_dense_embeddings(
@@ -83,337 +238,1362 @@ class Retriever:
         dense_embed_doc_cache_path: str | None,
         dense_embed_query_cache_path: str | None,
     ) -> Embeddings:
+        dense_embeddings = InstrumentedEmbeddings(
+            embeddings=dense_embeddings,
+            layer="model",
+        )
+
         if dense_embed_doc_cache_path is None:
             return dense_embeddings
 
+        from langchain_classic.embeddings import CacheBackedEmbeddings
+
+        if config.dense_embed_cache_store == "mmap":
+            document_embedding_store = self._get_embedding_store(
+                root_path=dense_embed_doc_cache_path,
+                namespace=dense_embeddings.model,  # type: ignore
+            )
+
+            query_embedding_store = (
+                document_embedding_store
+                if dense_embed_query_cache_path is None
+                else self._get_embedding_store(
+                    root_path=dense_embed_query_cache_path,
+                    namespace=dense_embeddings.model,  # type: ignore
+                )
+            )
+
+            return InstrumentedEmbeddings(
+                embeddings=CacheBackedEmbeddings(
+                    underlying_embeddings=dense_embeddings,
+                    document_embedding_store=document_embedding_store,
+                    query_embedding_store=query_embedding_store,
+                ),
+                layer="cache",
+            )
+
+        from langchain_classic.storage import LocalFileStore
+
         query_embedding_cache = (
             True
             if dense_embed_query_cache_path is None
             else LocalFileStore(root_path=dense_embed_query_cache_path)
         )
 
-        return CacheBackedEmbeddings.from_bytes_store(
-            underlying_embeddings=dense_embeddings,
-            document_embedding_cache=LocalFileStore(
-                root_path=dense_embed_doc_cache_path
+        return InstrumentedEmbeddings(
+            embeddings=CacheBackedEmbeddings.from_bytes_store(
+                underlying_embeddings=dense_embeddings,
+                document_embedding_cache=LocalFileStore(
+                    root_path=dense_embed_doc_cache_path
+                ),
+                namespace=dense_embeddings.model,  # type: ignore
+                query_embedding_cache=query_embedding_cache,
             ),
-            namespace=dense_embeddings.model,  # type: ignore
-            query_embedding_cache=query_embedding_cache,
+            layer="cache",
         )
 
-    @lru_cache()
-    def _get_dense_vector_store(
-        self,
-        collection_name: str,
-    ) -> QdrantVectorStore:
-        return QdrantVectorStore(
-            client=self.qadrant_client,
-            collection_name=collection_name,
-            embedding=self.dense_embeddings,
-            retrieval_mode=RetrievalMode.DENSE,
-            vector_name="dense",
+    async def _invalidate_results(self, collection_name: str) -> None:
+        self.neighbor_cache = OrderedDict(
+            (k, v)
+            for k, v in self.neighbor_cache.items()
+            if k[0] != collection_name
         )
 
-    @lru_cache()
-    def _get_hybrid_vector_store(
+        if self.result_cache is not None:
+            await self.result_cache.invalidate(collection_name=collection_name)
+
+    def _cache_collection_item(
         self,
-        collection_name: str,
-    ) -> QdrantVectorStore:
-        return QdrantVectorStore(
-            client=self.qadrant_client,
-            collection_name=collection_name,
-            embedding=self.dense_embeddings,
-            sparse_embedding=self.sparse_embeddings,
-            retrieval_mode=RetrievalMode.HYBRID,
-            vector_name="dense",
-            sparse_vector_name="sparse",
+        cache: OrderedDict,
+        key: Any,
+        value: Any,
+    ) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.collection_cache_size:
+            cache.popitem(last=False)
+
+    def _forget_collection(self, collection_name: str) -> None:
+        for key in [
+            k for k in self._payload_indexes if k[0] == collection_name
+        ]:
+            del self._payload_indexes[key]
+
+        self._tenant_sharding.pop(collection_name, None)
+
+    def _get_dedup_lock(self, collection_name: str) -> asyncio.Lock:
+        # NOTE: locks are only held while in use, so idle ones are dropped.
+        lock = self._dedup_locks.get(collection_name)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._dedup_locks[collection_name] = lock
+
+        return lock
+
+    def _get_tenant_field(self) -> str:
+        return f"metadata.{self.tenant_key}"
+
+    def _check_tenant(self, tenant_id: str | None) -> None:
+        if self.tenant_key is None:
+            assert tenant_id is None, "tenant_id requires a tenant_key."
+        else:
+            assert tenant_id is not None, "tenant_id is required."
+
+    def _get_tenant_filter(
+        self,
+        tenant_id: str | None,
+        payload_filter: models.Filter | None = None,
+    ) -> models.Filter | None:
+        self._check_tenant(tenant_id)
+        if tenant_id is None:
+            return payload_filter
+
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=self._get_tenant_field(),
+                    match=models.MatchValue(value=tenant_id),
+                ),
+                *([payload_filter] if payload_filter is not None else []),
+            ]
         )
 
-    @lru_cache()
-    def _get_sparse_vector_store(
+    async def _get_shard_key_selector(
         self,
         collection_name: str,
-    ) -> QdrantVectorStore:
-        return QdrantVectorStore(
-            client=self.qadrant_client,
-            collection_name=collection_name,
-            sparse_embedding=self.sparse_embeddings,
-            retrieval_mode=RetrievalMode.SPARSE,
-            sparse_vector_name="sparse",
+        tenant_id: str | None,
+    ) -> models.ShardKeyWithFallback | None:
+        if tenant_id is None:
+            return None
+
+        sharded = self._tenant_sharding.get(collection_name)
+        if sharded is None:
+            collection_info = await self.qadrant_async_client.get_collection(
+                collection_name=collection_name
+            )
+
+            sharded = (
+                collection_info.config.params.sharding_method
+                == models.ShardingMethod.CUSTOM
+            )
+
+        self._cache_collection_item(
+            self._tenant_sharding,
+            collection_name,
+            sharded,
         )
 
-    async def create_collection(self, collection_name: str) -> None:
-        if await self.qadrant_async_client.collection_exists(
+        # NOTE: tenants without a dedicated shard key are served from the
+        # shared fallback shard.
+        if not sharded:
+            return None
+
+        return models.ShardKeyWithFallback(
+            target=tenant_id,
+            fallback=FALLBACK_SHARD_KEY,
+        )
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        return await self.qadrant_async_client.collection_exists(
             collection_name=collection_name
-        ):
+        )
+
+    @traced("retriever", method="create_collection")
+    async def create_collection(
+        self,
+        collection_name: str,
+        profile: CollectionProfile | None = None,
+    ) -> None:
+        if await self.collection_exists(collection_name=collection_name):
             console.log(
                 f"[bold yellow]WARNING:[/] collection {collection_name} already exists."
             )
 
             return
 
+        profile = profile if profile is not None else CollectionProfile()
+        assert (
+            not profile.tenant_sharding or self.tenant_key is not None
+        ), "tenant_sharding requires a tenant_key."
+
         await self.qadrant_async_client.create_collection(
             collection_name=collection_name,
-            vectors_config={
-                "dense": models.VectorParams(
-                    size=self.dense_embed_dimensions,  # type: ignore
-                    distance=models.Distance.COSINE,
-                )
-            },
-            sparse_vectors_config={
-                "sparse": models.SparseVectorParams(
-                    index=models.SparseIndexParams(on_disk=False)
-                )
-            },
+            vectors_config=profile.get_vectors_config(
+                size=self.dense_embed_dimensions,  # type: ignore
+            ),
+            sparse_vectors_config=profile.get_sparse_vectors_config(),
+            optimizers_config=profile.get_optimizers_config(),
+            on_disk_payload=profile.on_disk_payload,
+            sharding_method=profile.get_sharding_method(),
         )
 
-    async def insert_text_chunks(
-        self,
-        collection_name: str,
-        text_chunks: list[TextChunk],
-        batch_size: int = 256,
-    ) -> None:
-        if not self.qadrant_client.collection_exists(
-            collection_name=collection_name
-        ):
-            console.log(
-                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exists."
+        if profile.tenant_sharding:
+            await self.qadrant_async_client.create_shard_key(
+                collection_name=collection_name,
+                shard_key=FALLBACK_SHARD_KEY,
             )
 
-            return
+        self._forget_collection(collection_name)
+        await self._ensure_payload_index(
+            collection_name=collection_name,
+            field_name="metadata.chunk_id",
+        )
+
+        await self._ensure_tenant_index(collection_name=collection_name)
 
-        vector_store = self._get_hybrid_vector_store(
+        await self._invalidate_results(collection_name=collection_name)
+
+    @traced("retriever", method="delete_collection")
+    async def delete_collection(self, collection_name: str) -> None:
+        await self.qadrant_async_client.delete_collection(
             collection_name=collection_name
         )
 
-        lg_documents = [
-            Document(
-                page_content=tc.text,
-                metadata=tc.metadata,
-            )
-            for tc in text_chunks
-        ]
+        self._forget_collection(collection_name)
+        await self._invalidate_results(collection_name=collection_name)
 
-        uuids = [str(uuid4()) for _ in range(len(lg_documents))]
-        await vector_store.aadd_documents(
-            documents=lg_documents,
-            ids=uuids,
-            batch_size=batch_size,
+    @traced("retriever", method="create_tenant_shard")
+    async def create_tenant_shard(
+        self,
+        collection_name: str,
+        tenant_id: str,
+    ) -> None:
+        # NOTE: once a tenant has its own shard key, its reads and writes no
+        # longer go to the fallback shard, so only tenants without points
+        # can be given one.
+        count_result = await self.qadrant_async_client.count(
+            collection_name=collection_name,
+            count_filter=self._get_tenant_filter(tenant_id),
+            exact=True,
+        )
+
+        assert (
+            count_result.count == 0
+        ), f"tenant {tenant_id} already has points in {collection_name}."
+
+        await self.qadrant_async_client.create_shard_key(
+            collection_name=collection_name,
+            shard_key=tenant_id,
+        )
+
+    async def get_alias_collection(self, alias: str) -> str | None:
+        response = await self.qadrant_async_client.get_aliases()
+        return next(
+            (
+                a.collection_name
+                for a in response.aliases
+                if a.alias_name == alias
+            ),
+            None,
         )
 
-    def _parse_results(
+    @traced("retriever", method="create_shadow_collection")
+    async def create_shadow_collection(
         self,
-        results: list[tuple[Document, float]],
-    ) -> list[RetrieverItem]:
-        return [
-            RetrieverItem(
-                text=document.page_content,
-                metadata=document.metadata,
-                score=score,
-            )
-            for document, score in results
-        ]
+        alias: str,
+        profile: CollectionProfile | None = None,
+    ) -> str:
+        # NOTE: HNSW graph building is disabled (m=0) while the shadow
+        # collection is bulk loaded, so indexing doesn't compete with
+        # serving; 'finalize_shadow_collection' enables it again. With
+        # tenant sharding, the tenant shard keys of the collection behind
+        # the alias are created too, before any point is loaded.
+        profile = profile if profile is not None else CollectionProfile()
+        collection_name = (
+            f"{alias}_{time.strftime('%Y%m%d%H%M%S')}_{uuid4().hex[:8]}"
+        )
 
-    async def dense_search(
+        await self.create_collection(
+            collection_name=collection_name,
+            profile=profile.model_copy(update={"hnsw_m": 0}),
+        )
+
+        previous = await self.get_alias_collection(alias=alias)
+        if profile.tenant_sharding and previous is not None:
+            for shard_key in await self._get_shard_keys(previous):
+                if shard_key != FALLBACK_SHARD_KEY:
+                    await self.qadrant_async_client.create_shard_key(
+                        collection_name=collection_name,
+                        shard_key=shard_key,
+                    )
+
+        return collection_name
+
+    async def _get_shard_keys(
         self,
         collection_name: str,
-        query: str,
-        k: int = 10,
-        score_threshold: float | None = None,
-        search_filter: models.Filter | None = None,
-    ) -> list[RetrieverItem]:
-        vector_store = self._get_dense_vector_store(
+    ) -> list[models.ShardKey]:
+        cluster_info = await self.qadrant_async_client.collection_cluster_info(
             collection_name=collection_name
         )
 
-        results = await vector_store.asimilarity_search_with_score(
-            query=query,
-            k=k,
-            score_threshold=score_threshold,
-            filter=search_filter,
+        return list(
+            dict.fromkeys(
+                shard.shard_key
+                for shard in [
+                    *cluster_info.local_shards,
+                    *cluster_info.remote_shards,
+                ]
+                if shard.shard_key is not None
+            )
         )
 
-        return self._parse_results(results=results)
-
-    async def dense_search_batch(
+    @traced("retriever", method="finalize_shadow_collection")
+    async def finalize_shadow_collection(
         self,
         collection_name: str,
-        queries: list[str],
-        k: int = 10,
-        score_threshold: float | None = None,
-        search_filter: models.Filter | None = None,
-    ) -> list[list[RetrieverItem]]:
-        vectors = await self.dense_embeddings.aembed_documents(texts=queries)
-        requests = [
-            models.QueryRequest(
-                query=vector,
-                using="dense",
-                limit=k,
-                filter=search_filter,
-                score_threshold=score_threshold,
-                with_payload=True,
+        profile: CollectionProfile | None = None,
+        timeout: float = 3600.0,
+        poll_interval: float = 1.0,
+        start_timeout: float = 30.0,
+    ) -> None:
+        # NOTE: the collection is still GREEN right after the update, until
+        # the optimizer picks it up. It counts as optimized once GREEN again
+        # after leaving it, or once its dense vectors are indexed or too few
+        # to be indexed ('indexing_threshold'). If it never leaves GREEN
+        # within 'start_timeout' seconds, there is nothing to optimize.
+        profile = profile if profile is not None else CollectionProfile()
+        await self.qadrant_async_client.update_collection(
+            collection_name=collection_name,
+            vectors_config={
+                "dense": models.VectorParamsDiff(
+                    hnsw_config=models.HnswConfigDiff(
+                        m=profile.hnsw_m if profile.hnsw_m is not None else 16,
+                    )
+                )
+            },
+        )
+
+        start = time.monotonic()
+        deadline = start + timeout
+        left_green = False
+        while True:
+            info = await self.qadrant_async_client.get_collection(
+                collection_name=collection_name
             )
-            for vector in vectors
-        ]
 
-        query_responses = await self.qadrant_async_client.query_batch_points(
-            collection_name=collection_name,
-            requests=requests,
+            if info.status != models.CollectionStatus.GREEN:
+                left_green = True
+            elif (
+                left_green
+                or self._is_indexed(info)
+                or time.monotonic() - start > start_timeout
+            ):
+                return
+
+            assert (
+                time.monotonic() < deadline
+            ), f"collection {collection_name} not optimized after {timeout}s."
+
+            await asyncio.sleep(poll_interval)
+
+    def _is_indexed(self, info: models.CollectionInfo) -> bool:
+        num_points = info.points_count or 0
+        dimensions: int = self.dense_embed_dimensions  # type: ignore
+        indexing_threshold = info.config.optimizer_config.indexing_threshold
+
+        # NOTE: sizes assume float32 vectors; a threshold of 0 disables
+        # indexing.
+        vectors_kb = num_points * dimensions * 4 / 1024
+        return (
+            indexing_threshold == 0
+            or vectors_kb < (indexing_threshold or 20_000)
+            or (info.indexed_vectors_count or 0) >= num_points
         )
 
-        retriever_items = [
-            [
-                RetrieverItem(
-                    text=points.payload["page_content"],  # type: ignore
-                    metadata=points.payload["metadata"],  # type: ignore
-                    score=points.score,
+    @traced("retriever", method="swap_alias")
+    async def swap_alias(
+        self,
+        alias: str,
+        collection_name: str,
+        delete_previous: bool = False,
+    ) -> str | None:
+        previous = await self.get_alias_collection(alias=alias)
+
+        # NOTE: Qdrant applies all alias operations of one request
+        # atomically, so searches never see a missing alias.
+        operations: list[models.AliasOperations] = [
+            models.CreateAliasOperation(
+                create_alias=models.CreateAlias(
+                    collection_name=collection_name,
+                    alias_name=alias,
                 )
-                for points in qr.points
-            ]
-            for qr in query_responses
+            )
         ]
 
-        return retriever_items
+        if previous is not None:
+            operations.insert(
+                0,
+                models.DeleteAliasOperation(
+                    delete_alias=models.DeleteAlias(alias_name=alias)
+                ),
+            )
 
-    async def hybrid_search(
+        await self.qadrant_async_client.update_collection_aliases(
+            change_aliases_operations=operations
+        )
+
+        # NOTE: payload indexes and tenant settings cached under the alias
+        # belong to the previous collection.
+        self._forget_collection(alias)
+        await self._invalidate_results(collection_name=alias)
+        if delete_previous and previous not in (None, collection_name):
+            await self.delete_collection(collection_name=previous)  # type: ignore
+
+        return previous
+
+    @traced("retriever", method="reindex")
+    async def reindex(
         self,
-        collection_name: str,
-        query: str,
-        k: int = 10,
-        score_threshold: float | None = None,
-        search_filter: models.Filter | None = None,
-    ) -> list[RetrieverItem]:
-        vector_store = self._get_hybrid_vector_store(
-            collection_name=collection_name
+        alias: str,
+        text_chunks: list[TextChunk],
+        profile: CollectionProfile | None = None,
+        batch_size: int = 256,
+        max_in_flight: int = 4,
+        deduplicate: Literal["exact", "near"] | None = None,
+        delete_previous: bool = True,
+    ) -> InsertStats:
+        collection_name = await self.create_shadow_collection(
+            alias=alias,
+            profile=profile,
         )
 
-        results = await vector_store.asimilarity_search_with_score(
-            query=query,
-            k=k,
-            score_threshold=score_threshold,
-            filter=search_filter,
+        insert_stats = await self.insert_text_chunks(
+            collection_name=collection_name,
+            text_chunks=text_chunks,
+            batch_size=batch_size,
+            skip_existing=False,
+            remove_stale=False,
+            max_in_flight=max_in_flight,
+            deduplicate=deduplicate,
         )
 
-        return self._parse_results(results=results)
+        await self.finalize_shadow_collection(
+            collection_name=collection_name,
+            profile=profile,
+        )
 
-    async def sparse_search(
+        await self.swap_alias(
+            alias=alias,
+            collection_name=collection_name,
+            delete_previous=delete_previous,
+        )
+
+        return insert_stats
+
+    def _get_point_id(
         self,
-        collection_name: str,
-        query: str,
-        k: int = 10,
-        score_threshold: float | None = None,
-        search_filter: models.Filter | None = None,
-    ) -> list[RetrieverItem]:
-        vector_store = self._get_sparse_vector_store(
-            collection_name=collection_name
+        text_chunk: TextChunk,
+        deduplicate: bool = False,
+        source_key: str = "source_path",
+    ) -> str:
+        chunk_id = text_chunk.metadata.get(
+            "chunk_id",
+            xxhash.xxh64(text_chunk.text).hexdigest(),
         )
 
-        results = await vector_store.asimilarity_search_with_score(
-            query=query,
-            k=k,
-            score_threshold=score_threshold,
-            filter=search_filter,
+        if self.tenant_key is not None:
+            # NOTE: tenants never share points, even for identical chunks.
+            chunk_id = f"{text_chunk.metadata[self.tenant_key]}:{chunk_id}"
+
+        if deduplicate:
+            return str(uuid5(NAMESPACE_OID, chunk_id))
+
+        # NOTE: points are keyed on the document's source and position,
+        # not on 'document_id', the hash of the whole document text, so
+        # editing one paragraph keeps the ids of the unchanged chunks.
+        source = text_chunk.metadata.get(source_key)
+        document_key = (
+            f"{source}:{text_chunk.metadata.get('document_index')}"
+            if source is not None
+            else text_chunk.metadata.get("document_id")
         )
 
-        return self._parse_results(results=results)
+        return str(uuid5(NAMESPACE_OID, f"{document_key}:{chunk_id}"))
 
-    async def scroll(
+    async def _get_existing_metadata(
         self,
         collection_name: str,
-        limit: int = 10,
-        scroll_filter: models.Filter | None = None,
-        order_by: models.OrderBy | None = None,
-        offset: PointId | None = None,
-        with_payload: bool = True,
-    ) -> list[models.Record]:
-        results = await self.qadrant_async_client.scroll(
-            collection_name=collection_name,
-            limit=limit,
-            scroll_filter=scroll_filter,
-            order_by=order_by,
-            offset=offset,
-            with_payload=with_payload,
-        )
-
-        if results is None:
-            return []
+        point_ids: list[str],
+        batch_size: int = 1024,
+    ) -> dict[str, dict]:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(
+                    self.qadrant_async_client.retrieve(
+                        collection_name=collection_name,
+                        ids=batch,
+                        with_payload=models.PayloadSelectorInclude(
+                            include=["metadata"]
+                        ),
+                        with_vectors=False,
+                    )
+                )
+                for batch in chunked(point_ids, batch_size)
+            ]
 
-        return results[0]
+        return {
+            str(record.id): record.payload.get("metadata", {})  # type: ignore
+            for t in tasks
+            for record in t.result()
+        }
 
-    async def delete_chunks(
+    async def _set_metadata(
         self,
         collection_name: str,
-        key: str,
-        value: str | int | bool,
+        point_metadata: dict[str, dict],
+        batch_size: int = 1024,
     ) -> None:
-        if not await self.qadrant_async_client.collection_exists(
-            collection_name=collection_name
-        ):
-            console.log(
-                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exist."
+        for batch in chunked(point_metadata.items(), batch_size):
+            await self.qadrant_async_client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=[
+                    models.SetPayloadOperation(
+                        set_payload=models.SetPayload(
+                            payload={"metadata": metadata},
+                            points=[point_id],
+                        )
+                    )
+                    for point_id, metadata in batch
+                ],
             )
 
+    @traced("retriever", method="delete_stale_documents")
+    async def delete_stale_documents(
+        self,
+        collection_name: str,
+        source_document_ids: dict[str, set[str]],
+        source_key: str = "source_path",
+        tenant_id: str | None = None,
+    ) -> None:
+        if not len(source_document_ids):
             return
 
-        delete_filter = models.Filter(
-            must=[
-                models.FieldCondition(
-                    key=key,
-                    match=models.MatchValue(value=value),
+        stale_filter = models.Filter(
+            should=[
+                models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key=f"metadata.{source_key}",
+                            match=models.MatchValue(value=source),
+                        )
+                    ],
+                    must_not=[
+                        models.FieldCondition(
+                            key="metadata.document_id",
+                            match=models.MatchAny(any=sorted(document_ids)),
+                        )
+                    ],
                 )
+                for source, document_ids in source_document_ids.items()
             ]
         )
 
-        await self.qadrant_async_client.delete(
+        # NOTE: stale points are resolved to their document ids first, so
+        # points shared with other documents only lose the stale ids.
+        stale_records = await self._scroll_records(
             collection_name=collection_name,
-            points_selector=models.FilterSelector(filter=delete_filter),
+            scroll_filter=self._get_tenant_filter(tenant_id, stale_filter),
+            with_payload=models.PayloadSelectorInclude(
+                include=["metadata.document_id"]
+            ),
         )
 
-    async def create_payload_index(
+        await self.delete_documents(
+            collection_name=collection_name,
+            document_ids=list(
+                {
+                    record.payload["metadata"]["document_id"]  # type: ignore
+                    for record in stale_records
+                }
+            ),
+            tenant_id=tenant_id,
+        )
+
+    @traced("retriever", method="delete_documents")
+    async def delete_documents(
         self,
         collection_name: str,
-        field_name: str,
-        field_type: models.PayloadSchemaType = models.PayloadSchemaType.KEYWORD,
+        document_ids: list[str],
+        tenant_id: str | None = None,
     ) -> None:
-        if not await self.qadrant_async_client.collection_exists(
-            collection_name=collection_name
-        ):
-            console.log(
-                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exist."
-            )
-
+        if not len(document_ids):
             return
 
-        collection_info = await self.qadrant_async_client.get_collection(
-            collection_name=collection_name
-        )
+        document_ids_match = models.MatchAny(any=sorted(document_ids))
+        shared_records = await self._scroll_records(
+            collection_name=collection_name,
+            scroll_filter=self._get_tenant_filter(
+                tenant_id,
+                models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="metadata.document_ids",
+                            match=document_ids_match,
+                        )
+                    ]
+                ),
+            ),
+            with_payload=models.PayloadSelectorInclude(
+                include=["metadata.document_ids"]
+            ),
+        )
 
-        existing_indexes = set(collection_info.payload_schema.keys())
-        if field_name in existing_indexes:
-            console.log(
-                f"[bold yellow]WARNING:[/] Index on {field_name} already exists in collection '{collection_name}"
+        delete_ids: list[PointId] = []
+        operations: list[models.UpdateOperation] = []
+        for record in shared_records:
+            remaining_ids = [
+                d
+                for d in record.payload["metadata"]["document_ids"]  # type: ignore
+                if d not in document_ids
+            ]
+
+            if not len(remaining_ids):
+                delete_ids.append(record.id)
+                continue
+
+            # NOTE: the rest of the metadata, 'document_id' and the source
+            # included, keeps describing the document the point was first
+            # inserted from. Reassigning only 'document_id' would pair it
+            # with that document's source, so a later stale removal of
+            # that source would delete the remaining document.
+            operations.append(
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(
+                        payload={"document_ids": remaining_ids},
+                        points=[record.id],
+                        key="metadata",
+                    )
+                )
             )
 
-            return
+        delete_filter = models.Filter(
+            should=[
+                models.HasIdCondition(has_id=delete_ids),
+                models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="metadata.document_id",
+                            match=document_ids_match,
+                        ),
+                        models.IsEmptyCondition(
+                            is_empty=models.PayloadField(
+                                key="metadata.document_ids"
+                            )
+                        ),
+                    ]
+                ),
+            ]
+        )
 
-        await self.qadrant_async_client.create_payload_index(
+        operations.append(
+            models.DeleteOperation(
+                delete=models.FilterSelector(
+                    filter=self._get_tenant_filter(tenant_id, delete_filter)  # type: ignore
+                )
+            )
+        )
+
+        await self.qadrant_async_client.batch_update_points(
             collection_name=collection_name,
-            field_name=field_name,
-            field_schema=field_type,
+            update_operations=operations,
         )
 
-    # TODO: score <= 1.0
-    async def dense_search_weighted(
+        await self._invalidate_results(collection_name=collection_name)
+
+    async def delete_stale_chunks(
         self,
         collection_name: str,
-        query: str,
-        weighted_metadata_items: list[WeightedMetadataItem],
-        k: int = 10,
-        pre_k: int = 50,
-        score_threshold: float | None = None,
-        search_filter: models.Filter | None = None,
+        text_chunks: list[TextChunk],
+        source_key: str = "source_path",
+        tenant_id: str | None = None,
+    ) -> None:
+        source_document_ids = defaultdict(set)
+        for tc in text_chunks:
+            source = tc.metadata.get(source_key)
+            document_id = tc.metadata.get("document_id")
+            if source is None or document_id is None:
+                continue
+
+            source_document_ids[source].add(document_id)
+
+        await self.delete_stale_documents(
+            collection_name=collection_name,
+            source_document_ids=source_document_ids,
+            source_key=source_key,
+            tenant_id=tenant_id,
+        )
+
+    async def _get_sparse_vectors(
+        self,
+        texts: list[str],
+    ) -> list[models.SparseVector]:
+        # NOTE: the sparse model is resolved in the worker thread, so its
+        # first load doesn't run on the event loop.
+        sparse_vectors = await asyncio.to_thread(
+            lambda: self.sparse_embeddings.embed_documents(texts=texts)
+        )
+
+        return [
+            models.SparseVector(indices=sv.indices, values=sv.values)
+            for sv in sparse_vectors
+        ]
+
+    async def _get_points(
+        self,
+        point_ids: list[str],
+        text_chunks: list[TextChunk],
+    ) -> list[models.PointStruct]:
+        texts = [tc.text for tc in text_chunks]
+        dense_vectors, sparse_vectors = await asyncio.gather(
+            self.dense_embeddings.aembed_documents(texts=texts),
+            self._get_sparse_vectors(texts=texts),
+        )
+
+        return [
+            models.PointStruct(
+                id=point_id,
+                vector={"dense": dense_vector, "sparse": sparse_vector},
+                payload={"page_content": tc.text, "metadata": tc.metadata},
+            )
+            for point_id, tc, dense_vector, sparse_vector in zip(
+                point_ids,
+                text_chunks,
+                dense_vectors,
+                sparse_vectors,
+            )
+        ]
+
+    async def _upsert_batch(
+        self,
+        collection_name: str,
+        point_ids: list[str],
+        text_chunks: list[TextChunk],
+        semaphore: asyncio.Semaphore,
+        wait: bool = False,
+        shard_key_selector: models.ShardKeyWithFallback | None = None,
+    ) -> None:
+        async with semaphore:
+            points = await self._get_points(
+                point_ids=point_ids,
+                text_chunks=text_chunks,
+            )
+
+            with telemetry.span("qdrant", operation="upsert") as span:
+                await self.qadrant_async_client.upsert(
+                    collection_name=collection_name,
+                    points=points,
+                    wait=wait,
+                    shard_key_selector=shard_key_selector,
+                )
+
+                span.set("points", len(points))
+
+    async def _scroll_records(
+        self,
+        collection_name: str,
+        scroll_filter: models.Filter | None,
+        with_payload: models.PayloadSelector | bool = True,
+        batch_size: int = 1024,
+    ) -> list[models.Record]:
+        records: list[models.Record] = []
+        async with aclosing(
+            self._scan_range(
+                collection_name=collection_name,
+                batch_size=batch_size,
+                scroll_filter=scroll_filter,
+                with_payload=with_payload,
+                with_vectors=False,
+            )
+        ) as pages:
+            async for page in pages:
+                records.extend(page)
+
+        return records
+
+    def _merge_near_duplicates(
+        self,
+        groups: dict[str, tuple[TextChunk, list[str]]],
+        shingles: dict[str, set[str]],
+        band_keys: dict[str, list[str]],
+        threshold: float,
+    ) -> int:
+        num_duplicates = 0
+        band_owners: dict[str, str] = {}
+        for point_id in list(groups):
+            canonical_id = next(
+                (
+                    band_owners[key]
+                    for key in band_keys[point_id]
+                    if key in band_owners
+                    and self.min_hasher.jaccard(
+                        shingles[point_id],
+                        shingles[band_owners[key]],
+                    )
+                    >= threshold
+                ),
+                None,
+            )
+
+            if canonical_id is None:
+                for key in band_keys[point_id]:
+                    band_owners.setdefault(key, point_id)
+
+                continue
+
+            _, document_ids = groups.pop(point_id)
+            canonical_document_ids = groups[canonical_id][1]
+            canonical_document_ids.extend(
+                d for d in document_ids if d not in canonical_document_ids
+            )
+
+            num_duplicates += 1
+
+        return num_duplicates
+
+    async def _get_near_duplicate_ids(
+        self,
+        collection_name: str,
+        shingles: dict[str, set[str]],
+        band_keys: dict[str, list[str]],
+        threshold: float,
+        tenant_id: str | None = None,
+    ) -> tuple[dict[str, str], dict[str, list[str]]]:
+        all_band_keys = sorted(
+            {k for keys in band_keys.values() for k in keys}
+        )
+        if not len(all_band_keys):
+            return {}, {}
+
+        candidates = await self._scroll_records(
+            collection_name=collection_name,
+            scroll_filter=self._get_tenant_filter(
+                tenant_id,
+                models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="metadata.minhash_bands",
+                            match=models.MatchAny(any=all_band_keys),
+                        )
+                    ]
+                ),
+            ),
+            with_payload=models.PayloadSelectorInclude(
+                include=[
+                    "page_content",
+                    "metadata.document_ids",
+                    "metadata.minhash_bands",
+                ]
+            ),
+        )
+
+        band_candidates = defaultdict(list)
+        for record in candidates:
+            for key in record.payload["metadata"]["minhash_bands"]:  # type: ignore
+                band_candidates[key].append(record)
+
+        duplicate_ids: dict[str, str] = {}
+        candidate_document_ids: dict[str, list[str]] = {}
+        candidate_shingles: dict[str, set[str]] = {}
+        for point_id, keys in band_keys.items():
+            for record in (r for key in keys for r in band_candidates[key]):
+                candidate_id = str(record.id)
+                if candidate_id not in candidate_shingles:
+                    candidate_shingles[
+                        candidate_id
+                    ] = self.min_hasher.get_shingles(
+                        record.payload["page_content"]  # type: ignore
+                    )
+
+                if (
+                    self.min_hasher.jaccard(
+                        shingles[point_id],
+                        candidate_shingles[candidate_id],
+                    )
+                    >= threshold
+                ):
+                    duplicate_ids[point_id] = candidate_id
+                    candidate_document_ids[candidate_id] = record.payload[  # type: ignore
+                        "metadata"
+                    ][
+                        "document_ids"
+                    ]
+
+                    break
+
+        return duplicate_ids, candidate_document_ids
+
+    async def _deduplicate_chunks(
+        self,
+        collection_name: str,
+        text_chunks: list[TextChunk],
+        near: bool,
+        threshold: float,
+        tenant_id: str | None = None,
+    ) -> tuple[dict[str, TextChunk], int]:
+        # NOTE: deduplicated points are keyed by chunk_id alone and keep the
+        # metadata of the first document they were seen in, plus the list
+        # of all documents containing them in 'metadata.document_ids'.
+        groups: dict[str, tuple[TextChunk, list[str]]] = {}
+        for tc in text_chunks:
+            point_id = self._get_point_id(tc, deduplicate=True)
+            _, document_ids = groups.setdefault(point_id, (tc, []))
+
+            document_id = tc.metadata.get("document_id")
+            if document_id is not None and document_id not in document_ids:
+                document_ids.append(document_id)
+
+        num_duplicates = len(text_chunks) - len(groups)
+
+        shingles: dict[str, set[str]] = {}
+        band_keys: dict[str, list[str]] = {}
+        if near:
+            for point_id, (tc, _) in groups.items():
+                shingles[point_id] = self.min_hasher.get_shingles(tc.text)
+                band_keys[point_id] = self.min_hasher.get_band_keys(
+                    self.min_hasher.get_signature(shingles[point_id])
+                )
+
+            num_duplicates += self._merge_near_duplicates(
+                groups=groups,
+                shingles=shingles,
+                band_keys=band_keys,
+                threshold=threshold,
+            )
+
+        existing_document_ids: dict[str, list[str]] = {}
+        for batch in chunked(groups, 1024):
+            records = await self.qadrant_async_client.retrieve(
+                collection_name=collection_name,
+                ids=batch,
+                with_payload=models.PayloadSelectorInclude(
+                    include=["metadata.document_ids"]
+                ),
+                with_vectors=False,
+            )
+
+            for record in records:
+                existing_document_ids[str(record.id)] = record.payload[  # type: ignore
+                    "metadata"
+                ].get(
+                    "document_ids", []
+                )
+
+        duplicate_ids = {
+            point_id: point_id for point_id in existing_document_ids
+        }
+        if near:
+            (
+                near_duplicate_ids,
+                candidate_document_ids,
+            ) = await self._get_near_duplicate_ids(
+                collection_name=collection_name,
+                shingles=shingles,
+                band_keys={
+                    point_id: keys
+                    for point_id, keys in band_keys.items()
+                    if point_id in groups
+                    and point_id not in existing_document_ids
+                },
+                threshold=threshold,
+                tenant_id=tenant_id,
+            )
+
+            duplicate_ids |= near_duplicate_ids
+            existing_document_ids |= candidate_document_ids
+            num_duplicates += len(near_duplicate_ids)
+
+        merged_document_ids: dict[str, list[str]] = {}
+        for point_id, existing_id in duplicate_ids.items():
+            _, document_ids = groups.pop(point_id)
+            merged = merged_document_ids.setdefault(
+                existing_id, list(existing_document_ids[existing_id])
+            )
+
+            merged.extend(d for d in document_ids if d not in merged)
+
+        operations = [
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={"document_ids": document_ids},
+                    points=[point_id],
+                    key="metadata",
+                )
+            )
+            for point_id, document_ids in merged_document_ids.items()
+            if document_ids != existing_document_ids[point_id]
+        ]
+
+        if len(operations):
+            await self.qadrant_async_client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=operations,
+            )
+
+        id_chunks = {
+            point_id: tc.model_copy(
+                update={
+                    "metadata": tc.metadata
+                    | {"document_ids": document_ids}
+                    | ({"minhash_bands": band_keys[point_id]} if near else {})
+                }
+            )
+            for point_id, (tc, document_ids) in groups.items()
+        }
+
+        return id_chunks, num_duplicates
+
+    def _set_tenant(
+        self,
+        text_chunks: list[TextChunk],
+        tenant_id: str | None,
+    ) -> list[TextChunk]:
+        self._check_tenant(tenant_id)
+        if tenant_id is None:
+            return text_chunks
+
+        return [
+            tc.model_copy(
+                update={"metadata": tc.metadata | {self.tenant_key: tenant_id}}
+            )
+            for tc in text_chunks
+        ]
+
+    async def _insert_per_tenant(
+        self,
+        text_chunks: list[TextChunk],
+        **kwargs: Any,
+    ) -> InsertStats:
+        # NOTE: chunks carrying their tenant in their metadata are inserted
+        # one tenant at a time.
+        tenant_chunks: defaultdict[str, list[TextChunk]] = defaultdict(list)
+        for tc in text_chunks:
+            assert (
+                self.tenant_key in tc.metadata
+            ), f"Expected '{self.tenant_key}' in the chunk metadata."
+
+            tenant_chunks[tc.metadata[self.tenant_key]].append(tc)
+
+        tenant_stats = [
+            await self.insert_text_chunks(
+                text_chunks=chunks,
+                tenant_id=tenant_id,
+                **kwargs,
+            )
+            for tenant_id, chunks in tenant_chunks.items()
+        ]
+
+        elapsed = sum(stats.elapsed for stats in tenant_stats)
+        num_points = sum(stats.num_points for stats in tenant_stats)
+        return InsertStats(
+            num_points=num_points,
+            num_duplicates=sum(stats.num_duplicates for stats in tenant_stats),
+            elapsed=elapsed,
+            points_per_second=num_points / elapsed if elapsed else 0.0,
+        )
+
+    @traced("retriever", method="insert_text_chunks")
+    async def insert_text_chunks(
+        self,
+        collection_name: str,
+        text_chunks: list[TextChunk],
+        batch_size: int = 256,
+        skip_existing: bool = True,
+        remove_stale: bool = True,
+        source_key: str = "source_path",
+        max_in_flight: int = 4,
+        deduplicate: Literal["exact", "near"] | None = None,
+        near_duplicate_threshold: float = 0.85,
+        tenant_id: str | None = None,
+    ) -> InsertStats:
+        if not await self.qadrant_async_client.collection_exists(
+            collection_name=collection_name
+        ):
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exists."
+            )
+
+            return InsertStats()
+
+        if self.tenant_key is not None and tenant_id is None:
+            return await self._insert_per_tenant(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                batch_size=batch_size,
+                skip_existing=skip_existing,
+                remove_stale=remove_stale,
+                source_key=source_key,
+                max_in_flight=max_in_flight,
+                deduplicate=deduplicate,
+                near_duplicate_threshold=near_duplicate_threshold,
+            )
+
+        text_chunks = self._set_tenant(text_chunks, tenant_id=tenant_id)
+        if tenant_id is not None:
+            await self._ensure_tenant_index(collection_name=collection_name)
+
+        if deduplicate is None:
+            return await self._insert_text_chunks(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                batch_size=batch_size,
+                skip_existing=skip_existing,
+                remove_stale=remove_stale,
+                source_key=source_key,
+                max_in_flight=max_in_flight,
+                tenant_id=tenant_id,
+            )
+
+        for field_name in ("metadata.document_ids", "metadata.minhash_bands"):
+            await self._ensure_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+            )
+
+        # NOTE: the lookup of existing points and the upsert of new ones
+        # must not interleave with another deduplicating insert, otherwise
+        # both could create the same point and lose document ids.
+        async with self._get_dedup_lock(collection_name):
+            return await self._insert_text_chunks(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                batch_size=batch_size,
+                skip_existing=True,
+                remove_stale=remove_stale,
+                source_key=source_key,
+                max_in_flight=max_in_flight,
+                deduplicate=deduplicate,
+                near_duplicate_threshold=near_duplicate_threshold,
+                tenant_id=tenant_id,
+            )
+
+    async def _insert_text_chunks(
+        self,
+        collection_name: str,
+        text_chunks: list[TextChunk],
+        batch_size: int,
+        skip_existing: bool,
+        remove_stale: bool,
+        source_key: str,
+        max_in_flight: int,
+        deduplicate: Literal["exact", "near"] | None = None,
+        near_duplicate_threshold: float = 0.85,
+        tenant_id: str | None = None,
+    ) -> InsertStats:
+        start = time.perf_counter()
+        num_duplicates = 0
+
+        if deduplicate is not None:
+            id_chunks, num_duplicates = await self._deduplicate_chunks(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                near=deduplicate == "near",
+                threshold=near_duplicate_threshold,
+                tenant_id=tenant_id,
+            )
+
+        else:
+            # NOTE: point ids are derived from the source + chunk_id, so
+            # re-ingesting unchanged chunks maps onto the same points.
+            id_chunks = {
+                self._get_point_id(tc, source_key=source_key): tc
+                for tc in text_chunks
+            }
+
+        num_updated = 0
+        if skip_existing and deduplicate is None:
+            existing_metadata = await self._get_existing_metadata(
+                collection_name=collection_name,
+                point_ids=list(id_chunks),
+            )
+
+            # NOTE: existing points already hold the chunk text and its
+            # vectors, only their metadata ('document_id', neighbours) is
+            # refreshed, so stale removal and expand_context keep working.
+            updated_metadata = {
+                point_id: tc.metadata
+                for point_id, tc in id_chunks.items()
+                if point_id in existing_metadata
+                and existing_metadata[point_id] != tc.metadata
+            }
+
+            await self._set_metadata(
+                collection_name=collection_name,
+                point_metadata=updated_metadata,
+            )
+
+            num_updated = len(updated_metadata)
+            id_chunks = {
+                point_id: tc
+                for point_id, tc in id_chunks.items()
+                if point_id not in existing_metadata
+            }
+
+        batches = list(chunked(id_chunks.items(), batch_size))
+        semaphore = asyncio.Semaphore(max_in_flight)
+        shard_key_selector = await self._get_shard_key_selector(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+        )
+
+        # NOTE: batches are embedded and uploaded concurrently without
+        # waiting for them to be applied; the last batch is sent with
+        # wait=True once all others were accepted, as a consistency barrier.
+        async with asyncio.TaskGroup() as tg:
+            for batch in batches[:-1]:
+                tg.create_task(
+                    self._upsert_batch(
+                        collection_name=collection_name,
+                        point_ids=[point_id for point_id, _ in batch],
+                        text_chunks=[tc for _, tc in batch],
+                        semaphore=semaphore,
+                        shard_key_selector=shard_key_selector,
+                    )
+                )
+
+        if len(batches):
+            await self._upsert_batch(
+                collection_name=collection_name,
+                point_ids=[point_id for point_id, _ in batches[-1]],
+                text_chunks=[tc for _, tc in batches[-1]],
+                semaphore=semaphore,
+                wait=True,
+                shard_key_selector=shard_key_selector,
+            )
+
+        if remove_stale:
+            await self.delete_stale_chunks(
+                collection_name=collection_name,
+                text_chunks=text_chunks,
+                source_key=source_key,
+                tenant_id=tenant_id,
+            )
+
+        if len(batches) or num_duplicates or num_updated:
+            await self._invalidate_results(collection_name=collection_name)
+
+        elapsed = time.perf_counter() - start
+        return InsertStats(
+            num_points=len(id_chunks),
+            num_duplicates=num_duplicates,
+            elapsed=elapsed,
+            points_per_second=len(id_chunks) / elapsed if elapsed else 0.0,
+        )
+
+    def _parse_points(
+        self,
+        points: list[models.ScoredPoint],
     ) -> list[RetrieverItem]:
-        vector = await self.dense_embeddings.aembed_query(text=query)
+        return [
+            RetrieverItem(
+                text=p.payload["page_content"],  # type: ignore
+                metadata=p.payload["metadata"],  # type: ignore
+                score=p.score,
+            )
+            for p in points
+        ]
+
+    async def _get_sparse_query_vectors(
+        self,
+        queries: list[str],
+    ) -> list[models.SparseVector]:
+        sparse_vectors = await asyncio.to_thread(
+            lambda: [self.sparse_embeddings.embed_query(q) for q in queries]
+        )
+
+        return [
+            models.SparseVector(indices=sv.indices, values=sv.values)
+            for sv in sparse_vectors
+        ]
+
+    async def _get_sparse_vector(self, query: str) -> models.SparseVector:
+        (sparse_vector,) = await self._get_sparse_query_vectors(
+            queries=[query]
+        )
+        return sparse_vector
+
+    def _get_dense_request(
+        self,
+        vector: list[float],
+        k: int,
+        score_threshold: float | None,
+        search_filter: models.Filter | None,
+        search_params: models.SearchParams | None,
+    ) -> models.QueryRequest:
+        return models.QueryRequest(
+            query=vector,
+            using="dense",
+            limit=k,
+            filter=search_filter,
+            params=search_params,
+            score_threshold=score_threshold,
+            with_payload=True,
+        )
+
+    def _get_sparse_request(
+        self,
+        sparse_vector: models.SparseVector,
+        k: int,
+        score_threshold: float | None,
+        search_filter: models.Filter | None,
+        search_params: models.SearchParams | None,
+    ) -> models.QueryRequest:
+        return models.QueryRequest(
+            query=sparse_vector,
+            using="sparse",
+            limit=k,
+            filter=search_filter,
+            params=search_params,
+            score_threshold=score_threshold,
+            with_payload=True,
+        )
+
+    def _get_hybrid_request(
+        self,
+        dense_vector: list[float],
+        sparse_vector: models.SparseVector,
+        k: int,
+        score_threshold: float | None,
+        search_filter: models.Filter | None,
+        search_params: models.SearchParams | None,
+        fusion: models.Fusion,
+        prefetch_k: int | None,
+    ) -> models.QueryRequest:
+        prefetch_limit = prefetch_k if prefetch_k is not None else k
+        return models.QueryRequest(
+            prefetch=[
+                models.Prefetch(
+                    query=dense_vector,
+                    using="dense",
+                    limit=prefetch_limit,
+                    filter=search_filter,
+                    params=search_params,
+                ),
+                models.Prefetch(
+                    query=sparse_vector,
+                    using="sparse",
+                    limit=prefetch_limit,
+                    filter=search_filter,
+                    params=search_params,
+                ),
+            ],
+            query=models.FusionQuery(fusion=fusion),
+            limit=k,
+            filter=search_filter,
+            score_threshold=score_threshold,
+            with_payload=True,
+        )
+
+    def _get_weighted_request(
+        self,
+        vector: list[float],
+        weighted_metadata_items: list[WeightedMetadataItem],
+        k: int,
+        pre_k: int,
+        score_threshold: float | None,
+        search_filter: models.Filter | None,
+        search_params: models.SearchParams | None,
+    ) -> models.QueryRequest:
         mult_expressions = [
             models.MultExpression(
                 mult=[
@@ -434,13 +1614,13 @@ class Retriever:
             ]
         )
 
-        response = await self.qadrant_async_client.query_points(
-            collection_name=collection_name,
+        return models.QueryRequest(
             prefetch=models.Prefetch(
                 query=vector,
                 using="dense",
                 limit=pre_k,
                 filter=search_filter,
+                params=search_params,
             ),
             query=models.FormulaQuery(formula=formula),
             limit=k,
@@ -448,11 +1628,885 @@ class Retriever:
             with_payload=True,
         )
 
-        return [
-            RetrieverItem(
-                text=p.payload["page_content"],  # type: ignore
-                metadata=p.payload["metadata"],  # type: ignore
-                score=p.score,
+    def _get_tenant_request(
+        self,
+        request: models.QueryRequest,
+        tenant_id: str,
+        shard_key: models.ShardKeyWithFallback | None,
+    ) -> models.QueryRequest:
+        # NOTE: prefetches are scoped too, so fused and rescored queries
+        # only ever see the tenant's candidates.
+        prefetch = request.prefetch
+        if isinstance(prefetch, models.Prefetch):
+            prefetch = prefetch.model_copy(
+                update={
+                    "filter": self._get_tenant_filter(
+                        tenant_id, prefetch.filter
+                    )
+                }
             )
-            for p in response.points
-        ]
+        elif prefetch is not None:
+            prefetch = [
+                p.model_copy(
+                    update={
+                        "filter": self._get_tenant_filter(tenant_id, p.filter)
+                    }
+                )
+                for p in prefetch
+            ]
+
+        return request.model_copy(
+            update={
+                "filter": self._get_tenant_filter(tenant_id, request.filter),
+                "prefetch": prefetch,
+                "shard_key": shard_key,
+            }
+        )
+
+    async def _query_batch(
+        self,
+        collection_name: str,
+        requests: list[models.QueryRequest],
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        self._check_tenant(tenant_id)
+        if tenant_id is not None:
+            shard_key = await self._get_shard_key_selector(
+                collection_name=collection_name,
+                tenant_id=tenant_id,
+            )
+
+            requests = [
+                self._get_tenant_request(
+                    request=request,
+                    tenant_id=tenant_id,
+                    shard_key=shard_key,
+                )
+                for request in requests
+            ]
+
+        with telemetry.span("qdrant", operation="query_batch") as span:
+            query_responses = (
+                await self.qadrant_async_client.query_batch_points(
+                    collection_name=collection_name,
+                    requests=requests,
+                )
+            )
+
+            span.set("requests", len(requests))
+
+        return [self._parse_points(points=qr.points) for qr in query_responses]
+
+    @traced("retriever", method="dense_search")
+    @reranked
+    @cached_search(mode="dense")
+    async def dense_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        vector = await self.dense_embeddings.aembed_query(text=query)
+        (retriever_items,) = await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_dense_request(
+                    vector=vector,
+                    k=k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                )
+            ],
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="dense_search_batch")
+    @reranked
+    async def dense_search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        vectors = await aembed_queries(self.dense_embeddings, queries)
+        return await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_dense_request(
+                    vector=vector,
+                    k=k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                )
+                for vector in vectors
+            ],
+        )
+
+    @traced("retriever", method="hybrid_search")
+    @reranked
+    @cached_search(mode="hybrid")
+    async def hybrid_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        fusion: models.Fusion = models.Fusion.RRF,
+        prefetch_k: int | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        dense_vector, sparse_vector = await asyncio.gather(
+            self.dense_embeddings.aembed_query(text=query),
+            self._get_sparse_vector(query=query),
+        )
+
+        (retriever_items,) = await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_hybrid_request(
+                    dense_vector=dense_vector,
+                    sparse_vector=sparse_vector,
+                    k=k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                    fusion=fusion,
+                    prefetch_k=prefetch_k,
+                )
+            ],
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="hybrid_search_batch")
+    @reranked
+    async def hybrid_search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        fusion: models.Fusion = models.Fusion.RRF,
+        prefetch_k: int | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        dense_vectors, sparse_vectors = await asyncio.gather(
+            aembed_queries(self.dense_embeddings, queries),
+            self._get_sparse_query_vectors(queries=queries),
+        )
+
+        return await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_hybrid_request(
+                    dense_vector=dense_vector,
+                    sparse_vector=sparse_vector,
+                    k=k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                    fusion=fusion,
+                    prefetch_k=prefetch_k,
+                )
+                for dense_vector, sparse_vector in zip(
+                    dense_vectors,
+                    sparse_vectors,
+                )
+            ],
+        )
+
+    @traced("retriever", method="sparse_search")
+    @reranked
+    @cached_search(mode="sparse")
+    async def sparse_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        sparse_vector = await self._get_sparse_vector(query=query)
+        (retriever_items,) = await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_sparse_request(
+                    sparse_vector=sparse_vector,
+                    k=k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                )
+            ],
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="sparse_search_batch")
+    @reranked
+    async def sparse_search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        k: int = 10,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        sparse_vectors = await self._get_sparse_query_vectors(queries=queries)
+        return await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_sparse_request(
+                    sparse_vector=sparse_vector,
+                    k=k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                )
+                for sparse_vector in sparse_vectors
+            ],
+        )
+
+    @traced("retriever", method="scroll")
+    async def scroll(
+        self,
+        collection_name: str,
+        limit: int = 10,
+        scroll_filter: models.Filter | None = None,
+        order_by: models.OrderBy | None = None,
+        offset: PointId | None = None,
+        with_payload: bool = True,
+        tenant_id: str | None = None,
+    ) -> list[models.Record]:
+        results = await self.qadrant_async_client.scroll(
+            collection_name=collection_name,
+            limit=limit,
+            scroll_filter=self._get_tenant_filter(tenant_id, scroll_filter),
+            order_by=order_by,
+            offset=offset,
+            with_payload=with_payload,
+            shard_key_selector=await self._get_shard_key_selector(
+                collection_name=collection_name,
+                tenant_id=tenant_id,
+            ),
+        )
+
+        if results is None:
+            return []
+
+        return results[0]
+
+    async def _scroll_page(
+        self,
+        collection_name: str,
+        limit: int,
+        offset: PointId | None,
+        scroll_filter: models.Filter | None,
+        with_payload: models.PayloadSelector | bool | list[str],
+        with_vectors: bool | list[str],
+        tenant_id: str | None = None,
+    ) -> tuple[list[models.Record], PointId | None]:
+        return await self.qadrant_async_client.scroll(
+            collection_name=collection_name,
+            limit=limit,
+            offset=offset,
+            scroll_filter=scroll_filter,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+            shard_key_selector=await self._get_shard_key_selector(
+                collection_name=collection_name,
+                tenant_id=tenant_id,
+            ),
+        )
+
+    async def _scan_range(
+        self,
+        collection_name: str,
+        batch_size: int,
+        scroll_filter: models.Filter | None,
+        with_payload: models.PayloadSelector | bool | list[str],
+        with_vectors: bool | list[str],
+        start: str | None = None,
+        stop: str | None = None,
+        tenant_id: str | None = None,
+    ) -> AsyncIterator[list[models.Record]]:
+        # NOTE: the next page is requested before the current one is
+        # yielded, so it loads while the caller processes the current one.
+        def get_page(offset: PointId | None) -> asyncio.Future:
+            return asyncio.ensure_future(
+                self._scroll_page(
+                    collection_name=collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    scroll_filter=scroll_filter,
+                    with_payload=with_payload,
+                    with_vectors=with_vectors,
+                    tenant_id=tenant_id,
+                )
+            )
+
+        next_page: asyncio.Future | None = get_page(start)
+        try:
+            while next_page is not None:
+                records, offset = await next_page
+                if stop is not None:
+                    records = [r for r in records if str(r.id) < stop]
+                    if offset is not None and str(offset) >= stop:
+                        offset = None
+
+                next_page = get_page(offset) if offset is not None else None
+                if len(records):
+                    yield records
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    def _get_id_ranges(
+        self,
+        num_partitions: int,
+    ) -> list[tuple[str | None, str | None]]:
+        # NOTE: point ids are UUIDs, which Qdrant orders by their 128-bit
+        # value, the same order as their canonical strings.
+        bounds = [
+            str(UUID(int=idx * 2**128 // num_partitions))
+            for idx in range(1, num_partitions)
+        ]
+
+        return list(zip([None, *bounds], [*bounds, None]))
+
+    async def scan(
+        self,
+        collection_name: str,
+        batch_size: int = 256,
+        scroll_filter: models.Filter | None = None,
+        with_payload: bool | list[str] = True,
+        with_vectors: bool | list[str] = False,
+        num_partitions: int = 1,
+        tenant_id: str | None = None,
+    ) -> AsyncIterator[list[models.Record]]:
+        assert batch_size > 0, "batch_size must be positive."
+        assert num_partitions > 0, "num_partitions must be positive."
+
+        scan_kwargs = {
+            "collection_name": collection_name,
+            "batch_size": batch_size,
+            "scroll_filter": self._get_tenant_filter(tenant_id, scroll_filter),
+            "with_payload": with_payload,
+            "with_vectors": with_vectors,
+            "tenant_id": tenant_id,
+        }
+
+        if num_partitions == 1:
+            async with aclosing(self._scan_range(**scan_kwargs)) as pages:
+                async for page in pages:
+                    yield page
+
+            return
+
+        # NOTE: id ranges are scanned concurrently and pages are yielded as
+        # they arrive, so they are not in id order. The queue holds at most
+        # one page per range, which bounds memory.
+        queue: asyncio.Queue[list[models.Record] | Exception | None] = (
+            asyncio.Queue(maxsize=num_partitions)
+        )
+
+        async def scan_range(start: str | None, stop: str | None) -> None:
+            try:
+                async with aclosing(
+                    self._scan_range(**scan_kwargs, start=start, stop=stop)
+                ) as pages:
+                    async for page in pages:
+                        await queue.put(page)
+
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        tasks = [
+            asyncio.create_task(scan_range(start=start, stop=stop))
+            for start, stop in self._get_id_ranges(num_partitions)
+        ]
+
+        try:
+            num_done = 0
+            while num_done < num_partitions:
+                item = await queue.get()
+                if item is None:
+                    num_done += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for t in tasks:
+                t.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @traced("retriever", method="delete_chunks")
+    async def delete_chunks(
+        self,
+        collection_name: str,
+        key: str,
+        value: str | int | bool | list[str] | list[int],
+        tenant_id: str | None = None,
+    ) -> None:
+        if not await self.qadrant_async_client.collection_exists(
+            collection_name=collection_name
+        ):
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exist."
+            )
+
+            return
+
+        # NOTE: deduplicated points are shared by documents, so deletes by
+        # document only remove a point once no document owns it anymore.
+        if key in ("metadata.document_id", "metadata.document_ids"):
+            await self.delete_documents(
+                collection_name=collection_name,
+                document_ids=value if isinstance(value, list) else [value],  # type: ignore
+                tenant_id=tenant_id,
+            )
+
+            return
+
+        delete_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=key,
+                    match=(
+                        models.MatchAny(any=value)
+                        if isinstance(value, list)
+                        else models.MatchValue(value=value)
+                    ),
+                )
+            ]
+        )
+
+        await self.qadrant_async_client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(
+                filter=self._get_tenant_filter(tenant_id, delete_filter),  # type: ignore
+            ),
+        )
+
+        await self._invalidate_results(collection_name=collection_name)
+
+    async def create_payload_index(
+        self,
+        collection_name: str,
+        field_name: str,
+        field_type: models.PayloadSchemaType = models.PayloadSchemaType.KEYWORD,
+    ) -> None:
+        if not await self.qadrant_async_client.collection_exists(
+            collection_name=collection_name
+        ):
+            console.log(
+                f"[bold yellow]WARNING:[/] collection {collection_name} doesn't exist."
+            )
+
+            return
+
+        collection_info = await self.qadrant_async_client.get_collection(
+            collection_name=collection_name
+        )
+
+        existing_indexes = set(collection_info.payload_schema.keys())
+        if field_name in existing_indexes:
+            console.log(
+                f"[bold yellow]WARNING:[/] Index on {field_name} already exists in collection '{collection_name}"
+            )
+
+            return
+
+        await self.qadrant_async_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=field_type,
+        )
+
+    async def _ensure_payload_index(
+        self,
+        collection_name: str,
+        field_name: str,
+        field_type: (
+            models.PayloadSchemaType | models.PayloadSchemaParams
+        ) = models.PayloadSchemaType.KEYWORD,
+    ) -> None:
+        if (collection_name, field_name) in self._payload_indexes:
+            self._payload_indexes.move_to_end((collection_name, field_name))
+            return
+
+        collection_info = await self.qadrant_async_client.get_collection(
+            collection_name=collection_name
+        )
+
+        if field_name not in collection_info.payload_schema:
+            await self.qadrant_async_client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_type,
+            )
+
+        self._cache_collection_item(
+            self._payload_indexes,
+            (collection_name, field_name),
+            None,
+        )
+
+    async def _ensure_tenant_index(self, collection_name: str) -> None:
+        # NOTE: a tenant index makes Qdrant group each tenant's points
+        # together on disk and build per tenant HNSW links.
+        if self.tenant_key is None:
+            return
+
+        await self._ensure_payload_index(
+            collection_name=collection_name,
+            field_name=self._get_tenant_field(),
+            field_type=models.KeywordIndexParams(
+                type=models.KeywordIndexType.KEYWORD,
+                is_tenant=True,
+            ),
+        )
+
+    async def _get_chunks(
+        self,
+        collection_name: str,
+        chunk_keys: set[tuple[str, str]],
+        tenant_id: str | None = None,
+    ) -> dict[tuple[str, str], tuple[str, dict]]:
+        chunks = {}
+        for chunk_key in chunk_keys:
+            cache_key = (collection_name, tenant_id, chunk_key)
+            cached_chunk = self.neighbor_cache.get(cache_key)
+            if cached_chunk is not None:
+                self.neighbor_cache.move_to_end(cache_key)
+                chunks[chunk_key] = cached_chunk
+
+        missing_keys = chunk_keys - chunks.keys()
+        if not len(missing_keys):
+            return chunks
+
+        scroll_filter = self._get_tenant_filter(
+            tenant_id,
+            models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="metadata.chunk_id",
+                        match=models.MatchAny(
+                            any=sorted({cid for _, cid in missing_keys})
+                        ),
+                    ),
+                    models.FieldCondition(
+                        key="metadata.document_id",
+                        match=models.MatchAny(
+                            any=sorted({did for did, _ in missing_keys})
+                        ),
+                    ),
+                ]
+            ),
+        )
+
+        offset = None
+        while True:
+            records, offset = await self._scroll_page(
+                collection_name=collection_name,
+                limit=max(len(missing_keys), 64),
+                offset=offset,
+                scroll_filter=scroll_filter,
+                with_payload=True,
+                with_vectors=False,
+                tenant_id=tenant_id,
+            )
+
+            for record in records:
+                metadata = record.payload["metadata"]  # type: ignore
+                chunk_key = (metadata["document_id"], metadata["chunk_id"])
+                if chunk_key not in missing_keys:
+                    continue
+
+                chunk = (record.payload["page_content"], metadata)  # type: ignore
+                chunks[chunk_key] = chunk
+                self.neighbor_cache[
+                    (collection_name, tenant_id, chunk_key)
+                ] = chunk
+
+            if offset is None:
+                break
+
+        while len(self.neighbor_cache) > self.neighbor_cache_size:
+            self.neighbor_cache.popitem(last=False)
+
+        return chunks
+
+    def _get_window(
+        self,
+        chunk_key: tuple[str, str],
+        chunks: dict[tuple[str, str], tuple[str, dict]],
+        link: str,
+        window: int,
+    ) -> list[tuple[str, str]]:
+        chunk_window = []
+        for _ in range(window):
+            neighbor_id = chunks[chunk_key][1].get(link)
+            chunk_key = (chunk_key[0], neighbor_id)
+            if neighbor_id is None or chunk_key not in chunks:
+                break
+
+            chunk_window.append(chunk_key)
+
+        return chunk_window
+
+    @traced("retriever", method="expand_context")
+    async def expand_context(
+        self,
+        collection_name: str,
+        retriever_items: list[RetrieverItem],
+        window: int = 1,
+        separator: str = "\n",
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        self._check_tenant(tenant_id)
+        await self._ensure_payload_index(
+            collection_name=collection_name,
+            field_name="metadata.chunk_id",
+        )
+
+        chunks: dict[tuple[str, str], tuple[str, dict]] = {}
+        hit_keys: list[tuple[str, str] | None] = []
+        for item in retriever_items:
+            document_id = item.metadata.get("document_id")
+            chunk_id = item.metadata.get("chunk_id")
+            if document_id is None or chunk_id is None:
+                hit_keys.append(None)
+                continue
+
+            hit_keys.append((document_id, chunk_id))
+            chunks[(document_id, chunk_id)] = (item.text, item.metadata)
+
+        # NOTE: windows grow one hop per iteration and the neighbours of all
+        # hits are fetched with one call per hop. Links are only followed
+        # within the same document.
+        links = ("previous_chunk_id", "next_chunk_id")
+        frontier = {(k, link) for k in chunks for link in links}
+        for _ in range(window):
+            neighbors = {
+                (k, link): (k[0], chunks[k][1][link])
+                for k, link in frontier
+                if chunks[k][1].get(link) is not None
+            }
+
+            missing_keys = set(neighbors.values()) - chunks.keys()
+            if len(missing_keys):
+                chunks |= await self._get_chunks(
+                    collection_name=collection_name,
+                    chunk_keys=missing_keys,
+                    tenant_id=tenant_id,
+                )
+
+            frontier = {
+                (neighbor_key, link)
+                for (_, link), neighbor_key in neighbors.items()
+                if neighbor_key in chunks
+            }
+
+        # NOTE: overlapping windows are grouped, and each group keeps the
+        # position and metadata of its first (best ranked) hit.
+        groups: list[tuple[RetrieverItem, set] | RetrieverItem] = []
+        key_groups: dict[tuple[str, str], int] = {}
+        for item, hit_key in zip(retriever_items, hit_keys):
+            if hit_key is None:
+                groups.append(item)
+                continue
+
+            chunk_window = {
+                hit_key,
+                *self._get_window(hit_key, chunks, links[0], window),
+                *self._get_window(hit_key, chunks, links[1], window),
+            }
+
+            group_idxs = sorted(
+                {key_groups[k] for k in chunk_window if k in key_groups}
+            )
+            if not len(group_idxs):
+                key_groups |= dict.fromkeys(chunk_window, len(groups))
+                groups.append((item, chunk_window))
+                continue
+
+            group_idx = group_idxs[0]
+            best_item, group_window = groups[group_idx]  # type: ignore
+            for idx in group_idxs[1:]:
+                group_window |= groups[idx][1]  # type: ignore
+                groups[idx] = None  # type: ignore
+
+            group_window |= chunk_window
+            key_groups |= dict.fromkeys(group_window, group_idx)
+            groups[group_idx] = (best_item, group_window)
+
+        return [
+            (
+                group
+                if isinstance(group, RetrieverItem)
+                else self._get_context_item(
+                    item=group[0],
+                    chunk_keys=group[1],
+                    chunks=chunks,
+                    separator=separator,
+                )
+            )
+            for group in groups
+            if group is not None
+        ]
+
+    def _get_context_item(
+        self,
+        item: RetrieverItem,
+        chunk_keys: set[tuple[str, str]],
+        chunks: dict[tuple[str, str], tuple[str, dict]],
+        separator: str,
+    ) -> RetrieverItem:
+        # NOTE: a group is a contiguous run of one document chain, so it is
+        # ordered by walking next links from its only chunk without a
+        # previous chunk in the group. Repeated chunks of a document share
+        # one point, so their links can form a cycle without such a chunk;
+        # the walk then starts from the first chunk in position order, and
+        # chunks it doesn't reach are appended in position order.
+        position_keys = sorted(
+            chunk_keys,
+            key=lambda k: (chunks[k][1].get("chunk_index") or 0, k),
+        )
+
+        chunk_key = next(
+            (
+                k
+                for k in position_keys
+                if (k[0], chunks[k][1].get("previous_chunk_id"))
+                not in chunk_keys
+            ),
+            position_keys[0],
+        )
+
+        ordered_keys = [chunk_key]
+        visited_keys = {chunk_key}
+        while True:
+            chunk_key = (
+                chunk_key[0],
+                chunks[chunk_key][1].get("next_chunk_id"),
+            )
+            if chunk_key not in chunk_keys or chunk_key in visited_keys:
+                break
+
+            ordered_keys.append(chunk_key)
+            visited_keys.add(chunk_key)
+
+        ordered_keys.extend(k for k in position_keys if k not in visited_keys)
+
+        return RetrieverItem(
+            text=separator.join(chunks[k][0] for k in ordered_keys),
+            metadata=item.metadata
+            | {
+                "context_chunk_ids": [chunk_id for _, chunk_id in ordered_keys]
+            },
+            score=item.score,
+        )
+
+    # TODO: score <= 1.0
+    @traced("retriever", method="dense_search_weighted")
+    @reranked
+    @cached_search(mode="dense_weighted")
+    async def dense_search_weighted(
+        self,
+        collection_name: str,
+        query: str,
+        weighted_metadata_items: list[WeightedMetadataItem],
+        k: int = 10,
+        pre_k: int = 50,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[RetrieverItem]:
+        vector = await self.dense_embeddings.aembed_query(text=query)
+        (retriever_items,) = await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_weighted_request(
+                    vector=vector,
+                    weighted_metadata_items=weighted_metadata_items,
+                    k=k,
+                    pre_k=pre_k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                )
+            ],
+        )
+
+        return retriever_items
+
+    @traced("retriever", method="dense_search_weighted_batch")
+    @reranked
+    async def dense_search_weighted_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        weighted_metadata_items: list[WeightedMetadataItem],
+        k: int = 10,
+        pre_k: int = 50,
+        score_threshold: float | None = None,
+        search_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+        rerank_k: int | None = None,
+        tenant_id: str | None = None,
+    ) -> list[list[RetrieverItem]]:
+        vectors = await aembed_queries(self.dense_embeddings, queries)
+        return await self._query_batch(
+            collection_name=collection_name,
+            tenant_id=tenant_id,
+            requests=[
+                self._get_weighted_request(
+                    vector=vector,
+                    weighted_metadata_items=weighted_metadata_items,
+                    k=k,
+                    pre_k=pre_k,
+                    score_threshold=score_threshold,
+                    search_filter=search_filter,
+                    search_params=search_params,
+                )
+                for vector in vectors
+            ],
+        )
@@ -1,3 +1,19 @@
-from .document_splitter import DocumentSplitter  # noqa
-from .token_splitter import TokenSplitter  # noqa
-from .markdown_splitter import MarkdownSplitter  # noqa
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .document_splitter import DocumentSplitter  # noqa
+    from .token_splitter import TokenSplitter  # noqa
+    from .markdown_splitter import MarkdownSplitter  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "DocumentSplitter": ".document_splitter",
+        "TokenSplitter": ".token_splitter",
+        "MarkdownSplitter": ".markdown_splitter",
+    },
+)
@@ -9,11 +9,14 @@ class DocumentSplitter(TextSplitter):
         self,
         documents: list[Document],
     ) -> list[TextChunk]:
+        tokens_batch = self._encode_batch(
+            texts=[doc.text for doc in documents]
+        )
         return [
             TextChunk(
                 text=doc.text,
                 metadata=doc.metadata,
-                num_tokens=self._get_num_tokens(text=doc.text),
+                num_tokens=len(tokens),
             )
-            for doc in documents
+            for doc, tokens in zip(documents, tokens_batch)
         ]
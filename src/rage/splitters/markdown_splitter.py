@@ -1,4 +1,6 @@
 from langchain_text_splitters.markdown import MarkdownTextSplitter
+from rage.meta.interfaces import Document, TextChunk
+
 from .token_splitter import TokenSplitter
 
 
@@ -7,11 +9,36 @@ class MarkdownSplitter(TokenSplitter):
         self,
         chunk_size: int = 384,
         chunk_overlap: int = 25,
+        num_threads: int = 8,
     ):
-        super().__init__()
+        super().__init__(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            num_threads=num_threads,
+        )
 
         self.splitter = MarkdownTextSplitter.from_tiktoken_encoder(
             model_name="gpt-4o",
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
         )
+
+    def _split_documents(self, documents: list[Document]) -> list[TextChunk]:
+        doc_texts = [
+            (doc, text)
+            for doc in documents
+            for text in map(str.strip, self.splitter.split_text(doc.text))
+            if len(text)
+        ]
+
+        tokens_batch = self._encode_batch(
+            texts=[text for _, text in doc_texts]
+        )
+        return [
+            TextChunk(
+                text=text,
+                metadata=doc.metadata,
+                num_tokens=len(tokens),
+            )
+            for (doc, text), tokens in zip(doc_texts, tokens_batch)
+        ]
@@ -1,40 +1,82 @@
+from typing import Iterator
 from more_itertools import flatten
 
-from langchain_text_splitters import TokenTextSplitter
-from langchain_text_splitters.base import TextSplitter as LangChainTextSplitter
-
 from rage.meta.interfaces import TextSplitter, Document, TextChunk
 
 
 class TokenSplitter(TextSplitter):
-    splitter: LangChainTextSplitter
-
     def __init__(
         self,
         chunk_size: int = 256,
         chunk_overlap: int = 25,
+        num_threads: int = 8,
     ):
-        super().__init__()
+        super().__init__(num_threads=num_threads)
 
-        self.splitter = TokenTextSplitter(
-            model_name="gpt-4o",
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-        )
+        assert (
+            chunk_overlap < chunk_size
+        ), "Expected 'chunk_overlap' to be smaller than 'chunk_size'."
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def _is_blank_token(self, token: int) -> bool:
+        return not self.tt_encoder.decode_single_token_bytes(token).strip()
+
+    def _get_token_spans(self, tokens: list[int]) -> Iterator[tuple[int, int]]:
+        step = self.chunk_size - self.chunk_overlap
+        for start in range(0, len(tokens), step):
+            end = min(start + self.chunk_size, len(tokens))
+
+            # NOTE: trim whitespace-only edge tokens so that the span length
+            # matches the token count of the stripped chunk text.
+            span_start, span_end = start, end
+            while span_start < span_end and self._is_blank_token(
+                tokens[span_start]
+            ):
+                span_start += 1
+
+            while span_end > span_start and self._is_blank_token(
+                tokens[span_end - 1]
+            ):
+                span_end -= 1
 
-    def get_text_chunks(self, document: Document) -> list[TextChunk]:
-        text_chunks = self.splitter.split_text(text=document.text)
-        text_chunks = (tc.strip() for tc in text_chunks)
+            if span_start < span_end:
+                yield span_start, span_end
 
-        return [
-            TextChunk(
-                text=text,
-                metadata=document.metadata,
-                num_tokens=self._get_num_tokens(text=text),
+            if end == len(tokens):
+                break
+
+    def get_text_chunks(
+        self,
+        document: Document,
+        tokens: list[int] | None = None,
+    ) -> list[TextChunk]:
+        if tokens is None:
+            tokens = self.tt_encoder.encode(
+                document.text, disallowed_special=()
+            )
+
+        text_chunks = []
+        for start, end in self._get_token_spans(tokens=tokens):
+            text = self.tt_encoder.decode(tokens[start:end]).strip()
+            if not len(text):
+                continue
+
+            text_chunks.append(
+                TextChunk(
+                    text=text,
+                    metadata=document.metadata,
+                    num_tokens=end - start,
+                )
             )
-            for text in text_chunks
-        ]
+
+        return text_chunks
 
     def _split_documents(self, documents: list[Document]) -> list[TextChunk]:
-        text_chunks = map(self.get_text_chunks, documents)
+        tokens_batch = self._encode_batch(
+            texts=[doc.text for doc in documents]
+        )
+        text_chunks = map(self.get_text_chunks, documents, tokens_batch)
+
         return list(flatten(text_chunks))
@@ -0,0 +1,20 @@
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .mmap_embedding_store import MmapEmbeddingStore  # noqa
+    from .document_cache import DocumentCache, DocumentCacheStats  # noqa
+    from .embedded_index import EmbeddedIndex  # noqa
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "MmapEmbeddingStore": ".mmap_embedding_store",
+        "DocumentCache": ".document_cache",
+        "DocumentCacheStats": ".document_cache",
+        "EmbeddedIndex": ".embedded_index",
+    },
+)
@@ -0,0 +1,4 @@
+from .mmap_embedding_store import main
+
+
+main()
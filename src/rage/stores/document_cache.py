@@ -0,0 +1,222 @@
+import os
+import time
+import zlib
+import pickle
+import asyncio
+import threading
+
+from pathlib import Path
+from functools import lru_cache
+from typing import Any, Sequence
+from collections import OrderedDict
+
+from rich.console import Console
+from pydantic import BaseModel, NonNegativeInt
+
+from aiocache import Cache
+from aiocache.serializers import PickleSerializer
+
+from rage.config import config
+
+
+console = Console()
+
+
+class DocumentCacheStats(BaseModel):
+    local_hits: NonNegativeInt = 0
+    redis_hits: NonNegativeInt = 0
+    misses: NonNegativeInt = 0
+    evictions: NonNegativeInt = 0
+
+
+class DocumentCache:
+    # NOTE: values are pickled and zlib-compressed once and stored as the
+    # same bytes in both tiers. The local tier keeps one file per key and
+    # evicts least recently used files once 'max_bytes' is exceeded; file
+    # mtimes carry the recency across restarts.
+    def __init__(
+        self,
+        root_path: str | None = None,
+        max_bytes: int | None = None,
+        use_redis: bool = True,
+        redis_ttl: int | None = None,
+        redis_retry_interval: float = 30.0,
+        compression_level: int = 6,
+        namespace: str = "rage:documents",
+    ):
+        self.root_path = Path(root_path) if root_path is not None else None
+        self.max_bytes = max_bytes
+        self.redis_ttl = redis_ttl
+        self.compression_level = compression_level
+
+        self.lock = threading.Lock()
+        self.stats = DocumentCacheStats()
+        self.index: OrderedDict[str, int] = OrderedDict()
+        self.num_bytes = 0
+
+        self.redis_retry_interval = redis_retry_interval
+        self._redis_retry_at = 0.0
+
+        self.redis = (
+            Cache(
+                Cache.REDIS,
+                endpoint=config.redis_host,
+                port=config.redis_port,
+                db=config.redis_db,
+                serializer=PickleSerializer(),
+                namespace=namespace,
+            )
+            if use_redis
+            else None
+        )
+
+        if self.root_path is not None:
+            self.root_path.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    @property
+    def redis_available(self) -> bool:
+        return (
+            self.redis is not None and time.monotonic() >= self._redis_retry_at
+        )
+
+    def _on_redis_error(self, e: Exception) -> None:
+        self._redis_retry_at = time.monotonic() + self.redis_retry_interval
+        console.log(
+            f"[bold yellow]WARNING:[/] document cache redis error: {e}"
+        )
+
+    def _load_index(self) -> None:
+        entries = []
+        for path in self.root_path.glob("*/*.bin"):  # type: ignore
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.num_bytes += size
+
+    def _get_path(self, key: str) -> Path:
+        return self.root_path / key[:2] / f"{key}.bin"  # type: ignore
+
+    def _read_local(self, key: str) -> bytes | None:
+        if self.root_path is None:
+            return None
+
+        with self.lock:
+            if key not in self.index:
+                return None
+
+            self.index.move_to_end(key)
+
+        path = self._get_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.num_bytes -= self.index.pop(key, 0)
+
+            return None
+
+        return data
+
+    def _write_local(self, key: str, data: bytes) -> None:
+        if self.root_path is None:
+            return
+
+        path = self._get_path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.num_bytes -= self.index.pop(key, 0)
+            self.index[key] = len(data)
+            self.num_bytes += len(data)
+
+            evicted = []
+            while (
+                self.max_bytes is not None
+                and self.num_bytes > self.max_bytes
+                and len(self.index) > 1
+            ):
+                evicted_key, size = self.index.popitem(last=False)
+                self.num_bytes -= size
+                evicted.append(evicted_key)
+
+            self.stats.evictions += len(evicted)
+
+        for evicted_key in evicted:
+            self._get_path(evicted_key).unlink(missing_ok=True)
+
+    def _read_local_many(self, keys: Sequence[str]) -> dict[str, bytes]:
+        results = {}
+        for key in keys:
+            data = self._read_local(key)
+            if data is not None:
+                results[key] = data
+
+        return results
+
+    def dumps(self, value: Any) -> bytes:
+        return zlib.compress(
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            level=self.compression_level,
+        )
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(zlib.decompress(data))
+
+    async def mget(self, keys: Sequence[str]) -> dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        found = await asyncio.to_thread(self._read_local_many, keys)
+        self.stats.local_hits += len(found)
+
+        missing_keys = [key for key in keys if key not in found]
+        if len(missing_keys) and self.redis_available:
+            try:
+                values = await self.redis.multi_get(missing_keys)  # type: ignore
+            except Exception as e:
+                self._on_redis_error(e)
+                values = []
+
+            redis_found = {
+                key: data
+                for key, data in zip(missing_keys, values)
+                if data is not None
+            }
+
+            self.stats.redis_hits += len(redis_found)
+            for key, data in redis_found.items():
+                await asyncio.to_thread(self._write_local, key, data)
+
+            found |= redis_found
+
+        self.stats.misses += len(keys) - len(found)
+        return {key: self.loads(data) for key, data in found.items()}
+
+    async def get(self, key: str) -> Any | None:
+        return (await self.mget([key])).get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        data = self.dumps(value)
+        await asyncio.to_thread(self._write_local, key, data)
+
+        if self.redis_available:
+            try:
+                await self.redis.set(key, data, ttl=self.redis_ttl)  # type: ignore
+            except Exception as e:
+                self._on_redis_error(e)
+
+
+@lru_cache(maxsize=1)
+def get_document_cache() -> DocumentCache:
+    return DocumentCache(
+        root_path=config.document_cache_path,
+        max_bytes=config.document_cache_max_bytes,
+        use_redis=config.document_cache_use_redis,
+        redis_ttl=config.document_cache_redis_ttl,
+    )
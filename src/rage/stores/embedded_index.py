@@ -0,0 +1,622 @@
+import os
+import json
+import pickle
+import bisect
+import threading
+import numpy as np
+
+from pathlib import Path
+from collections import OrderedDict
+from typing import Literal, Sequence
+
+from qdrant_client import models
+from qdrant_client.local.payload_filters import check_filter
+from qdrant_client.local.payload_value_extractor import value_by_key
+
+
+HAS_VECTOR = {"dense": True, "sparse": True}
+
+
+class EmbeddedIndex:
+    # NOTE: dense vectors live in an append-only file of fixed-size records
+    # read through np.memmap, like MmapEmbeddingStore; ids, payloads and
+    # sparse vectors go to an append-only log of pickled batches replayed on
+    # open. Deleted rows stay behind until `compact` rewrites both files under
+    # a new generation. Search is exact: a blocked matrix product over all
+    # rows for dense vectors and an inverted index for sparse vectors. An
+    # index is meant to have a single writer process. Filters made only of
+    # MatchValue/MatchAny conditions under 'must' are answered from keyword
+    # indexes, built per field on first use and kept up to date on writes;
+    # any other filter is checked row by row. Masks are cached per filter
+    # until the next write. Rows and masks are only valid while 'lock' is
+    # held, since a write can compact and renumber them; readers hold it
+    # across the mask, the search and the row lookups. Only the dense
+    # vectors are memory mapped: opening an index replays the whole log
+    # into memory, so it takes time and memory linear in the number of
+    # points.
+    def __init__(
+        self,
+        root_path: str,
+        dimensions: int | None = None,
+        dtype: Literal["float32", "float16"] = "float32",
+        distance: models.Distance = models.Distance.COSINE,
+        compact_ratio: float = 0.5,
+        block_size: int = 65536,
+        max_cached_masks: int = 64,
+    ):
+        self.root_path = Path(root_path)
+        self.root_path.mkdir(parents=True, exist_ok=True)
+
+        self.compact_ratio = compact_ratio
+        self.block_size = block_size
+        self.max_cached_masks = max_cached_masks
+        self.lock = threading.RLock()
+
+        self.meta_path = self.root_path / "meta.json"
+        if not self.meta_path.exists():
+            assert dimensions is not None, "dimensions must be set."
+            assert distance in (
+                models.Distance.COSINE,
+                models.Distance.DOT,
+            ), f"Unsupported distance {distance}."
+
+            self.generation = 0
+            self.dimensions = dimensions
+            self.dtype = np.dtype(dtype)
+            self.distance = distance
+            self._write_meta()
+
+        else:
+            meta = json.loads(self.meta_path.read_text())
+            self.generation = meta["generation"]
+            self.dimensions = meta["dimensions"]
+            self.dtype = np.dtype(meta["dtype"])
+            self.distance = models.Distance(meta["distance"])
+
+            assert (
+                dimensions is None or dimensions == self.dimensions
+            ), f"Expected {self.dimensions} dimensions, found {dimensions}."
+
+        self._vectors: np.memmap | None = None
+        self._vectors_file = None
+        self._log_file = None
+
+        self._load()
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.root_path / f"vectors.{self.generation}.bin"
+
+    @property
+    def log_path(self) -> Path:
+        return self.root_path / f"points.{self.generation}.log"
+
+    @property
+    def record_size(self) -> int:
+        return self.dimensions * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return len(self.id_rows)
+
+    def _write_meta(self) -> None:
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "generation": self.generation,
+                    "dimensions": self.dimensions,
+                    "dtype": self.dtype.name,
+                    "distance": self.distance.value,
+                }
+            )
+        )
+
+        os.replace(tmp_path, self.meta_path)
+
+    def _load(self) -> None:
+        self.ids: list[str] = []
+        self.payloads: list[dict | None] = []
+        self.alive = np.zeros(0, dtype=bool)
+        self.id_rows: dict[str, int] = {}
+        self.postings: dict[int, tuple[list[int], list[float]]] = {}
+        self._posting_arrays: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self._masks: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._id_order: list[int] | None = None
+        self.keyword_indexes: dict[str, dict[str | int | float, list[int]]] = (
+            {}
+        )
+
+        if self.log_path.exists():
+            # NOTE: a crash can leave a partial trailing batch behind.
+            with open(self.log_path, "rb") as f:
+                offset = 0
+                while True:
+                    try:
+                        self._apply(pickle.load(f))
+                        offset = f.tell()
+                    except (EOFError, pickle.UnpicklingError):
+                        break
+
+            os.truncate(self.log_path, offset)
+
+        # NOTE: vectors are written before their log entry, so the vectors
+        # file can hold rows the log never recorded.
+        if self.vectors_path.exists():
+            os.truncate(self.vectors_path, len(self.ids) * self.record_size)
+
+    def _apply(self, batch: dict) -> None:
+        deleted = batch.get("deleted", [])
+        if len(deleted):
+            self.alive[deleted] = False
+            for row in deleted:
+                if self.id_rows.get(self.ids[row]) == row:
+                    del self.id_rows[self.ids[row]]
+
+                self.payloads[row] = None
+
+        updated = batch.get("updated", {})
+        for key, keyword_index in self.keyword_indexes.items():
+            self._unindex_keywords(
+                key=key,
+                keyword_index=keyword_index,
+                rows=list(updated),
+            )
+
+        for row, payload in updated.items():
+            self.payloads[row] = payload
+
+        for key, keyword_index in self.keyword_indexes.items():
+            self._index_keywords(
+                key=key,
+                keyword_index=keyword_index,
+                rows=list(updated),
+            )
+
+        start = len(self.ids)
+        ids = batch.get("ids", [])
+        for row, (point_id, (indices, values)) in enumerate(
+            zip(ids, batch["sparse"]) if len(ids) else (),
+            start=start,
+        ):
+            self.id_rows[point_id] = row
+            for idx, value in zip(indices, values):
+                rows, row_values = self.postings.setdefault(idx, ([], []))
+                rows.append(row)
+                row_values.append(value)
+                self._posting_arrays.pop(idx, None)
+
+        self.ids.extend(ids)
+        self.payloads.extend(batch.get("payloads", []))
+        self.alive = np.concatenate(
+            [self.alive, np.ones(len(ids), dtype=bool)]
+        )
+        for key, keyword_index in self.keyword_indexes.items():
+            self._index_keywords(
+                key=key,
+                keyword_index=keyword_index,
+                rows=range(start, len(self.ids)),
+            )
+
+        self._masks.clear()
+        self._id_order = None
+
+    def _append_log(self, batch: dict) -> None:
+        if self._log_file is None:
+            self._log_file = open(self.log_path, "ab")
+
+        pickle.dump(batch, self._log_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._log_file.flush()
+
+    def _get_vectors(self) -> np.memmap:
+        num_rows = len(self.ids)
+        if self._vectors is None or len(self._vectors) < num_rows:
+            if self._vectors_file is not None:
+                self._vectors_file.flush()
+
+            self._vectors = np.memmap(
+                self.vectors_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(num_rows, self.dimensions),
+            )
+
+        return self._vectors
+
+    def _close_files(self) -> None:
+        for f in (self._vectors_file, self._log_file):
+            if f is not None:
+                f.close()
+
+        self._vectors = None
+        self._vectors_file = None
+        self._log_file = None
+
+    def _get_query_vectors(self, vectors: Sequence[list[float]]) -> np.ndarray:
+        _vectors = np.asarray(vectors, dtype=np.float32).reshape(
+            -1, self.dimensions
+        )
+
+        if self.distance == models.Distance.COSINE:
+            norms = np.linalg.norm(_vectors, axis=1, keepdims=True)
+            _vectors = _vectors / np.where(norms > 0, norms, 1.0)
+
+        return _vectors
+
+    def upsert(
+        self,
+        ids: list[str],
+        dense_vectors: Sequence[list[float]],
+        sparse_vectors: Sequence[models.SparseVector],
+        payloads: list[dict],
+    ) -> None:
+        if not len(ids):
+            return
+
+        assert len(set(ids)) == len(ids), "ids must be unique."
+
+        vectors = self._get_query_vectors(dense_vectors).astype(self.dtype)
+        with self.lock:
+            if self._vectors_file is None:
+                self._vectors_file = open(self.vectors_path, "ab")
+
+            self._vectors_file.write(vectors.tobytes())
+            self._vectors_file.flush()
+
+            batch = {
+                "deleted": [
+                    self.id_rows[point_id]
+                    for point_id in set(ids)
+                    if point_id in self.id_rows
+                ],
+                "ids": ids,
+                "payloads": payloads,
+                "sparse": [(sv.indices, sv.values) for sv in sparse_vectors],
+            }
+
+            self._append_log(batch)
+            self._apply(batch)
+            self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        num_dead = len(self.ids) - len(self.id_rows)
+        if num_dead and num_dead / len(self.ids) > self.compact_ratio:
+            self.compact()
+
+    def delete(self, rows: Sequence[int]) -> None:
+        if not len(rows):
+            return
+
+        with self.lock:
+            batch = {"deleted": list(rows)}
+            self._append_log(batch)
+            self._apply(batch)
+            self._compact_if_needed()
+
+    def set_payloads(self, rows: Sequence[int], payloads: list[dict]) -> None:
+        if not len(rows):
+            return
+
+        with self.lock:
+            batch = {"updated": dict(zip(rows, payloads))}
+            self._append_log(batch)
+            self._apply(batch)
+
+    def _unindex_keywords(
+        self,
+        key: str,
+        keyword_index: dict[str | int | float, list[int]],
+        rows: Sequence[int],
+    ) -> None:
+        for row in rows:
+            payload = self.payloads[row]
+            if payload is None:
+                continue
+
+            for value in value_by_key(payload, key) or ():
+                if isinstance(value, (str, int, float)):
+                    value_rows = keyword_index.get(value, [])
+                    if row in value_rows:
+                        value_rows.remove(row)
+
+    def _index_keywords(
+        self,
+        key: str,
+        keyword_index: dict[str | int | float, list[int]],
+        rows: Sequence[int],
+    ) -> None:
+        # NOTE: rows are never removed, masks are intersected with 'alive'.
+        for row in rows:
+            payload = self.payloads[row]
+            if payload is None:
+                continue
+
+            for value in value_by_key(payload, key) or ():
+                if isinstance(value, (str, int, float)):
+                    keyword_index.setdefault(value, []).append(row)
+
+    def _get_keyword_index(
+        self, key: str
+    ) -> dict[str | int | float, list[int]]:
+        keyword_index = self.keyword_indexes.get(key)
+        if keyword_index is None:
+            keyword_index = self.keyword_indexes[key] = {}
+            self._index_keywords(
+                key=key,
+                keyword_index=keyword_index,
+                rows=range(len(self.ids)),
+            )
+
+        return keyword_index
+
+    def create_keyword_index(self, key: str) -> None:
+        with self.lock:
+            self._get_keyword_index(key)
+
+    def _get_indexed_mask(
+        self, payload_filter: models.Filter
+    ) -> np.ndarray | None:
+        if (
+            payload_filter.should is not None
+            or payload_filter.min_should is not None
+            or payload_filter.must_not is not None
+        ):
+            return None
+
+        conditions = payload_filter.must or []
+        if not isinstance(conditions, list):
+            conditions = [conditions]
+
+        mask = self.alive.copy()
+        for condition in conditions:
+            if isinstance(condition, models.Filter):
+                condition_mask = self._get_indexed_mask(condition)
+                if condition_mask is None:
+                    return None
+
+            elif isinstance(condition, models.FieldCondition) and isinstance(
+                condition.match, (models.MatchValue, models.MatchAny)
+            ):
+                keyword_index = self._get_keyword_index(condition.key)
+                values = (
+                    [condition.match.value]
+                    if isinstance(condition.match, models.MatchValue)
+                    else condition.match.any
+                )
+
+                condition_mask = np.zeros(len(self.ids), dtype=bool)
+                for value in values:
+                    condition_mask[keyword_index.get(value, [])] = True
+
+            else:
+                return None
+
+            mask &= condition_mask
+
+        return mask
+
+    def get_mask(
+        self, payload_filter: models.Filter | None = None
+    ) -> np.ndarray:
+        if payload_filter is None:
+            return self.alive
+
+        key = payload_filter.model_dump_json()
+        with self.lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+
+            mask = self._get_indexed_mask(payload_filter)
+            if mask is None:
+                mask = self.alive.copy()
+                for row in np.flatnonzero(mask).tolist():
+                    mask[row] = check_filter(
+                        payload_filter,
+                        self.payloads[row],  # type: ignore
+                        self.ids[row],
+                        HAS_VECTOR,
+                    )
+
+            self._masks[key] = mask
+            if len(self._masks) > self.max_cached_masks:
+                self._masks.popitem(last=False)
+
+            return mask
+
+    def _get_top_k(
+        self,
+        scores: np.ndarray,
+        k: int,
+        score_threshold: float | None,
+    ) -> list[tuple[int, float]]:
+        if k < len(scores):
+            rows = np.argpartition(-scores, k - 1)[:k]
+        else:
+            rows = np.arange(len(scores))
+
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        valid = np.isfinite(scores[rows])
+        if score_threshold is not None:
+            valid &= scores[rows] >= score_threshold
+
+        rows = rows[valid]
+
+        return list(zip(rows.tolist(), scores[rows].tolist()))
+
+    def dense_search(
+        self,
+        vectors: Sequence[list[float]],
+        k: int,
+        mask: np.ndarray,
+        score_threshold: float | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        query_vectors = self._get_query_vectors(vectors)
+        with self.lock:
+            num_rows = len(self.ids)
+            if not num_rows:
+                return [[] for _ in query_vectors]
+
+            matrix = self._get_vectors()
+            scores = np.empty((len(query_vectors), num_rows), dtype=np.float32)
+            for start in range(0, num_rows, self.block_size):
+                end = min(start + self.block_size, num_rows)
+                block = np.asarray(matrix[start:end], dtype=np.float32)
+                scores[:, start:end] = query_vectors @ block.T
+
+            assert len(mask) == num_rows, "mask is out of date."
+            scores[:, ~mask] = -np.inf
+
+        return [
+            self._get_top_k(scores=s, k=k, score_threshold=score_threshold)
+            for s in scores
+        ]
+
+    def _get_posting(self, idx: int) -> tuple[np.ndarray, np.ndarray] | None:
+        if idx not in self.postings:
+            return None
+
+        if idx not in self._posting_arrays:
+            rows, values = self.postings[idx]
+            self._posting_arrays[idx] = (
+                np.asarray(rows, dtype=np.int64),
+                np.asarray(values, dtype=np.float32),
+            )
+
+        return self._posting_arrays[idx]
+
+    def sparse_search(
+        self,
+        sparse_vector: models.SparseVector,
+        k: int,
+        mask: np.ndarray,
+        score_threshold: float | None = None,
+    ) -> list[tuple[int, float]]:
+        with self.lock:
+            num_rows = len(self.ids)
+            scores = np.zeros(num_rows, dtype=np.float32)
+            matched = np.zeros(num_rows, dtype=bool)
+            for idx, value in zip(sparse_vector.indices, sparse_vector.values):
+                posting = self._get_posting(idx)
+                if posting is None:
+                    continue
+
+                rows, values = posting
+                scores[rows] += value * values
+                matched[rows] = True
+
+            assert len(mask) == num_rows, "mask is out of date."
+            scores[~(matched & mask)] = -np.inf
+
+        return self._get_top_k(
+            scores=scores,
+            k=k,
+            score_threshold=score_threshold,
+        )
+
+    def _get_id_order(self) -> list[int]:
+        with self.lock:
+            if self._id_order is None:
+                self._id_order = sorted(
+                    range(len(self.ids)),
+                    key=self.ids.__getitem__,
+                )
+
+            return self._id_order
+
+    def get_dense_vectors(self, rows: Sequence[int]) -> np.ndarray:
+        return np.asarray(self._get_vectors()[rows], dtype=np.float32)
+
+    def scroll(
+        self,
+        limit: int,
+        mask: np.ndarray,
+        offset: str | None = None,
+        order_by: models.OrderBy | None = None,
+    ) -> list[int]:
+        # NOTE: like Qdrant, pages ordered by a payload key have no offset.
+        assert (
+            offset is None or order_by is None
+        ), "offset is not supported with order_by."
+
+        if order_by is None:
+            # NOTE: rows sorted by id are cached until the next write, so
+            # paging through the index doesn't sort it once per page.
+            order = self._get_id_order()
+            start = (
+                bisect.bisect_left(order, offset, key=self.ids.__getitem__)
+                if offset is not None
+                else 0
+            )
+
+            rows = []
+            for idx in range(start, len(order)):
+                if len(rows) == limit:
+                    break
+
+                if mask[order[idx]]:
+                    rows.append(order[idx])
+
+            return rows
+
+        # NOTE: like Qdrant, points without a value for the key are skipped.
+        values = {}
+        for row in np.flatnonzero(mask).tolist():
+            value = value_by_key(self.payloads[row], order_by.key)  # type: ignore
+            if value:
+                values[row] = value[0]
+
+        return sorted(
+            values,
+            key=lambda row: values[row],
+            reverse=order_by.direction == models.Direction.DESC,
+        )[:limit]
+
+    def compact(self) -> None:
+        with self.lock:
+            rows = np.flatnonzero(self.alive)
+            vectors = self._get_vectors()
+            batch = {
+                "ids": [self.ids[row] for row in rows],
+                "payloads": [self.payloads[row] for row in rows],
+                "sparse": [([], []) for _ in rows],
+            }
+
+            sparse = batch["sparse"]
+            positions = np.full(len(self.ids), -1, dtype=np.int64)
+            positions[rows] = np.arange(len(rows))
+            for idx, (posting_rows, values) in self.postings.items():
+                for row, value in zip(posting_rows, values):
+                    if positions[row] >= 0:
+                        sparse[positions[row]][0].append(idx)
+                        sparse[positions[row]][1].append(value)
+
+            self._close_files()
+            old_paths = (self.vectors_path, self.log_path)
+            self.generation += 1
+
+            with open(self.vectors_path, "wb") as f:
+                for start in range(0, len(rows), self.block_size):
+                    f.write(
+                        vectors[
+                            rows[start : start + self.block_size]
+                        ].tobytes()
+                    )
+
+            del vectors
+
+            # NOTE: "wb" truncates a log left behind by an earlier
+            # compaction that died after creating it.
+            self._log_file = open(self.log_path, "wb")
+            self._append_log(batch)
+            self._close_files()
+
+            self._write_meta()
+            for path in old_paths:
+                path.unlink(missing_ok=True)
+
+            self._load()
+
+    def close(self) -> None:
+        with self.lock:
+            self._close_files()
@@ -0,0 +1,412 @@
+import os
+import re
+import json
+import fcntl
+import xxhash
+import argparse
+import threading
+import numpy as np
+
+from pathlib import Path
+from typing import Iterator, Literal, Sequence
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from rich.console import Console
+from langchain_core.stores import BaseStore
+
+
+console = Console()
+
+TOMBSTONE = np.iinfo(np.uint64).max
+INDEX_DTYPE = np.dtype([("key", "V16"), ("slot", "<u8")])
+STORE_FILE_PATTERN = re.compile(
+    r"meta\.(json|tmp)|lock|(vectors|index)\.\d+\.bin"
+)
+
+
+class MmapEmbeddingStore(BaseStore[str, list[float]]):
+    # NOTE: vectors live in an append-only file of fixed-size records that is
+    # read through np.memmap; the hash index is an append-only log of
+    # (xxh3_128(namespace + key), slot) records replayed on open. Eviction
+    # and overwrites leave dead records behind until `compact` rewrites both
+    # files under a new generation. Several processes can share a store:
+    # every operation holds an flock on '<root_path>/lock' (exclusive for
+    # writes) and first catches up with the records other processes have
+    # appended, or reloads after their compaction, so slots are always
+    # assigned at the end of the vectors file.
+    def __init__(
+        self,
+        root_path: str,
+        namespace: str = "",
+        dtype: Literal["float32", "float16"] = "float32",
+        max_bytes: int | None = None,
+        compact_ratio: float = 0.5,
+    ):
+        self.root_path = Path(root_path)
+        self.root_path.mkdir(parents=True, exist_ok=True)
+
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.compact_ratio = compact_ratio
+        self.lock = threading.RLock()
+
+        self.meta_path = self.root_path / "meta.json"
+        self.lock_path = self.root_path / "lock"
+
+        self.dtype = np.dtype(dtype)
+        self.generation: int | None = None
+        self.dimensions: int | None = None
+        self.index: OrderedDict[bytes, int] = OrderedDict()
+        self.num_slots = 0
+        self.index_offset = 0
+
+        self._vectors: np.memmap | None = None
+        self._vectors_file = None
+        self._index_file = None
+        self._lock_file = None
+
+        with self.lock, self._file_lock(exclusive=False):
+            pass
+
+        # NOTE: embeddings cached by another store in the same directory,
+        # like a LocalFileStore, are not read.
+        foreign_paths = [
+            path
+            for path in self.root_path.iterdir()
+            if not STORE_FILE_PATTERN.fullmatch(path.name)
+        ]
+
+        if len(foreign_paths):
+            console.log(
+                f"[bold yellow]WARNING:[/] {root_path} holds files of another "
+                f"embedding cache, e.g. {foreign_paths[0].name}, which are "
+                "ignored; use the 'local_file' store to keep using them."
+            )
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.root_path / f"vectors.{self.generation}.bin"
+
+    @property
+    def index_path(self) -> Path:
+        return self.root_path / f"index.{self.generation}.bin"
+
+    @property
+    def record_size(self) -> int:
+        assert self.dimensions is not None
+        return self.dimensions * self.dtype.itemsize
+
+    @property
+    def live_bytes(self) -> int:
+        if self.dimensions is None:
+            return 0
+
+        return len(self.index) * self.record_size
+
+    @property
+    def file_bytes(self) -> int:
+        if self.dimensions is None:
+            return 0
+
+        return self.num_slots * self.record_size
+
+    def _write_meta(self) -> None:
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "generation": self.generation,
+                    "dtype": self.dtype.name,
+                    "dimensions": self.dimensions,
+                }
+            )
+        )
+
+        os.replace(tmp_path, self.meta_path)
+
+    def _read_meta(self) -> dict:
+        if not self.meta_path.exists():
+            return {
+                "generation": 0,
+                "dtype": self.dtype.name,
+                "dimensions": None,
+            }
+
+        return json.loads(self.meta_path.read_text())
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        # NOTE: callers hold 'self.lock'; flocks are not reentrant per file
+        # description, so only public methods take one.
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, "ab")
+
+        fcntl.flock(
+            self._lock_file,
+            fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH,
+        )
+
+        try:
+            self._sync(exclusive=exclusive)
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync(self, exclusive: bool) -> None:
+        meta = self._read_meta()
+        assert (
+            meta["dtype"] == self.dtype.name
+        ), f"Expected dtype {meta['dtype']}, found {self.dtype.name}."
+
+        if (
+            meta["generation"] != self.generation
+            or meta["dimensions"] != self.dimensions
+        ):
+            self._close_files()
+            self.generation = meta["generation"]
+            self.dimensions = meta["dimensions"]
+            self.index = OrderedDict()
+            self.index_offset = 0
+
+        if self.dimensions is None:
+            return
+
+        # NOTE: a crash can leave partial trailing records behind, which the
+        # next writer cuts off before appending.
+        for path, record_size in (
+            (self.vectors_path, self.record_size),
+            (self.index_path, INDEX_DTYPE.itemsize),
+        ):
+            if exclusive and path.exists():
+                size = path.stat().st_size
+                if size % record_size:
+                    os.truncate(path, size - size % record_size)
+
+        self.num_slots = (
+            self.vectors_path.stat().st_size // self.record_size
+            if self.vectors_path.exists()
+            else 0
+        )
+
+        self._replay_index()
+
+    def _replay_index(self) -> None:
+        if not self.index_path.exists():
+            return
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self.index_offset)
+            raw = f.read()
+
+        raw = raw[: len(raw) - len(raw) % INDEX_DTYPE.itemsize]
+        self.index_offset += len(raw)
+        records = np.frombuffer(raw, dtype=INDEX_DTYPE)
+
+        for key, slot in zip(
+            records["key"].tolist(), records["slot"].tolist()
+        ):
+            self.index.pop(key, None)
+            if slot != TOMBSTONE and slot < self.num_slots:
+                self.index[key] = slot
+
+    def _get_key(self, key: str) -> bytes:
+        return xxhash.xxh3_128_digest(self.namespace + key)
+
+    def _get_vectors(self) -> np.memmap:
+        if self._vectors is None or len(self._vectors) < self.num_slots:
+            if self._vectors_file is not None:
+                self._vectors_file.flush()
+
+            self._vectors = np.memmap(
+                self.vectors_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(self.num_slots, self.dimensions),  # type: ignore
+            )
+
+        return self._vectors
+
+    def _append_index(self, keys: list[bytes], slots: Sequence[int]) -> None:
+        if self._index_file is None:
+            self._index_file = open(self.index_path, "ab")
+
+        records = np.empty(len(keys), dtype=INDEX_DTYPE)
+        records["key"] = keys
+        records["slot"] = slots
+
+        self._index_file.write(records.tobytes())
+        self._index_file.flush()
+        self.index_offset += records.nbytes
+
+    def _close_files(self) -> None:
+        for f in (self._vectors_file, self._index_file):
+            if f is not None:
+                f.close()
+
+        self._vectors = None
+        self._vectors_file = None
+        self._index_file = None
+
+    def mget(self, keys: Sequence[str]) -> list[list[float] | None]:
+        results: list[list[float] | None] = [None] * len(keys)
+        with self.lock, self._file_lock(exclusive=False):
+            found = []
+            for idx, key in enumerate(keys):
+                _key = self._get_key(key)
+                slot = self.index.get(_key)
+                if slot is None:
+                    continue
+
+                self.index.move_to_end(_key)
+                found.append((idx, slot))
+
+            if not len(found):
+                return results
+
+            vectors = self._get_vectors()[[slot for _, slot in found]]
+
+        for (idx, _), vector in zip(
+            found, vectors.astype(np.float32).tolist()
+        ):
+            results[idx] = vector
+
+        return results
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, list[float]]]) -> None:
+        if not len(key_value_pairs):
+            return
+
+        vectors = np.asarray([v for _, v in key_value_pairs], dtype=self.dtype)
+        keys = [self._get_key(k) for k, _ in key_value_pairs]
+
+        with self.lock, self._file_lock(exclusive=True):
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+                self._write_meta()
+
+            assert (
+                vectors.shape[1] == self.dimensions
+            ), f"Expected {self.dimensions} dimensions, found {vectors.shape[1]}."
+
+            if self._vectors_file is None:
+                self._vectors_file = open(self.vectors_path, "ab")
+
+            self._vectors_file.write(vectors.tobytes())
+            self._vectors_file.flush()
+
+            slots = range(self.num_slots, self.num_slots + len(keys))
+            self._append_index(keys=keys, slots=slots)
+            self.num_slots += len(keys)
+
+            for key, slot in zip(keys, slots):
+                self.index.pop(key, None)
+                self.index[key] = slot
+
+            self._evict()
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self.lock, self._file_lock(exclusive=True):
+            _keys = [
+                _key
+                for _key in map(self._get_key, keys)
+                if self.index.pop(_key, None) is not None
+            ]
+
+            if len(_keys):
+                self._append_index(keys=_keys, slots=[TOMBSTONE] * len(_keys))
+
+    def yield_keys(self, prefix: str | None = None) -> Iterator[str]:
+        # NOTE: only key hashes are stored, so hex digests are yielded.
+        with self.lock, self._file_lock(exclusive=False):
+            hex_keys = [key.hex() for key in self.index.keys()]
+
+        for hex_key in hex_keys:
+            if prefix is None or hex_key.startswith(prefix):
+                yield hex_key
+
+    def _evict(self) -> None:
+        if self.max_bytes is not None and self.live_bytes > self.max_bytes:
+            num_evict = len(self.index) - self.max_bytes // self.record_size
+            evicted = [
+                self.index.popitem(last=False)[0] for _ in range(num_evict)
+            ]
+            self._append_index(keys=evicted, slots=[TOMBSTONE] * len(evicted))
+
+        dead_slots = self.num_slots - len(self.index)
+        if self.num_slots and dead_slots / self.num_slots > self.compact_ratio:
+            self._compact()
+
+    def compact(self, batch_size: int = 65536) -> None:
+        with self.lock, self._file_lock(exclusive=True):
+            self._compact(batch_size=batch_size)
+
+    def _compact(self, batch_size: int = 65536) -> None:
+        if self.dimensions is None:
+            return
+
+        vectors = self._get_vectors()
+        keys = list(self.index.keys())
+        slots = np.fromiter(self.index.values(), dtype=np.uint64)
+
+        self._close_files()
+        old_paths = (self.vectors_path, self.index_path)
+        self.generation += 1  # type: ignore
+
+        with open(self.vectors_path, "wb") as f:
+            for start in range(0, len(slots), batch_size):
+                f.write(vectors[slots[start : start + batch_size]].tobytes())
+
+        del vectors
+
+        # NOTE: "wb" truncates whatever an earlier compaction that died
+        # after creating the next generation left behind, instead of
+        # appending to it.
+        self._index_file = open(self.index_path, "wb")
+        self.index_offset = 0
+        self._append_index(keys=keys, slots=range(len(keys)))
+        self._close_files()
+
+        self._write_meta()
+        for path in old_paths:
+            path.unlink(missing_ok=True)
+
+        self.num_slots = len(keys)
+        self.index = OrderedDict(zip(keys, range(len(keys))))
+
+    def close(self) -> None:
+        with self.lock:
+            self._close_files()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compact mmap embedding cache stores."
+    )
+
+    parser.add_argument("root_paths", nargs="+")
+    args = parser.parse_args()
+
+    for root_path in args.root_paths:
+        meta_path = Path(root_path) / "meta.json"
+        if not meta_path.exists():
+            console.log(
+                f"[bold yellow]WARNING:[/] no embedding store in {root_path}"
+            )
+
+            continue
+
+        meta = json.loads(meta_path.read_text())
+        store = MmapEmbeddingStore(root_path=root_path, dtype=meta["dtype"])
+
+        file_bytes = store.file_bytes
+        store.compact()
+        store.close()
+
+        console.log(
+            f"{root_path}: {file_bytes} -> {store.file_bytes} bytes, "
+            f"{len(store.index)} vectors"
+        )
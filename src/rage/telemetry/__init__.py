@@ -0,0 +1,28 @@
+from typing import TYPE_CHECKING
+
+from rage.utils.lazy_imports import get_lazy_getattr
+
+
+if TYPE_CHECKING:
+    from .tracing import Span, Telemetry, telemetry, traced  # noqa
+    from .exporters import (  # noqa
+        InMemoryExporter,
+        PrometheusExporter,
+        OpenTelemetryExporter,
+        SpanStats,
+    )
+
+
+__getattr__, __dir__ = get_lazy_getattr(
+    __name__,
+    {
+        "Span": ".tracing",
+        "Telemetry": ".tracing",
+        "telemetry": ".tracing",
+        "traced": ".tracing",
+        "InMemoryExporter": ".exporters",
+        "PrometheusExporter": ".exporters",
+        "OpenTelemetryExporter": ".exporters",
+        "SpanStats": ".exporters",
+    },
+)
@@ -0,0 +1,321 @@
+import re
+import threading
+import numpy as np
+
+from typing import Any
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pydantic import BaseModel, NonNegativeInt, NonNegativeFloat
+
+from .tracing import Span
+
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def get_labels_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def escape_label_value(value: str) -> str:
+    # NOTE: the text exposition format escapes '\\', '"' and newlines in
+    # label values.
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SpanStats(BaseModel):
+    name: str
+    labels: dict[str, str]
+    count: NonNegativeInt = 0
+    errors: NonNegativeInt = 0
+    total_seconds: NonNegativeFloat = 0.0
+    p50_ms: NonNegativeFloat = 0.0
+    p95_ms: NonNegativeFloat = 0.0
+    p99_ms: NonNegativeFloat = 0.0
+    values: dict[str, float] = {}
+
+
+class InMemoryExporter:
+    def __init__(self, max_spans: int = 10_000, max_samples: int = 1_000):
+        self.lock = threading.Lock()
+        self.max_samples = max_samples
+
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+        self.counters: dict[tuple, float] = defaultdict(float)
+        self._stats: dict[tuple, SpanStats] = {}
+        self._samples: dict[tuple, deque[float]] = {}
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        key = (span.name, get_labels_key(span.labels))
+        with self.lock:
+            self.spans.append(span)
+            if key not in self._stats:
+                self._stats[key] = SpanStats(
+                    name=span.name,
+                    labels=dict(key[1]),
+                )
+
+                self._samples[key] = deque(maxlen=self.max_samples)
+
+            stats = self._stats[key]
+            stats.count += 1
+            stats.errors += span.error is not None
+            stats.total_seconds += span.duration
+            for k, v in span.values.items():
+                stats.values[k] = stats.values.get(k, 0) + v
+
+            self._samples[key].append(span.duration)
+
+    def on_count(
+        self, name: str, value: float, labels: dict[str, str]
+    ) -> None:
+        with self.lock:
+            self.counters[(name, get_labels_key(labels))] += value
+
+    def get_stats(self) -> list[SpanStats]:
+        with self.lock:
+            results = []
+            for key, stats in self._stats.items():
+                p50, p95, p99 = np.percentile(self._samples[key], [50, 95, 99])
+                results.append(
+                    stats.model_copy(
+                        update={
+                            "p50_ms": p50 * 1000,
+                            "p95_ms": p95 * 1000,
+                            "p99_ms": p99 * 1000,
+                        },
+                        deep=True,
+                    )
+                )
+
+            return results
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        with self.lock:
+            return self.counters.get((name, get_labels_key(labels)), 0)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.spans.clear()
+            self.counters.clear()
+            self._stats.clear()
+            self._samples.clear()
+
+
+class PrometheusExporter:
+    # NOTE: span durations become '<name>_seconds' histograms, span values
+    # '<name>_<value>_total' counters and counts '<name>_total' counters,
+    # all labelled with the span labels.
+    def __init__(
+        self,
+        namespace: str = "rage",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.lock = threading.Lock()
+
+        self.histograms: dict[tuple, list[float]] = {}
+        self.counters: dict[tuple, float] = defaultdict(float)
+        self._server: ThreadingHTTPServer | None = None
+
+    def _get_metric_name(self, *parts: str) -> str:
+        name = "_".join((self.namespace,) + parts)
+        return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        labels = get_labels_key(
+            span.labels | {"status": "ok" if span.error is None else "error"}
+        )
+
+        key = (self._get_metric_name(span.name, "seconds"), labels)
+        with self.lock:
+            # NOTE: bucket counts, then sum and count.
+            histogram = self.histograms.setdefault(
+                key, [0.0] * (len(self.buckets) + 2)
+            )
+
+            for idx, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    histogram[idx] += 1
+
+            histogram[-2] += span.duration
+            histogram[-1] += 1
+
+            for k, v in span.values.items():
+                self.counters[
+                    (self._get_metric_name(span.name, k, "total"), labels)
+                ] += v
+
+    def on_count(
+        self, name: str, value: float, labels: dict[str, str]
+    ) -> None:
+        key = (self._get_metric_name(name, "total"), get_labels_key(labels))
+        with self.lock:
+            self.counters[key] += value
+
+    def _format_labels(self, labels: tuple, **extra: str) -> str:
+        items = list(labels) + list(extra.items())
+        if not len(items):
+            return ""
+
+        values = ",".join(
+            f'{re.sub(r"[^a-zA-Z0-9_]", "_", k)}="{escape_label_value(v)}"'
+            for k, v in items
+        )
+
+        return f"{{{values}}}"
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(
+                        f"{name}_bucket{self._format_labels(labels, le=str(bound))} {count:g}"
+                    )
+
+                lines.append(
+                    f"{name}_bucket{self._format_labels(labels, le='+Inf')} {histogram[-1]:g}"
+                )
+
+                lines.append(
+                    f"{name}_sum{self._format_labels(labels)} {histogram[-2]:g}"
+                )
+
+                lines.append(
+                    f"{name}_count{self._format_labels(labels)} {histogram[-1]:g}"
+                )
+
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+
+                lines.append(f"{name}{self._format_labels(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host: str = "0.0.0.0", port: int = 9464) -> None:
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+                )
+
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        ).start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class OpenTelemetryExporter:
+    # NOTE: spans are started and ended together with the rage spans, so
+    # they nest under the caller's active OpenTelemetry span.
+    def __init__(self, tracer: Any = None, meter: Any = None):
+        try:
+            from opentelemetry import trace, metrics
+            from opentelemetry.trace import Status, StatusCode
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryExporter requires 'opentelemetry-api'."
+            ) from e
+
+        self.trace = trace
+        self.status = (Status, StatusCode)
+        self.tracer = (
+            tracer if tracer is not None else trace.get_tracer("rage")
+        )
+        self.meter = meter if meter is not None else metrics.get_meter("rage")
+
+        self.lock = threading.Lock()
+        self._spans: dict[str, Any] = {}
+        self._counters: dict[str, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        with self.lock:
+            parent = (
+                self._spans.get(span.parent.span_id)
+                if span.parent is not None
+                else None
+            )
+
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=(
+                self.trace.set_span_in_context(parent)
+                if parent is not None
+                else None
+            ),
+            start_time=span.start_time_ns,
+            attributes=span.labels,
+        )
+
+        with self.lock:
+            self._spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span) -> None:
+        with self.lock:
+            otel_span = self._spans.pop(span.span_id, None)
+
+        if otel_span is None:
+            return
+
+        otel_span.set_attributes(span.values)
+        if span.error is not None:
+            Status, StatusCode = self.status
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+
+        otel_span.end(end_time=span.end_time_ns)
+
+    def on_count(
+        self, name: str, value: float, labels: dict[str, str]
+    ) -> None:
+        with self.lock:
+            if name not in self._counters:
+                self._counters[name] = self.meter.create_counter(name)
+
+        self._counters[name].add(value, attributes=labels)
@@ -0,0 +1,143 @@
+import os
+import time
+
+from functools import wraps
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Protocol
+
+
+class Span:
+    # NOTE: mirrors the OpenTelemetry span data model: 'labels' are low
+    # cardinality attributes used as metric labels, 'values' are numeric
+    # measurements (batch sizes, counts) that exporters may aggregate.
+    __slots__ = (
+        "name",
+        "labels",
+        "values",
+        "trace_id",
+        "span_id",
+        "parent",
+        "start_time_ns",
+        "end_time_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(self, name: str, labels: dict[str, str]):
+        self.name = name
+        self.labels = labels
+        self.values: dict[str, float] = {}
+
+        self.parent = current_span.get()
+        self.trace_id = (
+            self.parent.trace_id
+            if self.parent is not None
+            else os.urandom(16).hex()
+        )
+
+        self.span_id = os.urandom(8).hex()
+        self.start_time_ns = 0
+        self.end_time_ns = 0
+        self.error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time_ns - self.start_time_ns) / 1e9
+
+    def set(self, key: str, value: float) -> None:
+        self.values[key] = value
+
+    def add(self, key: str, value: float) -> None:
+        self.values[key] = self.values.get(key, 0) + value
+
+    def __enter__(self) -> "Span":
+        self.start_time_ns = time.time_ns()
+        self._token = current_span.set(self)
+        for exporter in telemetry.exporters:
+            exporter.on_start(self)
+
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.end_time_ns = time.time_ns()
+        current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+
+        for exporter in telemetry.exporters:
+            exporter.on_end(self)
+
+
+class NoopSpan:
+    def set(self, key: str, value: float) -> None:
+        pass
+
+    def add(self, key: str, value: float) -> None:
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+current_span: ContextVar[Span | None] = ContextVar(
+    "current_span", default=None
+)
+
+
+class Exporter(Protocol):
+    def on_start(self, span: Span) -> None: ...
+
+    def on_end(self, span: Span) -> None: ...
+
+    def on_count(
+        self, name: str, value: float, labels: dict[str, str]
+    ) -> None: ...
+
+
+class Telemetry:
+    # NOTE: with no exporter registered every entry point returns right
+    # away, so instrumentation costs one list check when disabled.
+    def __init__(self):
+        self.exporters: list[Exporter] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter: Exporter) -> None:
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Exporter) -> None:
+        self.exporters.remove(exporter)
+
+    def span(self, name: str, **labels: str) -> Span | NoopSpan:
+        if not self.exporters:
+            return NOOP_SPAN
+
+        return Span(name=name, labels=labels)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        for exporter in self.exporters:
+            exporter.on_count(name=name, value=value, labels=labels)
+
+
+telemetry = Telemetry()
+
+
+def traced(name: str, **labels: str) -> Callable:
+    def decorator(func: Callable[..., Awaitable]) -> Callable:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not telemetry.exporters:
+                return await func(*args, **kwargs)
+
+            with Span(name=name, labels=labels):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -2,7 +2,7 @@ from typing import Literal
 from functools import lru_cache
 from langchain_openai import OpenAIEmbeddings
 
-from rage.embeddings import IonosEmbeddings
+from rage.embeddings import IonosEmbeddings, FastEmbedEmbeddings
 
 
 @lru_cache()
@@ -25,3 +25,11 @@ def get_ionos_embeddings(
     ] = "BAAI/bge-m3",
 ) -> IonosEmbeddings:
     return IonosEmbeddings(model=model)
+
+
+@lru_cache()
+def get_fastembed_embeddings(
+    model: str = "BAAI/bge-small-en-v1.5",
+    parallel: int | None = None,
+) -> FastEmbedEmbeddings:
+    return FastEmbedEmbeddings(model=model, parallel=parallel)
@@ -0,0 +1,29 @@
+import sys
+import importlib
+
+from typing import Any, Callable
+
+
+def get_lazy_getattr(
+    package: str,
+    attributes: dict[str, str],
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    # NOTE: module-level '__getattr__' (PEP 562) importing the submodule
+    # defining an attribute on first access, so importing a package does
+    # not import the heavy dependencies of all its submodules.
+    def __getattr__(name: str) -> Any:
+        module_name = attributes.get(name)
+        if module_name is None:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            )
+
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[package])) | set(attributes))
+
+    return __getattr__, __dir__
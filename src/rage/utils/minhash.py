@@ -0,0 +1,72 @@
+import re
+import xxhash
+import numpy as np
+
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHasher:
+    def __init__(
+        self,
+        num_perm: int = 128,
+        num_bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        assert (
+            num_perm % num_bands == 0
+        ), "Expected 'num_perm' to be a multiple of 'num_bands'."
+
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.rows = num_perm // num_bands
+        self.shingle_size = shingle_size
+
+        generator = np.random.default_rng(seed)
+        self.a = generator.integers(
+            1, MERSENNE_PRIME, num_perm, dtype=np.uint64
+        )
+        self.b = generator.integers(
+            0, MERSENNE_PRIME, num_perm, dtype=np.uint64
+        )
+
+    def get_shingles(self, text: str) -> set[str]:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+
+        return {
+            " ".join(words[i : i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def get_signature(self, shingles: set[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (xxhash.xxh32_intdigest(s) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+
+        # NOTE: uint64 products wrap around, as in the usual numpy MinHash
+        # implementations; the result is still a valid hash family.
+        with np.errstate(over="ignore"):
+            permuted = (
+                np.outer(hashes, self.a) + self.b
+            ) % MERSENNE_PRIME & MAX_HASH
+
+        return permuted.min(axis=0)
+
+    def get_band_keys(self, signature: np.ndarray) -> list[str]:
+        return [
+            f"{band}:{xxhash.xxh64_hexdigest(row.tobytes())}"
+            for band, row in enumerate(signature.reshape(self.num_bands, -1))
+        ]
+
+    @staticmethod
+    def jaccard(shingles_a: set[str], shingles_b: set[str]) -> float:
+        if not len(shingles_a | shingles_b):
+            return 1.0
+
+        return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import xxhash
+import pytest
+
+from langchain_core.embeddings import Embeddings
+from langchain_qdrant.sparse_embeddings import SparseEmbeddings, SparseVector
+
+from rage.config import config
+from rage.meta.interfaces import TextChunk
+from rage.retriever import Retriever
+
+
+COLLECTION_NAME = "documents"
+
+
+class HashEmbeddings(Embeddings):
+    model = "hash"
+    dimensions = 8
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [b / 255 + 0.01 for b in digest[: self.dimensions]]
+
+
+class HashSparseEmbeddings(SparseEmbeddings):
+    def embed_documents(self, texts: list[str]) -> list[SparseVector]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        indices = sorted({xxhash.xxh32_intdigest(w) for w in text.split()})
+        return SparseVector(indices=indices, values=[1.0] * len(indices))
+
+
+def get_chunks(
+    document_id: str,
+    source_path: str,
+    texts: list[str],
+) -> list[TextChunk]:
+    chunk_ids = [xxhash.xxh64(text).hexdigest() for text in texts]
+    return [
+        TextChunk(
+            text=text,
+            num_tokens=len(text.split()),
+            metadata={
+                "document_id": document_id,
+                "source_path": source_path,
+                "chunk_id": chunk_ids[idx],
+                "chunk_index": idx + 1,
+                "previous_chunk_id": chunk_ids[idx - 1] if idx else None,
+                "next_chunk_id": (
+                    chunk_ids[idx + 1] if idx < len(texts) - 1 else None
+                ),
+            },
+        )
+        for idx, text in enumerate(texts)
+    ]
+
+
+async def get_owners(retriever: Retriever) -> dict[str, list[str]]:
+    records = await retriever.scroll(COLLECTION_NAME, limit=100)
+    return {
+        record.payload["page_content"]: record.payload["metadata"][  # type: ignore
+            "document_ids"
+        ]
+        for record in records
+    }
+
+
+@pytest.fixture
+def retriever(monkeypatch: pytest.MonkeyPatch) -> Retriever:
+    monkeypatch.setattr(config, "qdrant_location", ":memory:")
+    monkeypatch.setattr(config, "dense_embed_doc_cache_path", None)
+
+    return Retriever(
+        dense_embeddings=HashEmbeddings(),
+        sparse_embeddings=HashSparseEmbeddings(),
+    )
+
+
+async def insert(retriever: Retriever, text_chunks: list[TextChunk]) -> None:
+    await retriever.insert_text_chunks(
+        COLLECTION_NAME,
+        text_chunks,
+        deduplicate="exact",
+    )
+
+
+def test_delete_chunks_by_document_keeps_shared_points(retriever):
+    async def run() -> None:
+        await retriever.create_collection(COLLECTION_NAME)
+        await insert(retriever, get_chunks("a", "a.md", ["intro a", "footer"]))
+        await insert(retriever, get_chunks("b", "b.md", ["intro b", "footer"]))
+
+        await retriever.delete_chunks(
+            COLLECTION_NAME,
+            "metadata.document_id",
+            "a",
+        )
+
+        assert await get_owners(retriever) == {
+            "intro b": ["b"],
+            "footer": ["b"],
+        }
+
+        # NOTE: 'b' is not the first owner of the shared point.
+        await retriever.delete_chunks(
+            COLLECTION_NAME,
+            "metadata.document_id",
+            ["b"],
+        )
+
+        assert await get_owners(retriever) == {}
+
+    asyncio.run(run())
+
+
+def test_stale_removal_keeps_remaining_owner(retriever):
+    async def run() -> None:
+        await retriever.create_collection(COLLECTION_NAME)
+        await insert(
+            retriever, get_chunks("a1", "a.md", ["intro a", "footer"])
+        )
+        await insert(retriever, get_chunks("b", "b.md", ["intro b", "footer"]))
+
+        # NOTE: a.md changes twice; the shared point keeps a1's metadata, so
+        # b's ownership must survive both stale removals of a.md.
+        await insert(retriever, get_chunks("a2", "a.md", ["intro a2"]))
+        await insert(retriever, get_chunks("a3", "a.md", ["intro a3"]))
+
+        assert await get_owners(retriever) == {
+            "intro a3": ["a3"],
+            "intro b": ["b"],
+            "footer": ["b"],
+        }
+
+    asyncio.run(run())
+
+
+def test_stale_removal_misses_documents_owning_only_shared_points(retriever):
+    async def run() -> None:
+        await retriever.create_collection(COLLECTION_NAME)
+        await insert(retriever, get_chunks("a", "a.md", ["footer"]))
+        await insert(retriever, get_chunks("b1", "b.md", ["footer"]))
+        await insert(retriever, get_chunks("b2", "b.md", ["intro b2"]))
+
+        # NOTE: documented limit, b1 was never the first owner of a point.
+        assert (await get_owners(retriever))["footer"] == ["a", "b1"]
+
+    asyncio.run(run())
+
+
+def test_expand_context_follows_first_owner_links(retriever):
+    async def run() -> None:
+        await retriever.create_collection(COLLECTION_NAME)
+        await insert(retriever, get_chunks("a", "a.md", ["intro a", "footer"]))
+        await insert(retriever, get_chunks("b", "b.md", ["intro b", "footer"]))
+
+        items = await retriever.sparse_search(COLLECTION_NAME, "footer", k=1)
+        (item,) = await retriever.expand_context(COLLECTION_NAME, items)
+
+        # NOTE: documented limit, the hit is reported with the metadata and
+        # the neighbours of its first owner 'a', not of 'b'.
+        assert item.metadata["document_ids"] == ["a", "b"]
+        assert item.text == "intro a\nfooter"
+
+    asyncio.run(run())
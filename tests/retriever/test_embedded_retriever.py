@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+
+from rage.config import config
+from rage.retriever import (
+    Retriever,
+    EmbeddedRetriever,
+    WeightedMetadataItem,
+)
+
+from test_deduplication import (
+    HashEmbeddings,
+    HashSparseEmbeddings,
+    get_chunks,
+)
+
+
+COLLECTION_NAME = "documents"
+
+
+@pytest.fixture
+def retrievers(monkeypatch: pytest.MonkeyPatch) -> list[Retriever]:
+    monkeypatch.setattr(config, "qdrant_location", ":memory:")
+    monkeypatch.setattr(config, "dense_embed_doc_cache_path", None)
+
+    return [
+        retriever_class(
+            dense_embeddings=HashEmbeddings(),
+            sparse_embeddings=HashSparseEmbeddings(),
+        )
+        for retriever_class in (Retriever, EmbeddedRetriever)
+    ]
+
+
+async def load(retriever: Retriever) -> None:
+    await retriever.create_collection(COLLECTION_NAME)
+    for idx in range(5):
+        text_chunks = get_chunks(
+            f"d{idx}",
+            f"{idx}.md",
+            [f"text {idx} {chunk_idx}" for chunk_idx in range(4)],
+        )
+
+        for tc in text_chunks:
+            tc.metadata["category"] = "a" if idx % 2 else "b"
+
+        await retriever.insert_text_chunks(COLLECTION_NAME, text_chunks)
+
+
+def test_weighted_search_and_context_match_qdrant(retrievers):
+    async def run(retriever: Retriever) -> tuple[list, list]:
+        await load(retriever)
+        items = await retriever.dense_search_weighted(
+            COLLECTION_NAME,
+            "text 1 2",
+            [
+                WeightedMetadataItem(
+                    key="metadata.category", value="a", weight=0.5
+                )
+            ],
+            k=5,
+            pre_k=10,
+        )
+
+        context_items = await retriever.expand_context(
+            COLLECTION_NAME,
+            items[:2],
+        )
+
+        return (
+            [(item.text, round(item.score, 4)) for item in items],  # type: ignore
+            [item.text for item in context_items],
+        )
+
+    qdrant_results, embedded_results = [
+        asyncio.run(run(retriever)) for retriever in retrievers
+    ]
+
+    assert embedded_results == qdrant_results
+
+
+def test_embedded_retriever_rejects_aliases(retrievers):
+    _, retriever = retrievers
+
+    async def run() -> None:
+        await load(retriever)
+        with pytest.raises(AssertionError, match="aliases"):
+            await retriever.swap_alias("alias", COLLECTION_NAME)
+
+        await retriever.delete_collection(COLLECTION_NAME)
+        assert not await retriever.collection_exists(COLLECTION_NAME)
+
+    asyncio.run(run())
+
+
+async def get_points(retriever: Retriever) -> dict[str, tuple]:
+    records = await retriever.scroll(COLLECTION_NAME, limit=100)
+    return {
+        record.payload["page_content"]: (  # type: ignore
+            record.id,
+            record.payload["metadata"]["document_id"],  # type: ignore
+        )
+        for record in records
+    }
+
+
+def test_edited_document_keeps_unchanged_points(retrievers):
+    async def run(retriever: Retriever) -> None:
+        await retriever.create_collection(COLLECTION_NAME)
+        await retriever.insert_text_chunks(
+            COLLECTION_NAME,
+            get_chunks("d1", "a.md", ["intro", "body", "footer"]),
+        )
+
+        points = await get_points(retriever)
+        stats = await retriever.insert_text_chunks(
+            COLLECTION_NAME,
+            get_chunks("d2", "a.md", ["intro", "edited body", "footer"]),
+        )
+
+        edited_points = await get_points(retriever)
+        (item,) = await retriever.expand_context(
+            COLLECTION_NAME,
+            await retriever.sparse_search(COLLECTION_NAME, "intro", k=1),
+        )
+
+        # NOTE: only the edited chunk is embedded, the others keep their
+        # points and get the new document id and neighbours.
+        assert stats.num_points == 1
+        assert edited_points == {
+            "intro": (points["intro"][0], "d2"),
+            "edited body": (edited_points["edited body"][0], "d2"),
+            "footer": (points["footer"][0], "d2"),
+        }
+
+        assert item.text == "intro\nedited body"
+
+    for retriever in retrievers:
+        asyncio.run(run(retriever))